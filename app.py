@@ -1,10 +1,20 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.routing import Match
 import uvicorn
 from pathlib import Path
 from backend.api.media_routes import router as media_router
 from backend.models.database import Base, engine
+from backend.services.db_service import db_service
+from backend.services.browser_pool import shutdown_browser_pool
+from backend.services.metrics import registry, HTTP_IN_FLIGHT, HTTP_SECONDS
+from backend.services.profiler import profile_request
+from backend.config.profiling_config import profiling_config
+from backend.config.response_config import response_config
 
 # Створюємо необхідні директорії
 UPLOAD_DIR = Path("uploads")
@@ -23,8 +33,62 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Feed-Cursor", "X-Profile-Path", "X-Search-Partial"],
 )
 
+class CompressionMiddleware(GZipMiddleware):
+    """GZip для всього, крім Server-Sent Events: стиснення затримувало б події."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and b"text/event-stream" in dict(scope["headers"]).get(b"accept", b""):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+if response_config.RESPONSE_GZIP:
+    app.add_middleware(CompressionMiddleware, minimum_size=response_config.GZIP_MINIMUM_SIZE,
+                       compresslevel=response_config.GZIP_LEVEL)
+
+def route_path(request: Request) -> str:
+    """Шаблон маршруту для міток метрик (обмежує кардинальність)."""
+    route = request.scope.get("route")
+    if route is None:
+        for candidate in request.app.router.routes:
+            match, _ = candidate.matches(request.scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", "unmatched")
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    # Час обробки запиту по маршруту (шаблон шляху, а не сам шлях)
+    HTTP_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        HTTP_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                             route=route_path(request), status=status)
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    # Профілювання на вимогу: X-Profile: <token> або ?profile=<token> з allowlist
+    token = request.headers.get("X-Profile") or request.query_params.get("profile")
+    if not token or token not in profiling_config.PROFILE_TOKENS:
+        return await call_next(request)
+    name = f"{request.method} {request.url.path}"
+    with profile_request(name, profiling_config.PROFILE_DIR,
+                         profiling_config.PROFILE_INTERVAL_MS / 1000) as profile:
+        response = await call_next(request)
+    if profile.output_path:
+        response.headers["X-Profile-Path"] = profile.output_path
+    return response
+
 # Монтуємо статичні файли
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
@@ -34,6 +98,20 @@ Base.metadata.create_all(bind=engine)
 # Підключаємо роутери
 app.include_router(media_router, prefix="/api/v1", tags=["media"])
 
+@app.on_event("startup")
+async def startup():
+    # Створюємо індекси / таблиці сховища джерел
+    await db_service.init_db()
+
+@app.on_event("shutdown")
+def shutdown():
+    # Зупиняємо процеси Chrome пулу браузерів
+    shutdown_browser_pool()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {"message": "UA Media Scanner API"}
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional, Dict, Any
-import pandas as pd
-from ..models.database import get_db, KnownSource, NewSource
 from ..services.search_service import search_service
+from .responses import FastJSONResponse, JSONArrayStreamingResponse
 from ..services.db_service import db_service
+from ..services.deadline import Deadline
+from ..services.discovery_state import discovery_service
+from ..services.ingestion_service import TERMINAL_STATUSES, ingestion_service
+from ..services.profiler import in_profile
+from ..services.reanalysis_service import reanalysis_service
+from ..services.source_feed import source_feed
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 from datetime import datetime
 import logging
@@ -12,7 +18,8 @@ import os
 from bson import ObjectId
 import json
 
-router = APIRouter()
+# Відповіді кодуються orjson (ObjectId та datetime - без jsonable_encoder)
+router = APIRouter(default_response_class=FastJSONResponse)
 
 class PyObjectId(ObjectId):
     @classmethod
@@ -32,6 +39,17 @@ class PyObjectId(ObjectId):
 
 class SearchQuery(BaseModel):
     query: str
+    # Лише записи, яких не було в попередніх запусках цього запиту
+    incremental: bool = False
+    # Бюджет часу: після нього повертається вже зібране
+    deadline_ms: Optional[int] = Field(default=None, ge=1, le=600000)
+
+class BatchSearchQuery(BaseModel):
+    queries: List[str] = Field(min_length=1, max_length=200)
+    max_results: int = Field(default=20, ge=1, le=50)
+    concurrency: int = Field(default=8, ge=1, le=32)
+    incremental: bool = False
+    deadline_ms: Optional[int] = Field(default=None, ge=1, le=600000)
 
 class DomainInfo(BaseModel):
     domain: str
@@ -69,6 +87,8 @@ class MediaResponse(BaseModel):
     domain: str
     description: Optional[str] = None
     found_at: str = Field(description="ISO format datetime string")
+    enrichment: Optional[str] = Field(
+        default=None, description="analyzed, resolved (no AI analysis) or domain_only (link not resolved)")
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
     
     @field_validator('found_at', mode='before')
@@ -110,84 +130,196 @@ class SourceResponse(BaseModel):
         }
     )
 
-@router.post("/upload-csv")
-async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+@router.post("/upload-csv", status_code=202)
+async def upload_csv(file: UploadFile = File(...)):
+    """Приймає CSV і імпортує його у фоні; прогрес - через /ingestions/{job_id}."""
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
     try:
-        contents = await file.read()
-        df = pd.read_csv(pd.io.common.BytesIO(contents))
-        
-        # Зберігаємо дані в БД
-        for _, row in df.iterrows():
-            domain = row.get('domain', '').strip()
-            name = row.get('name', '').strip()
-            url = row.get('url', '').strip()
-            
-            # Пропускаємо рядки з порожнім доменом
-            if not domain:
-                continue
-                
-            # Перевіряємо чи існує вже таке джерело
-            existing_source = db.query(KnownSource).filter(KnownSource.domain == domain).first()
-            
-            if existing_source:
-                # Оновлюємо існуюче джерело
-                existing_source.name = name
-                existing_source.url = url
-            else:
-                # Створюємо нове джерело
-                source = KnownSource(
-                    domain=domain,
-                    name=name,
-                    url=url
-                )
-                db.add(source)
-        
-        db.commit()
-        return {"message": "CSV file processed successfully"}
+        path = await ingestion_service.save_upload(file)
+        job = await ingestion_service.start(path, file.filename)
+        return {"message": "CSV file accepted for processing",
+                "job_id": job["job_id"],
+                "status_url": f"/api/v1/ingestions/{job['job_id']}",
+                "ws_url": f"/api/v1/ingestions/{job['job_id']}/ws"}
     
     except Exception as e:
-        db.rollback()  # Відкатуємо зміни у випадку помилки
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/search-media")
-async def search_media(query: SearchQuery) -> List[MediaResponse]:
+@router.get("/ingestions/{job_id}")
+async def get_ingestion_progress(job_id: str) -> Dict:
+    """Прогрес імпорту CSV."""
+    job = await ingestion_service.get_progress(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    job.pop("_id", None)
+    return job
+
+@router.websocket("/ingestions/{job_id}/ws")
+async def ingestion_progress_ws(websocket: WebSocket, job_id: str):
+    """Надсилає стан імпорту після кожного пакета рядків до завершення."""
+    await websocket.accept()
+    queue = ingestion_service.subscribe(job_id)
+    try:
+        job = await ingestion_service.get_progress(job_id)
+        if not job:
+            await websocket.close(code=4404, reason="Ingestion job not found")
+            return
+        job.pop("_id", None)
+        while True:
+            await websocket.send_text(json.dumps(job, default=str))
+            if job["status"] in TERMINAL_STATUSES:
+                break
+            job = await queue.get()
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        ingestion_service.unsubscribe(job_id, queue)
+
+def media_response(result: Dict) -> Dict:
+    """Результат пошуку у форматі MediaResponse без побудови pydantic-моделі.
+
+    Як і модель, видає новий `_id`, якщо в результату його немає.
+    """
+    found_at = result.get('found_at')
+    return {
+        'url': result['url'],
+        'domain': result['domain'],
+        'description': result.get('description'),
+        'found_at': found_at.isoformat() if isinstance(found_at, datetime) else found_at,
+        'enrichment': result.get('enrichment'),
+        '_id': str(result.get('_id') or ObjectId()),
+    }
+
+def is_partial(deadline: Deadline, results: List[Dict]) -> bool:
+    """Чи обрізав бюджет часу пошук: етап не вклався або результат оброблено не повністю."""
+    return deadline.exceeded or any(result.get('enrichment', 'analyzed') != 'analyzed' for result in results)
+
+@router.post("/search-media", response_model=List[MediaResponse])
+async def search_media(query: SearchQuery):
     """Пошук нових медіа джерел."""
     try:
-        # Виконуємо пошук
-        results = search_service.search_media(query.query)
+        deadline = Deadline(query.deadline_ms)
+        discovery = await discovery_service.load(query.query, skip_seen=query.incremental)
+        # Виконуємо пошук поза event loop: він блокується на мережі та браузері
+        results = await run_in_threadpool(in_profile, search_service.search_media, query.query, 20, None,
+                                          discovery, deadline)
+        await discovery_service.save([discovery])
         
-        # Конвертуємо результати в MediaResponse об'єкти
         media_responses = []
         for result in results:
             # Зберігаємо результат в базу даних
             await db_service.add_new_source(result)
-            # Створюємо MediaResponse об'єкт
-            media_response = MediaResponse(**result)
-            media_responses.append(media_response)
+            media_responses.append(media_response(result))
             
-        return media_responses
+        # Частковий результат позначається заголовком, тіло - той самий список
+        return FastJSONResponse(media_responses,
+                                headers={"X-Search-Partial": "1"} if is_partial(deadline, results) else None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/known-sources")
-async def get_known_sources() -> List[Dict]:
+@router.post("/search-media/batch")
+async def search_media_batch(batch: BatchSearchQuery) -> Dict[str, Any]:
+    """Пакетний пошук: запити виконуються паралельно зі спільною дедуплікацією."""
+    try:
+        started = datetime.utcnow()
+        deadline = Deadline(batch.deadline_ms)
+        # Пошук синхронний - виконуємо його поза event loop
+        queries = list(dict.fromkeys(q.strip() for q in batch.queries if q and q.strip()))
+        discovery = await discovery_service.load_many(queries, skip_seen=batch.incremental)
+        outcome = await run_in_threadpool(in_profile, search_service.search_batch, queries,
+                                          batch.max_results, batch.concurrency, discovery, deadline)
+        await discovery_service.save(discovery.values())
+
+        groups = []
+        for group in outcome['queries']:
+            media_responses = []
+            for result in group['results']:
+                # Кожен домен зберігаємо один раз - від запиту, що знайшов його першим
+                if outcome['domains'].get(result['domain'], [None])[0] == group['query']:
+                    await db_service.add_new_source(dict(result))
+                media_responses.append(media_response(result))
+            groups.append({'query': group['query'], 'results': media_responses, 'error': group['error'],
+                           'skipped_seen': discovery[group['query']].skipped})
+
+        return FastJSONResponse({
+            'queries': groups,
+            'overlap': outcome['overlap'],
+            'partial': is_partial(deadline, [result for group in outcome['queries'] for result in group['results']]),
+            'elapsed_seconds': round((datetime.utcnow() - started).total_seconds(), 3),
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/known-sources", response_model=List[Dict])
+async def get_known_sources(skip: int = 0, limit: Optional[int] = None):
     """Отримання списку відомих джерел."""
     try:
-        return await db_service.get_known_sources()
+        if not skip and not limit:
+            # Уся колекція - потоком пакетів, без списку в пам'яті
+            return JSONArrayStreamingResponse(db_service.storage.iter_batches("known_sources"))
+        return FastJSONResponse(await db_service.get_known_sources(skip=skip, limit=limit))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/new-sources")
-async def get_new_sources() -> List[Dict]:
-    """Отримання списку нових джерел."""
+@router.get("/new-sources", response_model=List[Dict])
+async def get_new_sources(skip: int = 0, limit: Optional[int] = None):
+    """Отримання списку нових джерел.
+
+    X-Feed-Cursor - курсор стрічки на момент до читання списку: з ним
+    /new-sources/stream продовжить без пропусків.
+    """
     try:
-        return await db_service.get_new_sources()
+        headers = {"X-Feed-Cursor": source_feed.cursor}
+        if not skip and not limit:
+            return JSONArrayStreamingResponse(db_service.storage.iter_batches("new_sources"), headers=headers)
+        return FastJSONResponse(await db_service.get_new_sources(skip=skip, limit=limit), headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/new-sources/stream")
+async def new_sources_stream(request: Request, cursor: Optional[str] = None):
+    """Server-Sent Events з новими та підтвердженими джерелами.
+
+    Відновлення - з курсора (?cursor= або Last-Event-ID при перепідключенні).
+    """
+    cursor = request.headers.get("last-event-id") or cursor
+
+    async def events():
+        stream = source_feed.stream(cursor, heartbeat=15)
+        try:
+            async for event in stream:
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                data = json.dumps(event, default=str, ensure_ascii=False)
+                yield f"id: {event['cursor']}\nevent: {event['type']}\ndata: {data}\n\n"
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/new-sources/ws")
+async def new_sources_ws(websocket: WebSocket, cursor: Optional[str] = None):
+    """Та сама стрічка через WebSocket."""
+    await websocket.accept()
+    stream = source_feed.stream(cursor, heartbeat=30)
+    try:
+        async for event in stream:
+            await websocket.send_text(json.dumps(event or {"type": "ping"}, default=str))
+            if event and event["type"] == "lagged":
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.aclose()
+
 @router.post("/import-csv")
 async def import_csv(csv_path: str):
     """Імпорт джерел з CSV файлу."""
@@ -224,10 +356,32 @@ async def verify_source(source_id: str):
     """Підтвердження нового джерела."""
     try:
         # Оновлюємо статус джерела
-        await db_service.new_sources.update_one(
-            {"_id": source_id},
-            {"$set": {"is_verified": True, "verified_at": datetime.utcnow()}}
-        )
+        if not await db_service.verify_source(source_id):
+            raise HTTPException(status_code=404, detail="Source not found")
         return {"message": "Source verified successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/reanalyze")
+async def start_reanalysis(resume: Optional[str] = None, from_archive: bool = False):
+    """Запуск (або продовження) повторного аналізу всіх відомих джерел.
+
+    `from_archive` - аналізувати збережені сторінки без завантаження.
+    """
+    try:
+        run = await reanalysis_service.start(resume_run_id=resume, from_archive=from_archive)
+        return {"message": "Reanalysis started", "run_id": run["run_id"]}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/reanalyze/{run_id}")
+async def get_reanalysis_progress(run_id: str) -> Dict:
+    """Прогрес повторного аналізу."""
+    progress = await reanalysis_service.get_progress(run_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return progress
\ No newline at end of file
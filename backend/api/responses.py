@@ -0,0 +1,53 @@
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse, StreamingResponse
+
+def _default(value: Any):
+    """Типи, яких orjson не знає сам (datetime, dict, list він кодує нативно)."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+def dumps(content: Any) -> bytes:
+    # OPT_NAIVE_UTC не вмикаємо: наївні datetime лишаються як isoformat() без зони
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson.
+
+    Documents from storage (ObjectId, datetime, NaN from pandas) are
+    encoded directly, without jsonable_encoder walking every item. NaN and
+    infinity become null.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+async def _json_array(batches: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    yield b"["
+    first = True
+    async for batch in batches:
+        if not batch:
+            continue
+        chunk = dumps(batch)[1:-1]
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]"
+
+class JSONArrayStreamingResponse(StreamingResponse):
+    """JSON array streamed batch by batch from a storage cursor.
+
+    The whole collection is never held in memory or encoded at once; the
+    client starts receiving data after the first batch.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, batches: AsyncIterator[List[Dict]], **kwargs):
+        super().__init__(_json_array(batches), media_type=self.media_type, **kwargs)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, UploadFile, HTTPException
 from typing import List, Dict
 import logging
 from ..services.search_service import search_service
-from ..services.file_service import file_service
+from ..services.ingestion_service import ingestion_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -20,21 +20,23 @@ async def search_media(query: str) -> List[Dict]:
         logger.error(f"Error in search_media endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/api/v1/upload-csv")
-async def upload_csv(file: UploadFile) -> List[Dict]:
+@router.post("/api/v1/upload-csv", status_code=202)
+async def upload_csv(file: UploadFile) -> Dict:
     """
-    Upload and process a CSV file containing media sources.
-    Returns a list of processed media sources.
+    Accept a CSV file containing media sources for background ingestion.
+    Returns the ingestion job; progress is served by the media router.
     """
     try:
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="File must be a CSV")
             
-        # Save and process the file
-        file_path = file_service.save_file(file)
-        results = file_service.process_csv(file_path)
+        # Save the file and process it in the background
+        file_path = await ingestion_service.save_upload(file)
+        job = await ingestion_service.start(file_path, file.filename)
         
-        return results
+        return {"job_id": job["job_id"], "status": job["status"]}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in upload_csv endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
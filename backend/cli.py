@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import json
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+async def reanalyze(args):
+    from .services.reanalysis_service import ReanalysisService
+
+    service = ReanalysisService(batch_size=args.batch_size, concurrency=args.concurrency,
+                                processes=args.processes)
+    await service.storage.init()
+    progress = await service.run(resume_run_id=args.resume, from_archive=args.from_archive)
+    print(json.dumps(progress, default=str, ensure_ascii=False, indent=2))
+
+async def archive(args):
+    from .services.page_archive import page_archive
+
+    if args.prune:
+        await asyncio.to_thread(page_archive.prune)
+    print(json.dumps(await asyncio.to_thread(page_archive.stats), ensure_ascii=False, indent=2))
+
+async def browser_pool(args):
+    from .config.browser_config import browser_config
+    from .services.browser_pool import serve_pool
+
+    # serve_forever блокує - запускаємо поза event loop
+    await asyncio.to_thread(serve_pool, args.address, browser_config.BROWSER_POOL_AUTHKEY,
+                            args.workers, args.timeout, browser_config.BROWSER_LEAN)
+
+def main():
+    parser = argparse.ArgumentParser(description="UA Media Scanner commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_reanalyze = subparsers.add_parser("reanalyze", help="Повторний аналіз усіх відомих джерел")
+    parser_reanalyze.add_argument("--resume", help="ID запуску, який потрібно продовжити")
+    parser_reanalyze.add_argument("--batch-size", type=int, default=200)
+    parser_reanalyze.add_argument("--concurrency", type=int, default=32)
+    parser_reanalyze.add_argument("--processes", type=int, default=None)
+    parser_reanalyze.add_argument("--from-archive", action="store_true",
+                                  help="Аналізувати збережені сторінки без завантаження")
+    parser_reanalyze.set_defaults(func=reanalyze)
+
+    parser_archive = subparsers.add_parser("archive", help="Статистика архіву сторінок")
+    parser_archive.add_argument("--prune", action="store_true", help="Застосувати обмеження зберігання")
+    parser_archive.set_defaults(func=archive)
+
+    parser_pool = subparsers.add_parser("browser-pool", help="Пул браузерних воркерів як окремий сервіс")
+    parser_pool.add_argument("--address", default="127.0.0.1:7777")
+    parser_pool.add_argument("--workers", type=int, default=4)
+    parser_pool.add_argument("--timeout", type=float, default=45.0)
+    parser_pool.set_defaults(func=browser_pool)
+
+    args = parser.parse_args()
+    asyncio.run(args.func(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class ArchiveConfig:
+    """On-disk page archive settings.
+
+    Fetched pages are stored once per content hash under ARCHIVE_DIR;
+    responses older than ARCHIVE_MAX_AGE_DAYS, versions beyond
+    ARCHIVE_MAX_VERSIONS per URL and the oldest responses above
+    ARCHIVE_MAX_BYTES of compressed data are pruned.
+    """
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "1") != "0"
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", os.path.join(BASE_DIR, "database", "archive"))
+    ARCHIVE_MAX_BYTES: int = int(os.getenv("ARCHIVE_MAX_BYTES", str(5 * 1024 ** 3)))
+    ARCHIVE_MAX_AGE_DAYS: float = float(os.getenv("ARCHIVE_MAX_AGE_DAYS", "90"))
+    ARCHIVE_MAX_VERSIONS: int = int(os.getenv("ARCHIVE_MAX_VERSIONS", "3"))
+    # Рівень стиснення zstd (1-22) або zlib (1-9), якщо zstandard не встановлено
+    ARCHIVE_COMPRESSION_LEVEL: int = int(os.getenv("ARCHIVE_COMPRESSION_LEVEL", "3"))
+
+# Create default config instance
+archive_config = ArchiveConfig()
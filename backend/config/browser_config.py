@@ -0,0 +1,21 @@
+import os
+
+class BrowserConfig:
+    """Browser worker pool settings.
+
+    Chrome runs in BROWSER_WORKERS separate processes. With
+    BROWSER_POOL_ADDRESS (host:port) set, the API connects to a pool served
+    by `python -m backend.cli browser-pool` instead of starting its own.
+    The remote pool exchanges pickled objects, so it refuses to start or
+    connect without an explicit BROWSER_POOL_AUTHKEY of at least 16
+    characters shared by the pool and the API.
+    """
+    BROWSER_WORKERS: int = int(os.getenv("BROWSER_WORKERS", "1"))
+    BROWSER_TASK_TIMEOUT: float = float(os.getenv("BROWSER_TASK_TIMEOUT", "45"))
+    BROWSER_POOL_ADDRESS: str = os.getenv("BROWSER_POOL_ADDRESS", "")
+    BROWSER_POOL_AUTHKEY: str = os.getenv("BROWSER_POOL_AUTHKEY", "")
+    # BROWSER_LEAN=0 вимикає eager-завантаження та блокування ресурсів (для порівняння)
+    BROWSER_LEAN: bool = os.getenv("BROWSER_LEAN", "1") != "0"
+
+# Create default config instance
+browser_config = BrowserConfig()
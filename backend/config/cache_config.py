@@ -0,0 +1,22 @@
+import os
+
+class CacheConfig:
+    """Provider result cache settings.
+
+    TTLs are per provider, in seconds. With PROVIDER_CACHE_SWR enabled an
+    entry older than its TTL but younger than TTL + PROVIDER_CACHE_MAX_STALE
+    is served immediately and refreshed in the background. Empty or
+    unparseable provider responses are cached for PROVIDER_CACHE_NEGATIVE_TTL
+    only (0 disables caching them).
+    """
+    PROVIDER_CACHE_TTL: dict = {
+        "ddg": float(os.getenv("PROVIDER_CACHE_TTL_DDG", "900")),
+        "google_news": float(os.getenv("PROVIDER_CACHE_TTL_GOOGLE_NEWS", "600")),
+    }
+    PROVIDER_CACHE_MAX_STALE: float = float(os.getenv("PROVIDER_CACHE_MAX_STALE", "3600"))
+    PROVIDER_CACHE_SWR: bool = os.getenv("PROVIDER_CACHE_SWR", "1") != "0"
+    PROVIDER_CACHE_NEGATIVE_TTL: float = float(os.getenv("PROVIDER_CACHE_NEGATIVE_TTL", "30"))
+    PROVIDER_CACHE_MAX_ENTRIES: int = int(os.getenv("PROVIDER_CACHE_MAX_ENTRIES", "5000"))
+
+# Create default config instance
+cache_config = CacheConfig()
@@ -0,0 +1,23 @@
+import os
+
+class ClassifierConfig:
+    """Local media classifier settings.
+
+    The classifier is trained at startup from labelled known_sources. A
+    domain is classified locally only when every target in
+    CLASSIFIER_TARGETS reaches CLASSIFIER_CONFIDENCE; otherwise it goes to
+    the LLM as before.
+    """
+    CLASSIFIER_ENABLED: bool = os.getenv("CLASSIFIER_ENABLED", "1") != "0"
+    CLASSIFIER_TARGETS: list = [target.strip() for target in
+                                os.getenv("CLASSIFIER_TARGETS", "media_type,super_type,region").split(",")
+                                if target.strip()]
+    CLASSIFIER_CONFIDENCE: float = float(os.getenv("CLASSIFIER_CONFIDENCE", "0.9"))
+    # Кількість кошиків хешування ознак
+    CLASSIFIER_FEATURES: int = int(os.getenv("CLASSIFIER_FEATURES", str(1 << 18)))
+    CLASSIFIER_ALPHA: float = float(os.getenv("CLASSIFIER_ALPHA", "0.1"))
+    # Мітки з меншою кількістю прикладів не навчаються
+    CLASSIFIER_MIN_CLASS_SAMPLES: int = int(os.getenv("CLASSIFIER_MIN_CLASS_SAMPLES", "5"))
+
+# Create default config instance
+classifier_config = ClassifierConfig()
@@ -0,0 +1,22 @@
+import os
+
+class LivenessConfig:
+    """Candidate domain liveness pre-check settings.
+
+    Results are cached for LIVENESS_TTL seconds (live domains) or
+    LIVENESS_NEGATIVE_TTL seconds (dead, parked, marketplace), so a domain
+    that was briefly down is retried sooner. A probe that only timed out
+    is cached as unknown for LIVENESS_UNKNOWN_TTL seconds.
+    """
+    LIVENESS_CHECK: bool = os.getenv("LIVENESS_CHECK", "1") != "0"
+    LIVENESS_TTL: float = float(os.getenv("LIVENESS_TTL", "21600"))
+    LIVENESS_NEGATIVE_TTL: float = float(os.getenv("LIVENESS_NEGATIVE_TTL", "3600"))
+    LIVENESS_UNKNOWN_TTL: float = float(os.getenv("LIVENESS_UNKNOWN_TTL", "300"))
+    LIVENESS_TIMEOUT: float = float(os.getenv("LIVENESS_TIMEOUT", "5"))
+    LIVENESS_CONCURRENCY: int = int(os.getenv("LIVENESS_CONCURRENCY", "100"))
+    # Скільки байтів сторінки читати для пошуку ознак паркування
+    LIVENESS_SCAN_BYTES: int = int(os.getenv("LIVENESS_SCAN_BYTES", "8192"))
+    LIVENESS_MAX_ENTRIES: int = int(os.getenv("LIVENESS_MAX_ENTRIES", "20000"))
+
+# Create default config instance
+liveness_config = LivenessConfig()
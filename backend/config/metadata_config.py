@@ -0,0 +1,20 @@
+import os
+
+class MetadataConfig:
+    """Page metadata fetcher settings.
+
+    Pages are streamed only until </head> (or <body>) or until
+    METADATA_MAX_BYTES have been read. With METADATA_NEWSPAPER_FALLBACK=1
+    a head that was fetched but could not be parsed falls back to a full
+    newspaper3k download; pages refused by robots.txt, HTTP errors and
+    non-HTML responses never do.
+    The page language is identified from the title and description; it
+    replaces <html lang> when at least LANGUAGE_MIN_CONFIDENCE sure.
+    """
+    METADATA_MAX_BYTES: int = int(os.getenv("METADATA_MAX_BYTES", "131072"))
+    METADATA_CHUNK_SIZE: int = int(os.getenv("METADATA_CHUNK_SIZE", "8192"))
+    METADATA_NEWSPAPER_FALLBACK: bool = os.getenv("METADATA_NEWSPAPER_FALLBACK", "0") == "1"
+    LANGUAGE_MIN_CONFIDENCE: float = float(os.getenv("LANGUAGE_MIN_CONFIDENCE", "0.8"))
+
+# Create default config instance
+metadata_config = MetadataConfig()
@@ -0,0 +1,17 @@
+import os
+
+class ProfilingConfig:
+    """On-demand request profiling settings.
+
+    A request is profiled only when its `X-Profile` header or `profile`
+    query parameter carries a token from PROFILE_TOKENS (comma-separated).
+    An empty allowlist disables profiling.
+    """
+    PROFILE_TOKENS: frozenset = frozenset(
+        token.strip() for token in os.getenv("PROFILE_TOKENS", "").split(",") if token.strip()
+    )
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+# Create default config instance
+profiling_config = ProfilingConfig()
@@ -0,0 +1,15 @@
+import os
+
+class ResponseConfig:
+    """HTTP response compression settings.
+
+    With RESPONSE_GZIP enabled, responses of at least GZIP_MINIMUM_SIZE
+    bytes are gzip-compressed for clients that accept it.
+    """
+    RESPONSE_GZIP: bool = os.getenv("RESPONSE_GZIP", "1") != "0"
+    GZIP_MINIMUM_SIZE: int = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+    # 1-9: вищий рівень - менше байтів, але більше CPU на кожну відповідь
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "5"))
+
+# Create default config instance
+response_config = ResponseConfig()
@@ -0,0 +1,19 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class StorageConfig:
+    """Source storage configuration.
+
+    STORAGE_BACKEND selects the implementation: "mongo" (default) or "sqlite".
+    All settings can be overridden by environment variables with the same name.
+    """
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "mongo")
+    MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+    MONGODB_DATABASE: str = os.getenv("MONGODB_DATABASE", "media_sources")
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", os.path.join(BASE_DIR, "database", "sources.db"))
+    # Кількість документів в одній транзакції / bulk_write
+    STORAGE_BATCH_SIZE: int = int(os.getenv("STORAGE_BATCH_SIZE", "1000"))
+
+# Create default config instance
+storage_config = StorageConfig()
@@ -0,0 +1,417 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing.connection import wait as wait_connections
+from multiprocessing.managers import BaseManager
+from typing import Dict, List, Optional, Tuple
+from ..config.browser_config import browser_config
+from .metrics import (BROWSER_DRIVERS, BROWSER_RESTARTS, BROWSER_RSS, process_tree, process_tree_rss,
+                      track_stage)
+
+logger = logging.getLogger(__name__)
+
+class BrowserPoolError(Exception):
+    """Браузерний воркер недоступний, завис або впав."""
+
+class ChromeBrowser:
+    """Single headless Chrome used inside a worker process."""
+
+    # Ресурси, що не впливають на редиректи: зображення, шрифти, стилі, медіа, реклама
+    BLOCKED_URL_PATTERNS = [
+        '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.css', '*.mp4', '*.webm', '*.mp3',
+        '*doubleclick.net*', '*googlesyndication.com*', '*google-analytics.com*',
+        '*googletagmanager.com*', '*adservice.google.*', '*facebook.net*',
+    ]
+    # Всі посилання сторінки за один виклик WebDriver
+    EXTRACT_HREFS_JS = "return Array.from(document.querySelectorAll('a[href]'), a => a.href);"
+
+    def __init__(self, lean: bool = True):
+        self.lean = lean
+        self.driver = None
+
+    def setup_driver(self):
+        import undetected_chromedriver as uc
+
+        try:
+            options = uc.ChromeOptions()
+            options.add_argument('--headless')
+            options.add_argument('--no-sandbox')
+            options.add_argument('--disable-dev-shm-usage')
+            options.add_argument('--disable-gpu')
+            options.add_argument('--window-size=1920,1080')
+            options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+            if self.lean:
+                # Не чекаємо на зображення, стилі та фрейми - достатньо DOMContentLoaded
+                options.page_load_strategy = 'eager'
+                options.add_argument('--blink-settings=imagesEnabled=false')
+
+            self.driver = uc.Chrome(options=options)
+            self.driver.set_page_load_timeout(30)
+            if self.lean:
+                try:
+                    self.driver.execute_cdp_cmd('Network.enable', {})
+                    self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.BLOCKED_URL_PATTERNS})
+                except Exception as e:
+                    logger.warning(f"Failed to enable resource blocking: {str(e)}")
+            logger.info("WebDriver initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize WebDriver: {str(e)}")
+            self.driver = None
+
+    def resolve(self, url: str) -> str:
+        """Кінцева адреса сторінки після JavaScript-редиректів."""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        if not self.driver:
+            self.setup_driver()
+            if not self.driver:
+                return url
+
+        self.driver.get(url)
+        # Чекаємо JavaScript-редирект не довше 2 секунд
+        try:
+            WebDriverWait(self.driver, 2, poll_frequency=0.1).until(
+                lambda driver: 'news.google.com' not in driver.current_url)
+        except TimeoutException:
+            pass
+
+        current_url = self.driver.current_url
+
+        # If still on Google News, try to find the actual link
+        if 'news.google.com' in current_url:
+            for href in self.driver.execute_script(self.EXTRACT_HREFS_JS) or []:
+                if href and 'news.google.com' not in href and 'accounts.google.com' not in href:
+                    return href
+
+        return current_url
+
+    def rss(self) -> int:
+        pid = getattr(self.driver, 'browser_pid', None)
+        return process_tree_rss(pid) if pid else 0
+
+    def quit(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+                logger.info("WebDriver closed successfully")
+            except Exception as e:
+                logger.error(f"Error closing WebDriver: {str(e)}")
+            self.driver = None
+
+def _worker_main(worker_id: int, tasks, results, lean: bool) -> None:
+    """Цикл воркера: (task_id, url) -> (worker_id, task_id, ok, value, rss)."""
+    logging.basicConfig(level=logging.INFO)
+    browser = ChromeBrowser(lean=lean)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, url = task
+            try:
+                value, ok = browser.resolve(url), True
+            except Exception as e:
+                value, ok = f"{type(e).__name__}: {str(e)}", False
+            results.send((worker_id, task_id, ok, value, browser.rss()))
+    finally:
+        browser.quit()
+
+class _Worker:
+    def __init__(self, worker_id: int, process, tasks, results):
+        self.id = worker_id
+        self.process = process
+        self.tasks = tasks
+        self.results = results
+        self.task_id: Optional[int] = None
+        self.rss = 0
+
+class BrowserPool:
+    """Pool of Chrome worker processes for link resolution.
+
+    Each worker owns one Chrome and takes one task at a time over its own
+    queue; results come back over a per-worker pipe read by a dispatcher
+    thread (a worker killed mid-write can only break its own pipe). A task
+    that exceeds its timeout is cancelled by killing its worker, and
+    crashed workers are detected and replaced, so a stuck or dead Chrome
+    never takes the API process down.
+    """
+
+    def __init__(self, size: int = 1, task_timeout: float = 45.0, lean: bool = True):
+        self.size = max(1, size)
+        self.task_timeout = task_timeout
+        self.lean = lean
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers: Dict[int, _Worker] = {}
+        self._idle: "queue.Queue[int]" = queue.Queue()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        self._task_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Канали замінених воркерів; закриває їх диспетчер, поза wait()
+        self._retired: List = []
+        self._dispatcher = None
+        self._stopped = False
+
+    def _ensure_started(self) -> None:
+        if self._dispatcher is not None:
+            return
+        with self._lock:
+            if self._dispatcher is not None:
+                return
+            for _ in range(self.size):
+                self._spawn()
+            self._dispatcher = threading.Thread(target=self._dispatch, name="browser-pool", daemon=True)
+            self._dispatcher.start()
+
+    def _spawn(self) -> None:
+        worker_id = next(self._ids)
+        tasks = self._ctx.Queue()
+        reader, writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(target=_worker_main, args=(worker_id, tasks, writer, self.lean),
+                                    name=f"browser-worker-{worker_id}", daemon=True)
+        process.start()
+        writer.close()
+        self._workers[worker_id] = _Worker(worker_id, process, tasks, reader)
+        self._idle.put(worker_id)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        busy = sum(1 for worker in self._workers.values() if worker.task_id is not None)
+        BROWSER_DRIVERS.set(busy, state="busy")
+        BROWSER_DRIVERS.set(len(self._workers) - busy, state="idle")
+        BROWSER_RSS.set(sum(worker.rss for worker in self._workers.values()))
+
+    def _replace(self, worker_id: int, reason: str) -> None:
+        """Зупиняє воркер (з його Chrome) та запускає новий. Викликається під _lock."""
+        worker = self._workers.pop(worker_id, None)
+        if worker is None:
+            return
+        BROWSER_RESTARTS.inc(reason=reason)
+        logger.warning(f"Restarting browser worker {worker_id} ({reason})")
+        if worker.task_id is not None:
+            future = self._pending.pop(worker.task_id, None)
+            if future is not None and not future.done():
+                future.set_exception(BrowserPoolError(f"browser worker {reason}"))
+        if worker.process.is_alive():
+            # Разом із воркером зупиняємо його Chrome, інакше процеси браузера залишаться сиротами
+            for pid in reversed(process_tree(worker.process.pid)):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+        worker.process.join(timeout=5)
+        self._retired.append(worker.results)
+        if not self._stopped:
+            self._spawn()
+
+    def _replace_dead(self) -> None:
+        """Перезапускає воркери, що впали. Викликається під _lock."""
+        for worker_id in [w.id for w in self._workers.values() if not w.process.is_alive()]:
+            self._replace(worker_id, "crash")
+
+    def _dispatch(self) -> None:
+        checked = time.monotonic()
+        while not self._stopped:
+            # Перевіряємо, чи не впав хтось із воркерів, - і тоді, коли результати йдуть без пауз
+            if time.monotonic() - checked >= 1.0:
+                with self._lock:
+                    self._replace_dead()
+                checked = time.monotonic()
+            with self._lock:
+                for connection in self._retired:
+                    connection.close()
+                self._retired.clear()
+                readers = {worker.results: worker.id for worker in self._workers.values()}
+            for reader in wait_connections(list(readers), timeout=1.0):
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError):
+                    # Воркер завершився, і його канал закрито
+                    with self._lock:
+                        if readers[reader] in self._workers:
+                            self._replace(readers[reader], "crash")
+                    continue
+                self._complete(*message)
+
+    def _complete(self, worker_id: int, task_id: int, ok: bool, value: str, rss: int) -> None:
+        """Передає результат воркера очікувачу та повертає воркер до вільних."""
+        with self._lock:
+            worker = self._workers.get(worker_id)
+            future = self._pending.pop(task_id, None)
+            if worker is not None and worker.task_id == task_id:
+                worker.task_id = None
+                worker.rss = rss
+                self._idle.put(worker_id)
+                self._update_gauges()
+        if future is not None and not future.done():
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(BrowserPoolError(value))
+
+    def _acquire(self, deadline: float) -> _Worker:
+        while True:
+            try:
+                worker_id = self._idle.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise BrowserPoolError("no idle browser worker")
+            with self._lock:
+                worker = self._workers.get(worker_id)
+                # Ідентифікатор міг залишитись від перезапущеного воркера
+                if worker is None or worker.task_id is not None:
+                    continue
+                if not worker.process.is_alive():
+                    # Воркер упав, поки чекав на задачу: замінюємо одразу, а не після тайм-ауту задачі
+                    self._replace(worker_id, "crash")
+                    continue
+                return worker
+
+    def resolve(self, url: str, timeout: Optional[float] = None) -> str:
+        """Розкриває URL у вільному воркері; BrowserPoolError при тайм-ауті чи падінні."""
+        if self._stopped:
+            raise BrowserPoolError("browser pool is shut down")
+        self._ensure_started()
+        timeout = timeout or self.task_timeout
+        deadline = time.monotonic() + timeout
+
+        with track_stage("browser_queue_wait"):
+            worker = self._acquire(deadline)
+        future: Future = Future()
+        task_id = next(self._task_ids)
+        with self._lock:
+            worker.task_id = task_id
+            self._pending[task_id] = future
+            self._update_gauges()
+        worker.tasks.put((task_id, url))
+
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0.1))
+        except FutureTimeout:
+            # Завислий Chrome: скасовуємо задачу разом із воркером
+            with self._lock:
+                if worker.task_id == task_id:
+                    self._replace(worker.id, "timeout")
+            raise BrowserPoolError(f"browser task timed out after {timeout:.0f}s")
+        finally:
+            with self._lock:
+                self._pending.pop(task_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': len(self._workers),
+                'busy': sum(1 for worker in self._workers.values() if worker.task_id is not None),
+                'rss_bytes': sum(worker.rss for worker in self._workers.values()),
+            }
+
+    def shutdown(self) -> None:
+        self._stopped = True
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            try:
+                worker.tasks.put(None)
+            except Exception:
+                pass
+        for worker in workers:
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.kill()
+
+class BrowserPoolManager(BaseManager):
+    """Serves a BrowserPool over a local socket for other API processes."""
+
+# Менеджер передає об'єкти pickle через сокет: хто знає ключ, той може виконати код
+MIN_AUTHKEY_LENGTH = 16
+
+def _authkey(authkey: str) -> bytes:
+    if not authkey or len(authkey) < MIN_AUTHKEY_LENGTH:
+        raise BrowserPoolError(
+            f"BROWSER_POOL_AUTHKEY must be set to a secret of at least {MIN_AUTHKEY_LENGTH} characters "
+            "to serve or use a remote browser pool")
+    return authkey.encode()
+
+def _parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def serve_pool(address: str, authkey: str, size: int, task_timeout: float, lean: bool = True) -> None:
+    """Запускає пул як окремий сервіс (`python -m backend.cli browser-pool`)."""
+    authkey = _authkey(authkey)
+    pool = BrowserPool(size=size, task_timeout=task_timeout, lean=lean)
+    pool._ensure_started()
+    BrowserPoolManager.register("pool", callable=lambda: pool)
+    manager = BrowserPoolManager(address=_parse_address(address), authkey=authkey)
+    server = manager.get_server()
+    logger.info(f"Browser pool with {size} workers listening on {address}")
+    try:
+        server.serve_forever()
+    finally:
+        pool.shutdown()
+
+class RemoteBrowserPool:
+    """Client for a pool started with serve_pool(); reconnects after failures."""
+
+    def __init__(self, address: str, authkey: str, task_timeout: float = 45.0):
+        self.address = address
+        self.authkey = authkey
+        self.task_timeout = task_timeout
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        with self._lock:
+            if self._pool is None:
+                BrowserPoolManager.register("pool")
+                manager = BrowserPoolManager(address=_parse_address(self.address),
+                                             authkey=_authkey(self.authkey))
+                manager.connect()
+                self._pool = manager.pool()
+            return self._pool
+
+    def resolve(self, url: str, timeout: Optional[float] = None) -> str:
+        try:
+            return self._connect().resolve(url, timeout or self.task_timeout)
+        except (ConnectionError, EOFError, OSError) as e:
+            self._pool = None
+            raise BrowserPoolError(f"browser pool at {self.address} unavailable: {str(e)}")
+
+    def stats(self) -> Dict:
+        return self._connect().stats()
+
+    def shutdown(self) -> None:
+        self._pool = None
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+def get_browser_pool():
+    """Пул браузерів процесу; створюється при першому використанні."""
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            if browser_config.BROWSER_POOL_ADDRESS:
+                _browser_pool = RemoteBrowserPool(browser_config.BROWSER_POOL_ADDRESS,
+                                                  browser_config.BROWSER_POOL_AUTHKEY,
+                                                  browser_config.BROWSER_TASK_TIMEOUT)
+            else:
+                _browser_pool = BrowserPool(browser_config.BROWSER_WORKERS,
+                                            browser_config.BROWSER_TASK_TIMEOUT,
+                                            browser_config.BROWSER_LEAN)
+        return _browser_pool
+
+def shutdown_browser_pool() -> None:
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is not None:
+            _browser_pool.shutdown()
+            _browser_pool = None
@@ -1,41 +1,46 @@
-import os
 import logging
 from typing import List, Dict, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime
 import pandas as pd
-from bson import ObjectId
+from ..config.classifier_config import classifier_config
+from .domain_normalizer import domain_normalizer
+from .media_classifier import media_classifier
+from .metrics import timed_stage
+from .source_feed import source_feed
+from .source_matcher import source_matcher
+from .storage_service import SourceStorage, source_storage
 
 # Налаштовуємо логування
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DBService:
-    def __init__(self):
-        # Підключення до MongoDB
-        mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-        self.client = AsyncIOMotorClient(mongodb_url)
-        self.db = self.client.media_sources
-        
-        # Колекції
-        self.known_sources = self.db.known_sources  # Джерела з CSV
-        self.new_sources = self.db.new_sources      # Нові знайдені джерела
+    def __init__(self, storage: Optional[SourceStorage] = None):
+        # Сховище обирається конфігурацією (MongoDB або SQLite)
+        self.storage = storage or source_storage
         
     async def init_db(self):
         """Ініціалізація бази даних та індексів."""
         try:
-            # Створюємо унікальні індекси по URL
-            await self.known_sources.create_index("url", unique=True)
-            await self.new_sources.create_index("url", unique=True)
+            await self.storage.init()
             logger.info("Database indexes created successfully")
+            # Індекс відомих джерел для зіставлення хостів, субдоменів і псевдонімів
+            await source_matcher.load(self.storage)
+            # Локальний класифікатор типу/регіону навчається на мітках реєстру
+            if classifier_config.CLASSIFIER_ENABLED:
+                await media_classifier.train(self.storage)
         except Exception as e:
             logger.error(f"Error creating database indexes: {str(e)}")
             
+    @timed_stage("csv_import")
     async def import_from_csv(self, csv_path: str):
         """Імпорт джерел з CSV файлу."""
         try:
             # Читаємо CSV файл
             df = pd.read_csv(csv_path)
+            # Нормалізуємо домени всієї колонки за один прохід
+            if "Адреса" in df.columns:
+                df["domain"] = domain_normalizer.normalize_series(df["Адреса"])
             
             # Перетворюємо дані в потрібний формат
             sources = []
@@ -43,6 +48,7 @@ class DBService:
                 source = {
                     "name": row.get("Назва", ""),
                     "url": row.get("Адреса", ""),
+                    "domain": row.get("domain", ""),
                     "social_alias": row.get("Соціальний псевдонім", ""),
                     "media_type": row.get("Медіа Тип", ""),
                     "super_type": row.get("Super Type", ""),
@@ -53,9 +59,11 @@ class DBService:
                 sources.append(source)
             
             # Вставляємо дані в колекцію known_sources
+            inserted = 0
             if sources:
-                await self.known_sources.insert_many(sources, ordered=False)
-            logger.info(f"Imported {len(sources)} sources from CSV")
+                inserted = await self.storage.insert_many("known_sources", sources)
+                source_matcher.add_many(sources)
+            logger.info(f"Imported {inserted} of {len(sources)} sources from CSV")
             
         except Exception as e:
             logger.error(f"Error importing from CSV: {str(e)}")
@@ -63,51 +71,43 @@ class DBService:
     async def add_new_source(self, source: Dict):
         """Додавання нового джерела."""
         try:
-            # Перевіряємо чи джерело вже існує
-            existing = await self.known_sources.find_one({"url": source["url"]})
-            if existing:
-                logger.info(f"Source {source['url']} already exists in known_sources")
+            # Перевіряємо чи джерело вже існує: спершу за хостом, батьківським
+            # доменом і псевдонімами, потім за точним URL
+            known = source_matcher.match(source["url"])
+            if known is not None:
+                logger.info(f"Source {source['url']} matches known source {known['source']['url']}")
                 return
-                
-            existing = await self.new_sources.find_one({"url": source["url"]})
-            if existing:
-                logger.info(f"Source {source['url']} already exists in new_sources")
+            if await self.storage.find_existing("known_sources", [source["url"]]):
+                logger.info(f"Source {source['url']} already exists in known_sources")
                 return
                 
             # Додаємо timestamp
             source["found_at"] = datetime.utcnow()
             
-            # Вставляємо нове джерело
-            await self.new_sources.insert_one(source)
-            logger.info(f"Added new source: {source['url']}")
+            # Вставляємо нове джерело (дублікати в new_sources пропускаються)
+            if await self.storage.insert_many("new_sources", [source]):
+                logger.info(f"Added new source: {source['url']}")
+                # Підписники стрічки отримують документ разом з його _id
+                source_feed.publish("source_added",
+                                    source=await self.storage.find_one("new_sources", source["url"]) or source)
+            else:
+                logger.info(f"Source {source['url']} already exists in new_sources")
             
         except Exception as e:
             logger.error(f"Error adding new source: {str(e)}")
             
-    async def get_known_sources(self) -> List[Dict]:
+    async def get_known_sources(self, skip: int = 0, limit: Optional[int] = None) -> List[Dict]:
         """Отримання списку відомих джерел."""
         try:
-            cursor = self.known_sources.find({})
-            sources = await cursor.to_list(length=None)
-            # Конвертуємо ObjectId в рядки
-            for source in sources:
-                if '_id' in source:
-                    source['_id'] = str(source['_id'])
-            return sources
+            return await self.storage.list("known_sources", skip=skip, limit=limit)
         except Exception as e:
             logger.error(f"Error getting known sources: {str(e)}")
             return []
             
-    async def get_new_sources(self) -> List[Dict]:
+    async def get_new_sources(self, skip: int = 0, limit: Optional[int] = None) -> List[Dict]:
         """Отримання списку нових джерел."""
         try:
-            cursor = self.new_sources.find({})
-            sources = await cursor.to_list(length=None)
-            # Конвертуємо ObjectId в рядки
-            for source in sources:
-                if '_id' in source:
-                    source['_id'] = str(source['_id'])
-            return sources
+            return await self.storage.list("new_sources", skip=skip, limit=limit)
         except Exception as e:
             logger.error(f"Error getting new sources: {str(e)}")
             return []
@@ -115,41 +115,59 @@ class DBService:
     async def export_new_sources_to_csv(self, output_path: str):
         """Експорт нових джерел у CSV."""
         try:
-            # Отримуємо всі нові джерела
-            sources = await self.get_new_sources()
-            
-            # Створюємо DataFrame
-            df = pd.DataFrame(sources)
-            
-            # Зберігаємо у CSV
-            df.to_csv(output_path, index=False)
-            logger.info(f"Exported {len(sources)} new sources to {output_path}")
+            # Пишемо пакетами, не завантажуючи всю колекцію в пам'ять
+            exported = 0
+            columns = None
+            async for batch in self.storage.iter_batches("new_sources"):
+                df = pd.DataFrame(batch)
+                if columns is None:
+                    columns = list(df.columns)
+                    df.to_csv(output_path, index=False)
+                else:
+                    df.reindex(columns=columns).to_csv(output_path, index=False, mode="a", header=False)
+                exported += len(batch)
+            
+            if columns is None:
+                pd.DataFrame().to_csv(output_path, index=False)
+            logger.info(f"Exported {exported} new sources to {output_path}")
             
         except Exception as e:
             logger.error(f"Error exporting to CSV: {str(e)}")
             
+    async def verify_source(self, source_id: str) -> bool:
+        """Підтвердження нового джерела."""
+        verified_at = datetime.utcnow()
+        updated = await self.storage.update_one(
+            "new_sources", source_id,
+            {"is_verified": True, "verified_at": verified_at}
+        )
+        if updated:
+            source_feed.publish("source_verified", source_id=source_id, verified_at=verified_at.isoformat())
+        return updated
+            
     async def sync_sources(self):
         """Синхронізація джерел між колекціями."""
         try:
-            # Отримуємо всі нові джерела
-            new_sources = await self.get_new_sources()
-            
-            # Переміщуємо підтверджені джерела
-            for source in new_sources:
-                if source.get("is_verified", False):
-                    # Видаляємо з нових джерел
-                    source_id = ObjectId(source["_id"]) if isinstance(source["_id"], str) else source["_id"]
-                    await self.new_sources.delete_one({"_id": source_id})
-                    
-                    # Додаємо до відомих джерел
-                    source["moved_at"] = datetime.utcnow()
-                    # Видаляємо старий _id перед вставкою
-                    source.pop("_id", None)
-                    await self.known_sources.insert_one(source)
+            # Отримуємо підтверджені нові джерела
+            verified = await self.storage.list("new_sources", query={"is_verified": True})
+            if not verified:
+                logger.info("Sources synchronized successfully")
+                return
+            
+            source_ids = [source.pop("_id") for source in verified]
+            moved_at = datetime.utcnow()
+            for source in verified:
+                source["moved_at"] = moved_at
+            
+            # Додаємо до відомих джерел, потім видаляємо з нових
+            await self.storage.upsert_many("known_sources", verified)
+            source_matcher.add_many(verified)
+            await self.storage.delete_many("new_sources", source_ids)
+            source_feed.publish("sources_synced", source_ids=source_ids)
                     
-            logger.info("Sources synchronized successfully")
+            logger.info(f"Sources synchronized successfully: moved {len(verified)}")
             
         except Exception as e:
             logger.error(f"Error synchronizing sources: {str(e)}")
 
-db_service = DBService() 
\ No newline at end of file
+db_service = DBService()
\ No newline at end of file
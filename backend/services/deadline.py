@@ -0,0 +1,108 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Optional, TypeVar
+from .metrics import DEADLINE_EXCEEDED
+from .profiler import in_profile
+
+T = TypeVar("T")
+
+class _Stage:
+    """One budgeted stage on its own daemon thread.
+
+    A stage the caller stopped waiting for (hung provider or Chrome) is
+    abandoned: it finishes in the background and still fills the caches,
+    but it holds no shared pool worker, so it cannot delay the stages of
+    other requests. At most `max_abandoned` abandoned stages may run at
+    once; while the limit is reached new budgeted stages are not started.
+    """
+
+    max_abandoned = int(os.getenv("SEARCH_DEADLINE_ABANDONED", "32"))
+    abandoned_count = 0
+    _lock = threading.Lock()
+
+    def __init__(self, fn: Callable[..., T], args, kwargs):
+        self.future: Future = Future()
+        self.finished = False
+        self.abandoned = False
+        # Потік бачить контекст запиту: профіль рахує і його
+        context = contextvars.copy_context()
+        threading.Thread(target=self._work, args=(context, fn, args, kwargs), name="deadline-stage",
+                         daemon=True).start()
+
+    @classmethod
+    def saturated(cls) -> bool:
+        with cls._lock:
+            return cls.abandoned_count >= cls.max_abandoned
+
+    def _work(self, context, fn, args, kwargs) -> None:
+        try:
+            result = context.run(in_profile, fn, *args, **kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+        finally:
+            with _Stage._lock:
+                self.finished = True
+                if self.abandoned:
+                    _Stage.abandoned_count -= 1
+
+    def abandon(self) -> None:
+        with _Stage._lock:
+            if not self.finished:
+                self.abandoned = True
+                _Stage.abandoned_count += 1
+
+class DeadlineExceeded(Exception):
+    """Бюджет часу запиту вичерпано."""
+
+class Deadline:
+    """Latency budget of one request.
+
+    `run` executes a stage with whatever budget is left: without a budget
+    it simply calls the function; with one, the call runs on its own
+    thread and the caller stops waiting when the budget is spent, getting
+    DeadlineExceeded so it can return what it has so far. The abandoned
+    call keeps running in the background; when too many of them are still
+    running, further stages are skipped right away instead of piling up
+    threads. `exceeded` records that some stage was cut short.
+    """
+
+    def __init__(self, budget_ms: Optional[int] = None):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000 if budget_ms else None
+        self.exceeded = False
+
+    @property
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def run(self, stage: str, fn: Callable[..., T], *args, **kwargs) -> T:
+        if self.expires_at is None:
+            return fn(*args, **kwargs)
+        # Завислі етапи вже займають ліміт - новий етап не запускаємо
+        if self.expired or _Stage.saturated():
+            self._exceed(stage)
+        running = _Stage(fn, args, kwargs)
+        try:
+            return running.future.result(timeout=self.remaining)
+        except FutureTimeout:
+            running.abandon()
+            self._exceed(stage)
+
+    def _exceed(self, stage: str):
+        self.exceeded = True
+        DEADLINE_EXCEEDED.inc(stage=stage)
+        raise DeadlineExceeded(f"Deadline of {self.budget_ms} ms exceeded at {stage}")
+
+# Без бюджету: етапи виконуються як звичайні виклики
+NO_DEADLINE = Deadline()
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+from .metrics import DISCOVERY_SKIPPED
+from .provider_cache import normalize_query
+from .storage_service import SourceStorage, source_storage
+
+logger = logging.getLogger(__name__)
+
+# Параметри, що не змінюють сторінку (трекінг), не входять у відбиток URL
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'yclid', 'ref', 'oc')
+
+def url_fingerprint(url: str) -> str:
+    """Відбиток URL: без схеми, www., фрагмента, трекінг-параметрів і кінцевого "/"."""
+    parsed = urlparse((url or '').strip())
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    params = sorted((name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+                    if not name.lower().startswith(TRACKING_PARAMS))
+    canonical = f"{host}{parsed.path.rstrip('/')}?{urlencode(params)}"
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+class DiscoveryState:
+    """What a recurring query has already processed.
+
+    Holds entry GUIDs, URL fingerprints and the newest publish date seen
+    (high-water mark). With `skip_seen` an entry is skipped when its GUID
+    or URL is known, or when it was published more than `lookback` before
+    the high-water mark. Entries that produced a result are always
+    recorded, so a later incremental run benefits from full runs too;
+    dropped, duplicate, failed or unfinished entries are left for the
+    next run to retry. The newest
+    `max_items` GUIDs/fingerprints are kept.
+    """
+
+    def __init__(self, query: str, high_water: Optional[datetime] = None,
+                 guids: Iterable[str] = (), fingerprints: Iterable[str] = (),
+                 skip_seen: bool = False, lookback: timedelta = timedelta(days=1),
+                 max_items: int = 5000):
+        self.query = normalize_query(query)
+        self.high_water = high_water
+        # dict як впорядкована множина: найстаріші записи витісняються першими
+        self.guids: Dict[str, None] = dict.fromkeys(guids)
+        self.fingerprints: Dict[str, None] = dict.fromkeys(fingerprints)
+        self.skip_seen = skip_seen
+        self.lookback = lookback
+        self.max_items = max_items
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def is_seen(self, guid: Optional[str] = None, urls: Iterable[Optional[str]] = (),
+                published: Optional[datetime] = None) -> bool:
+        if guid and guid in self.guids:
+            return True
+        if any(url and url_fingerprint(url) in self.fingerprints for url in urls):
+            return True
+        return bool(published and self.high_water and published < self.high_water - self.lookback)
+
+    def should_skip(self, provider: str, guid: Optional[str] = None, urls: Iterable[Optional[str]] = (),
+                    published: Optional[datetime] = None) -> bool:
+        if self.skip_seen and self.is_seen(guid, urls, published):
+            self.skipped += 1
+            DISCOVERY_SKIPPED.inc(provider=provider)
+            return True
+        return False
+
+    def mark(self, guid: Optional[str] = None, urls: Iterable[Optional[str]] = (),
+             published: Optional[datetime] = None) -> None:
+        with self._lock:
+            if guid:
+                self.guids.pop(guid, None)
+                self.guids[guid] = None
+            for url in urls:
+                if url:
+                    fingerprint = url_fingerprint(url)
+                    self.fingerprints.pop(fingerprint, None)
+                    self.fingerprints[fingerprint] = None
+            if published and (self.high_water is None or published > self.high_water):
+                self.high_water = published
+            for items in (self.guids, self.fingerprints):
+                while len(items) > self.max_items:
+                    del items[next(iter(items))]
+
+    def merge(self, other: "DiscoveryState") -> None:
+        """Переносить записане іншим станом того ж запиту (спільний пошук)."""
+        with self._lock:
+            self.skipped += other.skipped
+            self.guids.update(other.guids)
+            self.fingerprints.update(other.fingerprints)
+            if other.high_water and (self.high_water is None or other.high_water > self.high_water):
+                self.high_water = other.high_water
+            for items in (self.guids, self.fingerprints):
+                while len(items) > self.max_items:
+                    del items[next(iter(items))]
+
+    def to_doc(self) -> Dict:
+        return {
+            "query": self.query,
+            "high_water": self.high_water.isoformat() if self.high_water else None,
+            "guids": list(self.guids),
+            "fingerprints": list(self.fingerprints),
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+
+    @classmethod
+    def from_doc(cls, query: str, doc: Optional[Dict], **kwargs) -> "DiscoveryState":
+        if not doc:
+            return cls(query, **kwargs)
+        high_water = doc.get("high_water")
+        if isinstance(high_water, str):
+            high_water = datetime.fromisoformat(high_water)
+        return cls(query, high_water=high_water, guids=doc.get("guids") or [],
+                   fingerprints=doc.get("fingerprints") or [], **kwargs)
+
+class DiscoveryService:
+    """Loads and saves per-query discovery state (`discovery_state` collection)."""
+
+    def __init__(self, storage: Optional[SourceStorage] = None):
+        self.storage = storage or source_storage
+
+    async def load(self, query: str, skip_seen: bool = False) -> DiscoveryState:
+        try:
+            doc = await self.storage.find_one("discovery_state", normalize_query(query))
+        except Exception as e:
+            logger.error(f"Error loading discovery state for '{query}': {str(e)}")
+            doc = None
+        return DiscoveryState.from_doc(query, doc, skip_seen=skip_seen)
+
+    async def load_many(self, queries: List[str], skip_seen: bool = False) -> Dict[str, DiscoveryState]:
+        return {query: await self.load(query, skip_seen) for query in queries}
+
+    async def save(self, states: Iterable[DiscoveryState]) -> None:
+        try:
+            await self.storage.upsert_many("discovery_state", [state.to_doc() for state in states])
+        except Exception as e:
+            logger.error(f"Error saving discovery state: {str(e)}")
+
+discovery_service = DiscoveryService()
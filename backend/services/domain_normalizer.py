@@ -0,0 +1,214 @@
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Мінімальний набір правил на випадок, якщо знімок Public Suffix List недоступний
+FALLBACK_RULES = """
+ua com.ua edu.ua gov.ua in.ua net.ua org.ua biz.ua co.ua pp.ua ltd.ua
+kiev.ua kyiv.ua lviv.ua odessa.ua odesa.ua kharkov.ua kharkiv.ua dp.ua dn.ua
+dnepropetrovsk.ua zp.ua zaporizhzhe.ua vn.ua vinnica.ua lutsk.ua lg.ua lugansk.ua
+cherkassy.ua ck.ua chernigov.ua cn.ua chernovtsy.ua cv.ua crimea.ua if.ua kherson.ua
+ks.ua km.ua khmelnitskiy.ua kr.ua kirovograd.ua lt.ua mk.ua nikolaev.ua od.ua
+pl.ua poltava.ua rivne.ua rovno.ua rv.ua sb.ua sumy.ua te.ua ternopil.ua uz.ua
+uzhgorod.ua zhitomir.ua zt.ua volyn.ua
+укр com net org info biz media news press online tv fm radio io me eu
+uk co.uk org.uk ru рф by kz pl de us
+"""
+
+# Початок приватної частини PSL (blogspot.com, github.io тощо): ці правила
+# не застосовуємо, щоб foo.blogspot.com нормалізувався до blogspot.com
+PRIVATE_SECTION = "===BEGIN PRIVATE DOMAINS==="
+
+def _suffix_list_path() -> Optional[str]:
+    path = os.getenv("PUBLIC_SUFFIX_LIST")
+    if path:
+        return path
+    try:
+        import tldextract
+    except ImportError:
+        return None
+    # tldextract постачається зі знімком public_suffix_list.dat
+    return os.path.join(os.path.dirname(tldextract.__file__), ".tld_set_snapshot")
+
+def _to_unicode(label: str) -> str:
+    if label.startswith("xn--"):
+        try:
+            return label.encode("ascii").decode("idna")
+        except UnicodeError:
+            return label
+    return label
+
+class SuffixTrie:
+    """Reversed-label trie over Public Suffix List rules.
+
+    `ua -> com -> (end)` matches `com.ua`; wildcard (`*.ck`) and exception
+    (`!www.ck`) rules follow the PSL algorithm. Rules are stored in their
+    Unicode form, so punycode labels are decoded before matching.
+    """
+
+    END = "\0"
+
+    def __init__(self, rules: Iterable[str]):
+        self.root: Dict = {}
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: str) -> None:
+        exception = rule.startswith("!")
+        labels = [_to_unicode(label) for label in rule.lstrip("!").lower().split(".")]
+        node = self.root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        node[self.END] = "!" if exception else True
+
+    def suffix_length(self, labels: List[str]) -> int:
+        """Number of trailing labels that form the public suffix."""
+        node = self.root
+        # Правило за замовчуванням "*": невідомий TLD сам є суфіксом
+        length = 1
+        for depth, label in enumerate(reversed(labels), 1):
+            wildcard = node.get("*")
+            if wildcard is not None and wildcard.get(self.END):
+                length = depth
+            node = node.get(label)
+            if node is None:
+                break
+            mark = node.get(self.END)
+            if mark == "!":
+                return depth - 1
+            if mark:
+                length = depth
+        return min(length, len(labels))
+
+    @classmethod
+    def from_file(cls, path: str) -> "SuffixTrie":
+        with open(path, encoding="utf-8") as f:
+            return cls(cls._parse(f))
+
+    @staticmethod
+    def _parse(lines: Iterable[str]) -> Iterable[str]:
+        """Правила ICANN-частини списку (як tldextract за замовчуванням)."""
+        for line in lines:
+            line = line.strip()
+            if PRIVATE_SECTION in line:
+                break
+            if line and not line.startswith("//"):
+                yield line.split()[0]
+
+def load_trie() -> SuffixTrie:
+    path = _suffix_list_path()
+    if path and os.path.exists(path):
+        try:
+            return SuffixTrie.from_file(path)
+        except (OSError, UnicodeError) as e:
+            logger.error(f"Failed to load public suffix list {path}: {str(e)}")
+    logger.warning("Public suffix list not found, using built-in rules")
+    return SuffixTrie(FALLBACK_RULES.split())
+
+# [схема://][user[:pw]@]хост[:порт][/шлях]
+_HOST_RE = re.compile(r"\s*(?:[A-Za-z][A-Za-z0-9+.\-]*://|//)?(?:[^@/?#\s]*@)?([^/?#:\[\]\s]*)")
+
+def extract_host(url: str) -> str:
+    """Хост з URL або "голого" домену, без порту, облікових даних та крапки в кінці."""
+    if not url:
+        return ""
+    host = _HOST_RE.match(url)[1]
+    if not host and "[" in url:  # IPv6
+        start = url.find("[") + 1
+        return url[start:url.find("]", start)].lower() if "]" in url else ""
+    return host.rstrip(".").lower()
+
+def _is_ip(host: str) -> bool:
+    return ":" in host or host.replace(".", "").isdigit()
+
+class DomainNormalizer:
+    """Single domain normalization engine (registrable domain, eTLD+1).
+
+    `normalize("https://kyiv.suspilne.media/x")` -> "suspilne.media",
+    `normalize("http://www.misto.kiev.ua")` -> "misto.kiev.ua".
+    Only the ICANN section of the list is used, as tldextract does by
+    default, so `foo.blogspot.com` -> "blogspot.com".
+    Batch methods memoize per host, so repeated outlets in CSV imports and
+    search results cost one dict lookup.
+    """
+
+    def __init__(self, trie: SuffixTrie = None, memo_size: int = 500_000):
+        self._trie = trie
+        self.memo_size = memo_size
+        self._memo: Dict[str, Tuple[str, str, str]] = {}
+        # сирий хост з URL -> нормалізований домен (для пакетних викликів)
+        self._domains: Dict[str, str] = {}
+
+    @property
+    def trie(self) -> SuffixTrie:
+        if self._trie is None:
+            self._trie = load_trie()
+        return self._trie
+
+    def split_host(self, host: str) -> Tuple[str, str, str]:
+        """(subdomain, domain, suffix) для хоста; IDN повертається в Unicode."""
+        cached = self._memo.get(host)
+        if cached is not None:
+            return cached
+        if not host or _is_ip(host):
+            result = ("", host, "")
+        else:
+            labels = [_to_unicode(label) for label in host.split(".") if label]
+            if not labels:
+                result = ("", "", "")
+            else:
+                length = self.trie.suffix_length(labels)
+                if length >= len(labels):
+                    result = ("", "", ".".join(labels))
+                else:
+                    result = (".".join(labels[:-length - 1]), labels[-length - 1], ".".join(labels[-length:]))
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[host] = result
+        return result
+
+    def split(self, url: str) -> Tuple[str, str, str]:
+        return self.split_host(extract_host(url))
+
+    def normalize(self, url: str) -> str:
+        """Зареєстрований домен (eTLD+1); "" якщо його немає (напр. сам суфікс)."""
+        _, domain, suffix = self.split(url)
+        if not domain:
+            return ""
+        return f"{domain}.{suffix}" if suffix else domain
+
+    def normalize_many(self, urls: Iterable[str]) -> List[str]:
+        """Пакетна нормалізація; None/NaN та інші не-рядки дають ""."""
+        match = _HOST_RE.match
+        domains = self._domains
+        result = []
+        append = result.append
+        for url in urls:
+            if not isinstance(url, str):
+                append("")
+                continue
+            raw = match(url)[1]
+            domain = domains.get(raw)
+            if domain is None:
+                domain = self.normalize(url)
+                if raw:
+                    if len(domains) >= self.memo_size:
+                        domains.clear()
+                    domains[raw] = domain
+            append(domain)
+        return result
+
+    def normalize_series(self, series):
+        """pandas.Series URL -> Series доменів; нормалізує лише унікальні значення."""
+        import pandas as pd
+
+        codes, uniques = pd.factorize(series)
+        domains = pd.Index(self.normalize_many(uniques))
+        result = domains.take(codes).to_numpy(dtype=object)
+        result[codes == -1] = ""
+        return pd.Series(result, index=series.index, name=series.name)
+
+domain_normalizer = DomainNormalizer()
@@ -1,14 +1,23 @@
 import logging
-from urllib.parse import urlparse
-import tldextract
-import requests
 from bs4 import BeautifulSoup
+from ..config.classifier_config import classifier_config
+from ..config.metadata_config import metadata_config
+from .domain_normalizer import domain_normalizer
+from .html_analysis import detect_category, page_language, parse_head
+from .language_id import language_identifier
+from .media_classifier import llm_labels, media_classifier, site_name
+from .page_archive import archived_content
+from .page_metadata import metadata_fetcher
+from .source_matcher import source_matcher
 from typing import Dict, Optional
 import re
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Типові назви медіа-доменів одним виразом замість перебору шаблонів
+KNOWN_MEDIA_PATTERN = re.compile(r'(?:news|media|press|tv|radio|gazette|times|post)\.')
+
 class DomainAnalyzer:
     def __init__(self):
         self.known_media_tlds = {
@@ -22,29 +31,32 @@ class DomainAnalyzer:
         Приклад: https://www.example.com/path -> example.com
         """
         try:
-            # Використовуємо tldextract для правильної обробки доменів
-            extracted = tldextract.extract(url)
-            # Збираємо домен без субдоменів
-            domain = f"{extracted.domain}.{extracted.suffix}"
-            return domain.lower()
+            # Домен без субдоменів з урахуванням com.ua, kiev.ua тощо
+            return domain_normalizer.normalize(url)
         except Exception as e:
             logger.error(f"Error extracting domain from {url}: {str(e)}")
             return ""
             
-    def analyze_domain(self, url: str) -> Dict:
+    def analyze_domain(self, url: str, text: Optional[str] = None) -> Dict:
         """
-        Аналізує домен та повертає його характеристики
+        Аналізує домен та повертає його характеристики; `text` - вже
+        отриманий текст сторінки для визначення мови без запиту. Без нього
+        використовується сторінка з архіву, якщо її вже завантажували
         """
         try:
-            extracted = tldextract.extract(url)
+            content = None if text else archived_content(url)
+            subdomain, name, suffix = domain_normalizer.split(url)
+            domain = f"{name}.{suffix}" if suffix else name
+            known = source_matcher.match(url)
             domain_info = {
-                'domain': f"{extracted.domain}.{extracted.suffix}",
-                'subdomain': extracted.subdomain if extracted.subdomain else None,
-                'tld': extracted.suffix,
-                'is_media_tld': extracted.suffix in self.known_media_tlds,
-                'is_known_media': self._is_known_media_domain(f"{extracted.domain}.{extracted.suffix}"),
-                'language': self._detect_language(url),
-                'category': self._detect_category(url),
+                'domain': domain,
+                'subdomain': subdomain if subdomain else None,
+                'tld': suffix,
+                'is_media_tld': suffix in self.known_media_tlds,
+                'is_known_media': known is not None or self._is_known_media_domain(domain),
+                'known_source': known['source'] if known else None,
+                'language': self._detect_language(url, text, content),
+                'category': self._detect_category(url, content),
                 'analyzed_at': None  # Буде встановлено при збереженні
             }
             return domain_info
@@ -54,68 +66,43 @@ class DomainAnalyzer:
             
     def _is_known_media_domain(self, domain: str) -> bool:
         """
-        Перевіряє чи є домен відомим медіа-ресурсом
+        Перевіряє чи є домен відомим медіа-ресурсом: з реєстру відомих
+        джерел або за типовою назвою (news., media., tv. тощо)
         """
-        known_media_patterns = [
-            r'news\.',
-            r'media\.',
-            r'press\.',
-            r'tv\.',
-            r'radio\.',
-            r'gazette\.',
-            r'times\.',
-            r'post\.'
-        ]
-        return any(re.search(pattern, domain.lower()) for pattern in known_media_patterns)
+        return source_matcher.match(domain) is not None or bool(KNOWN_MEDIA_PATTERN.search(domain.lower()))
             
-    def _detect_language(self, url: str) -> Optional[str]:
+    def _detect_language(self, url: str, text: Optional[str] = None,
+                         content: Optional[bytes] = None) -> Optional[str]:
         """
-        Визначає основну мову сайту
+        Визначає основну мову сайту: за вже отриманим текстом або сторінкою
+        з архіву без запиту, інакше за <head> сторінки
         """
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Спробуємо знайти мову в HTML тегах
-            html_tag = soup.find('html')
-            if html_tag and html_tag.get('lang'):
-                return html_tag.get('lang').split('-')[0]
-                
-            # Спробуємо знайти мету-теги з мовою
-            meta_lang = soup.find('meta', attrs={'http-equiv': 'content-language'})
-            if meta_lang:
-                return meta_lang.get('content', '').split('-')[0]
-                
-            return None
+            if text:
+                return language_identifier.detect(text, metadata_config.LANGUAGE_MIN_CONFIDENCE)
+            if content:
+                return page_language(BeautifulSoup(content, 'html.parser'))
+            # Мова є в <head> - решту сторінки не завантажуємо
+            metadata = metadata_fetcher.fetch(url)
+            return metadata['language'] if metadata else None
         except Exception as e:
             logger.error(f"Error detecting language for {url}: {str(e)}")
             return None
             
-    def _detect_category(self, url: str) -> Optional[str]:
+    def _detect_category(self, url: str, content: Optional[bytes] = None) -> Optional[str]:
         """
-        Визначає категорію сайту
+        Визначає категорію сайту (news, blog, corporate, ...): за типом медіа,
+        якщо класифікатор впевнений (з назвою сайту зі сторінки в архіві),
+        інакше за ключовими словами
         """
-        categories = {
-            'news': ['news', 'latest', 'breaking', 'headlines'],
-            'blog': ['blog', 'article', 'post'],
-            'corporate': ['about', 'company', 'corporate'],
-            'social': ['social', 'community', 'network'],
-            'government': ['gov', 'government', 'ministry'],
-            'education': ['edu', 'education', 'university', 'school']
-        }
-        
         try:
-            parsed_url = urlparse(url)
-            path = parsed_url.path.lower()
-            
-            for category, keywords in categories.items():
-                if any(keyword in path for keyword in keywords):
+            if classifier_config.CLASSIFIER_ENABLED and media_classifier.ready:
+                name = site_name(parse_head(content.decode('utf-8', errors='replace'), url)) if content else None
+                classified = media_classifier.classify(url, name)
+                category = llm_labels(classified['predictions'])['category']
+                if classified['confident'] and category:
                     return category
-                    
-            return 'other'
+            return detect_category(url)
         except Exception as e:
             logger.error(f"Error detecting category for {url}: {str(e)}")
             return None
@@ -0,0 +1,288 @@
+import asyncio
+import logging
+import threading
+import time
+from itertools import islice
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+from .metrics import THROTTLED, track_stage
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Статуси, на які сервер відповідає при перевантаженні / блокуванні
+THROTTLE_STATUSES = {429, 503}
+
+class FetchDisallowed(Exception):
+    """URL заборонений robots.txt."""
+
+class TokenBucket:
+    """Token bucket with adaptive rate (AIMD).
+
+    `reserve()` takes a token and returns how long the caller must wait
+    before using it, so waiting callers queue up fairly instead of spinning.
+    On throttling the rate is halved (down to `min_rate`); every
+    `recover_after` successes it grows back additively to `max_rate`.
+    `clock` is a monotonic clock in seconds (replaceable in tests).
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate: float = None,
+                 recover_after: int = 20, clock: Callable[[], float] = time.monotonic):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = capacity
+        self.tokens = capacity
+        self.recover_after = recover_after
+        self.blocked_until = 0.0
+        self.failures = 0
+        self._successes = 0
+        self._clock = clock
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def idle(self) -> bool:
+        """Чи відпочив бакет: не заблокований і знову повний."""
+        with self._lock:
+            now = self._clock()
+            tokens = self.tokens + (now - self._last) * self.rate
+            return self.blocked_until <= now and tokens >= self.capacity
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._successes += 1
+            if self._successes >= self.recover_after and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+                self._successes = 0
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> float:
+        """Reduces the rate and blocks the bucket; returns the backoff delay."""
+        with self._lock:
+            self.failures += 1
+            self._successes = 0
+            self.rate = max(self.min_rate, self.rate / 2)
+            delay = retry_after if retry_after is not None else min(2 ** self.failures, 300)
+            self.blocked_until = max(self.blocked_until, self._clock() + delay)
+            return delay
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Retry-After у секундах (число або HTTP-дата) відносно `now`."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - (now or datetime.now(timezone.utc))).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class FetchScheduler:
+    """Central scheduler for outbound requests.
+
+    Every fetch waits for a token from its host bucket and, when given,
+    from its provider bucket (DuckDuckGo, Google News). 429/503 responses
+    slow the bucket down and honour Retry-After. Parsed robots.txt files
+    are cached per host for `robots_ttl` seconds.
+
+    Both per-host maps are kept in least-recently-used order and hold at
+    most `max_hosts` entries: a crawl over millions of domains would
+    otherwise keep every bucket and robots.txt forever. Only idle host
+    buckets are evicted, so a host still backing off keeps its penalty;
+    an evicted host simply starts again with a fresh bucket.
+    """
+
+    PROVIDER_RATES = {
+        'ddg': 0.5,
+        'google_news': 1.0,
+    }
+    # Скільки найстаріших бакетів переглядати при витісненні
+    EVICT_SCAN = 32
+
+    def __init__(self, host_rate: float = 1.0, host_burst: float = 2.0,
+                 max_retries: int = 2, max_retry_wait: float = 60.0,
+                 robots_ttl: float = 24 * 3600, max_hosts: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self.robots_ttl = robots_ttl
+        self.max_hosts = max_hosts
+        self._clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._robots: Dict[str, Tuple[Optional[RobotFileParser], float]] = {}
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+
+    def _bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            # dict як LRU: використаний ключ переноситься в кінець
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                if key.startswith('provider:'):
+                    rate = self.PROVIDER_RATES.get(key.split(':', 1)[1], self.host_rate)
+                    bucket = TokenBucket(rate, capacity=1.0, clock=self._clock)
+                else:
+                    bucket = TokenBucket(self.host_rate, capacity=self.host_burst, clock=self._clock)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_hosts:
+                self._evict_buckets()
+            return bucket
+
+    def _evict_buckets(self) -> None:
+        """Витісняє найдавніші простоюючі бакети хостів (під self._lock).
+
+        Переглядає лише найстаріші записи: зайняті хости там рідкість, а
+        повний перебір на кожен новий хост коштував би O(max_hosts).
+        """
+        for key in list(islice(self._buckets, self.EVICT_SCAN)):
+            if len(self._buckets) <= self.max_hosts:
+                break
+            if key.startswith('host:') and self._buckets[key].idle():
+                del self._buckets[key]
+
+    def _keys(self, url: Optional[str], provider: Optional[str]):
+        keys = []
+        if provider:
+            keys.append(f"provider:{provider}")
+        if url:
+            host = (urlparse(url).hostname or '').lower()
+            if host:
+                keys.append(f"host:{host}")
+        return keys
+
+    def _reserve(self, url: Optional[str], provider: Optional[str]) -> float:
+        return max([self._bucket(key).reserve() for key in self._keys(url, provider)] or [0.0])
+
+    def wait(self, url: Optional[str] = None, provider: Optional[str] = None) -> None:
+        """Blocks until the host/provider may be contacted (Selenium, DDGS)."""
+        delay = self._reserve(url, provider)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def await_slot(self, url: Optional[str] = None, provider: Optional[str] = None) -> None:
+        delay = self._reserve(url, provider)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def report(self, url: Optional[str] = None, provider: Optional[str] = None,
+               status: Optional[int] = None, retry_after: Optional[str] = None) -> Optional[float]:
+        """Feeds a response status back. Returns backoff delay on throttling."""
+        delay = None
+        for key in self._keys(url, provider):
+            bucket = self._bucket(key)
+            if status in THROTTLE_STATUSES:
+                delay = bucket.on_throttle(parse_retry_after(retry_after))
+            else:
+                bucket.on_success()
+        if delay is not None:
+            THROTTLED.inc(target=provider or "host")
+            logger.warning(f"Throttled ({status}) by {provider or urlparse(url).hostname}, "
+                           f"backing off {delay:.1f}s")
+        return delay
+
+    def _robots_url(self, url: str) -> Tuple[str, str]:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower(), f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+
+    def _cached_robots(self, origin: str):
+        with self._lock:
+            cached = self._robots.pop(origin, None)
+            if cached and cached[1] > self._clock():
+                self._robots[origin] = cached
+                return True, cached[0]
+        return False, None
+
+    def _store_robots(self, origin: str, status: Optional[int], text: str) -> Optional[RobotFileParser]:
+        parser = None
+        # 4xx означає "обмежень немає"; помилки сервера/мережі теж не блокують
+        if status == 200:
+            parser = RobotFileParser()
+            parser.parse(text.splitlines())
+        with self._lock:
+            self._robots.pop(origin, None)
+            self._robots[origin] = (parser, self._clock() + self.robots_ttl)
+            while len(self._robots) > self.max_hosts:
+                del self._robots[next(iter(self._robots))]
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        """Checks robots.txt (cached) for USER_AGENT."""
+        origin, robots_url = self._robots_url(url)
+        found, parser = self._cached_robots(origin)
+        if not found:
+            try:
+                self.wait(robots_url)
+                response = self.session.get(robots_url, timeout=10)
+                parser = self._store_robots(origin, response.status_code, response.text)
+            except Exception as e:
+                logger.debug(f"Failed to fetch {robots_url}: {str(e)}")
+                parser = self._store_robots(origin, None, "")
+        return parser is None or parser.can_fetch(USER_AGENT, url)
+
+    async def aallowed(self, client, url: str) -> bool:
+        origin, robots_url = self._robots_url(url)
+        found, parser = self._cached_robots(origin)
+        if not found:
+            try:
+                await self.await_slot(robots_url)
+                response = await client.get(robots_url, timeout=10)
+                parser = self._store_robots(origin, response.status_code, response.text)
+            except Exception as e:
+                logger.debug(f"Failed to fetch {robots_url}: {str(e)}")
+                parser = self._store_robots(origin, None, "")
+        return parser is None or parser.can_fetch(USER_AGENT, url)
+
+    def fetch(self, url: str, provider: Optional[str] = None, respect_robots: bool = True,
+              method: str = 'GET', **kwargs) -> requests.Response:
+        """Paced requests call with throttling backoff and retries."""
+        if respect_robots and not self.allowed(url):
+            raise FetchDisallowed(f"Disallowed by robots.txt: {url}")
+        kwargs.setdefault('timeout', 10)
+        for attempt in range(self.max_retries + 1):
+            self.wait(url, provider)
+            with track_stage("http_request"):
+                response = self.session.request(method, url, **kwargs)
+            delay = self.report(url, provider, response.status_code,
+                                response.headers.get('Retry-After'))
+            if delay is None or attempt == self.max_retries or delay > self.max_retry_wait:
+                return response
+            response.close()
+        return response
+
+    async def afetch(self, client, url: str, provider: Optional[str] = None,
+                     respect_robots: bool = True, method: str = 'GET', **kwargs):
+        """Async variant of fetch() for an httpx.AsyncClient."""
+        if respect_robots and not await self.aallowed(client, url):
+            raise FetchDisallowed(f"Disallowed by robots.txt: {url}")
+        for attempt in range(self.max_retries + 1):
+            await self.await_slot(url, provider)
+            response = await client.request(method, url, **kwargs)
+            delay = self.report(url, provider, response.status_code,
+                                response.headers.get('Retry-After'))
+            if delay is None or attempt == self.max_retries or delay > self.max_retry_wait:
+                return response
+        return response
+
+fetch_scheduler = FetchScheduler()
@@ -0,0 +1,171 @@
+# Чисті функції аналізу HTML/URL. Модуль не має побічних ефектів при імпорті,
+# тому його можна використовувати в пулі процесів (на відміну від search_service,
+# який запускає WebDriver).
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
+from ..config.metadata_config import metadata_config
+from .language_id import language_identifier
+
+NEWS_URL_INDICATORS = ['news', 'article', 'story', 'press', 'media', 'journal']
+DATE_CLASS_PATTERNS = ['date', 'published', 'time', 'posted']
+SOCIAL_CLASS_PATTERNS = ['share', 'twitter', 'facebook', 'linkedin']
+FEED_TYPES = {'application/rss+xml', 'application/atom+xml', 'application/feed+json'}
+
+CATEGORIES = {
+    'news': ['news', 'latest', 'breaking', 'headlines'],
+    'blog': ['blog', 'article', 'post'],
+    'corporate': ['about', 'company', 'corporate'],
+    'social': ['social', 'community', 'network'],
+    'government': ['gov', 'government', 'ministry'],
+    'education': ['edu', 'education', 'university', 'school']
+}
+
+def _has_class(soup: BeautifulSoup, pattern: str) -> bool:
+    return soup.find(attrs={'class': lambda x: x and pattern in x.lower() if x else False}) is not None
+
+def news_score(url: str, content=None, soup: Optional[BeautifulSoup] = None) -> int:
+    """Рахує бал "новинності" сторінки за URL та HTML."""
+    score = 0
+
+    # URL-based checks
+    url_lower = url.lower()
+    for indicator in NEWS_URL_INDICATORS:
+        if indicator in url_lower:
+            score += 1
+
+    # Content-based checks if available
+    if soup is None and content:
+        soup = BeautifulSoup(content, 'html.parser')
+    if soup is not None:
+        # Check for article tags
+        if soup.find('article'):
+            score += 2
+
+        # Check for publication date
+        for pattern in DATE_CLASS_PATTERNS:
+            if _has_class(soup, pattern):
+                score += 1
+
+        # Check for social media sharing buttons
+        for pattern in SOCIAL_CLASS_PATTERNS:
+            if _has_class(soup, pattern):
+                score += 1
+
+    return score
+
+def is_news_page(url: str, content=None, soup: Optional[BeautifulSoup] = None) -> bool:
+    return news_score(url, content, soup) >= 3
+
+def detect_category(url: str) -> str:
+    """Визначає категорію сайту за шляхом URL."""
+    path = urlparse(url).path.lower()
+    for category, keywords in CATEGORIES.items():
+        if any(keyword in path for keyword in keywords):
+            return category
+    return 'other'
+
+def html_language(content=None, soup: Optional[BeautifulSoup] = None) -> Optional[str]:
+    """Мова з <html lang> або meta content-language."""
+    if soup is None:
+        if not content:
+            return None
+        soup = BeautifulSoup(content, 'html.parser')
+
+    html_tag = soup.find('html')
+    if html_tag and html_tag.get('lang'):
+        return html_tag.get('lang').split('-')[0]
+
+    meta_lang = soup.find('meta', attrs={'http-equiv': 'content-language'})
+    if meta_lang:
+        return meta_lang.get('content', '').split('-')[0]
+
+    return None
+
+def page_language(soup: BeautifulSoup) -> Optional[str]:
+    """Мова за текстом сторінки (uk/ru/en), а якщо його замало - з <html lang>."""
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    text = soup.get_text(' ', strip=True)[:language_identifier.max_chars]
+    return language_identifier.resolve(text, html_language(soup=soup), metadata_config.LANGUAGE_MIN_CONFIDENCE)
+
+def analyze_page(url: str, content) -> Dict:
+    """Повний CPU-аналіз сторінки за один розбір HTML (для пулу процесів)."""
+    soup = BeautifulSoup(content, 'html.parser') if content else None
+    score = news_score(url, soup=soup)
+    return {
+        'news_score': score,
+        'is_news': score >= 3,
+        'language': page_language(soup) if soup is not None else None,
+        'category': detect_category(url),
+    }
+
+class HeadParser(HTMLParser):
+    """Збирає <meta>, <link>, <title> та <html lang> з (можливо обрізаного) <head>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lang: Optional[str] = None
+        self.meta: Dict[str, str] = {}
+        self.links: List[Dict[str, str]] = []
+        self.title_parts: List[str] = []
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name.lower(): (value or '').strip() for name, value in attrs}
+        if tag == 'html' and attrs.get('lang'):
+            self.lang = attrs['lang']
+        elif tag == 'meta':
+            key = attrs.get('property') or attrs.get('name') or attrs.get('http-equiv')
+            if key and 'content' in attrs:
+                # Перше значення виграє, як і в браузерів/скраперів
+                self.meta.setdefault(key.lower(), attrs['content'])
+        elif tag == 'link' and attrs.get('href'):
+            self.links.append(attrs)
+        elif tag == 'title':
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+
+def _language_code(value: Optional[str]) -> Optional[str]:
+    code = (value or '').replace('_', '-').split('-')[0].strip().lower()
+    return code or None
+
+def parse_head(html: str, base_url: str) -> Dict:
+    """Метадані сторінки з фрагмента HTML до </head>.
+
+    Опис береться з meta description, а за його відсутності - з
+    OpenGraph/Twitter; відносні URL (canonical, RSS) розкриваються
+    відносно `base_url`.
+    """
+    parser = HeadParser()
+    parser.feed(html)
+    parser.close()
+    meta = parser.meta
+
+    canonical_url, feeds = None, []
+    for link in parser.links:
+        rel = link.get('rel', '').lower().split()
+        href = urljoin(base_url, link['href'])
+        if 'canonical' in rel and canonical_url is None:
+            canonical_url = href
+        elif 'alternate' in rel and link.get('type', '').lower() in FEED_TYPES:
+            feeds.append({'url': href, 'type': link['type'].lower(), 'title': link.get('title', '')})
+
+    return {
+        'title': ' '.join(''.join(parser.title_parts).split()) or None,
+        'description': meta.get('description') or meta.get('og:description')
+                       or meta.get('twitter:description') or '',
+        'language': _language_code(parser.lang) or _language_code(meta.get('content-language'))
+                    or _language_code(meta.get('og:locale')),
+        'canonical_url': canonical_url,
+        'feeds': feeds,
+        'opengraph': {key[3:]: value for key, value in meta.items() if key.startswith('og:')},
+    }
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+import pandas as pd
+from .domain_normalizer import domain_normalizer
+from .metrics import track_stage
+from .source_matcher import source_matcher
+from .storage_service import SourceStorage, source_storage
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed", "interrupted"}
+
+def count_rows(path: str) -> int:
+    """Приблизна кількість рядків даних (без заголовка) для розрахунку ETA."""
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return max(lines - 1, 0)
+
+def prepare_chunk(df: pd.DataFrame, imported_at: datetime) -> Tuple[List[Dict], int]:
+    """Рядки CSV -> документи known_sources та кількість відхилених рядків."""
+    def column(name: str) -> pd.Series:
+        if name not in df.columns:
+            return pd.Series("", index=df.index)
+        return df[name].fillna("").astype(str).str.strip()
+
+    raw_domains = column("domain")
+    # Приводимо домени до зареєстрованого вигляду (www.site.com.ua -> site.com.ua)
+    normalized = domain_normalizer.normalize_series(raw_domains)
+    domains = normalized.where(normalized != "", raw_domains)
+    names, urls = column("name"), column("url")
+
+    # Рядки з порожнім доменом відхиляються
+    valid = domains != ""
+    sources = [
+        {
+            "domain": domain,
+            "name": name,
+            # Без URL ключем дедуплікації стає домен
+            "url": url or domain,
+            "created_at": imported_at,
+            "source": "upload_csv",
+        }
+        for domain, name, url in zip(domains[valid], names[valid], urls[valid])
+    ]
+    return sources, int((~valid).sum())
+
+def merge_known(sources: List[Dict]) -> int:
+    """Рядки з URL вже відомого джерела (той самий хост і шлях, з точністю до
+    www. і схеми) отримують URL цього джерела, щоб upsert оновив його замість
+    дубліката; інші сторінки того ж хоста лишаються окремими джерелами.
+    Повертає кількість таких рядків."""
+    merged = 0
+    for source, match in zip(sources, source_matcher.match_many(source["url"] for source in sources)):
+        if match is not None and match["exact"] and match["source"].get("url"):
+            source["url"] = match["source"]["url"]
+            merged += 1
+    return merged
+
+class IngestionService:
+    """Background ingestion of uploaded registry CSV files.
+
+    An upload is written to disk and accepted immediately; the file is then
+    read in `chunk_size` row chunks (parsing runs in a worker thread) and
+    each chunk is upserted into known_sources. Job progress - rows parsed,
+    inserted, updated, rejected and ETA - is saved to `ingestion_jobs`
+    after every chunk and pushed to WebSocket subscribers. At most
+    `concurrency` files are ingested at once, later ones wait as queued.
+    """
+
+    def __init__(self, storage: Optional[SourceStorage] = None, chunk_size: int = 2000,
+                 concurrency: int = 2, upload_dir: Optional[str] = None):
+        self.storage = storage or source_storage
+        self.chunk_size = chunk_size
+        self.upload_dir = upload_dir or os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.jobs: Dict[str, Dict] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def save_upload(self, file, block_size: int = 1 << 20) -> str:
+        """Пише UploadFile на диск блоками, не тримаючи весь файл у пам'яті."""
+        os.makedirs(self.upload_dir, exist_ok=True)
+        path = os.path.join(self.upload_dir, f"ingest_{uuid.uuid4().hex}.csv")
+        with open(path, "wb") as f:
+            while True:
+                block = await file.read(block_size)
+                if not block:
+                    break
+                await asyncio.to_thread(f.write, block)
+        return path
+
+    async def start(self, path: str, filename: str) -> Dict:
+        """Створює задачу імпорту файлу та запускає її у фоні."""
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "filename": filename,
+            "status": "queued",
+            "rows_total": await asyncio.to_thread(count_rows, path),
+            "rows_parsed": 0,
+            "inserted": 0,
+            "updated": 0,
+            "rejected": 0,
+            "rows_per_sec": 0.0,
+            "eta_seconds": None,
+            "created_at": datetime.utcnow(),
+        }
+        self.jobs[job["job_id"]] = job
+        await self._save_job(job)
+        self.tasks[job["job_id"]] = asyncio.create_task(self._execute(job, path))
+        return job
+
+    async def get_progress(self, job_id: str) -> Optional[Dict]:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+        return await self.storage.find_one("ingestion_jobs", job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def _publish(self, job: Dict) -> None:
+        snapshot = dict(job)
+        for queue in self._subscribers.get(job["job_id"], ()):
+            # Повільний клієнт отримує лише найсвіжіший стан
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+
+    async def _save_job(self, job: Dict) -> None:
+        job["updated_at"] = datetime.utcnow()
+        self._publish(job)
+        try:
+            await self.storage.upsert_many("ingestion_jobs", [dict(job)])
+        except Exception as e:
+            logger.error(f"Error saving ingestion job {job['job_id']}: {str(e)}")
+
+    async def _execute(self, job: Dict, path: str) -> None:
+        job_id = job["job_id"]
+        try:
+            async with self._slots:
+                job["status"] = "running"
+                job["started_at"] = datetime.utcnow()
+                await self._save_job(job)
+                started = time.monotonic()
+
+                reader = await asyncio.to_thread(pd.read_csv, path, chunksize=self.chunk_size, dtype=str)
+                with reader:
+                    while True:
+                        with track_stage("csv_ingest_parse", awaits=True):
+                            df = await asyncio.to_thread(next, reader, None)
+                            if df is None:
+                                break
+                            sources, rejected = await asyncio.to_thread(prepare_chunk, df, datetime.utcnow())
+                            await asyncio.to_thread(merge_known, sources)
+
+                        with track_stage("csv_ingest_write", awaits=True):
+                            inserted, updated = await self.storage.upsert_many("known_sources", sources)
+                        source_matcher.add_many(sources)
+
+                        job["rows_parsed"] += len(df)
+                        job["inserted"] += inserted
+                        job["updated"] += updated
+                        job["rejected"] += rejected
+                        # Кількість рядків оцінена за переносами - не даємо їй бути меншою за фактичну
+                        job["rows_total"] = max(job["rows_total"], job["rows_parsed"])
+                        speed = job["rows_parsed"] / max(time.monotonic() - started, 1e-6)
+                        job["rows_per_sec"] = round(speed, 1)
+                        job["eta_seconds"] = round((job["rows_total"] - job["rows_parsed"]) / speed) if speed else None
+                        await self._save_job(job)
+
+                job["status"] = "completed"
+                job["rows_total"] = job["rows_parsed"]
+                job["eta_seconds"] = 0
+                logger.info(f"Ingestion {job_id} ({job['filename']}): {job['rows_parsed']} rows, "
+                            f"{job['inserted']} inserted, {job['updated']} updated, {job['rejected']} rejected")
+        except asyncio.CancelledError:
+            job["status"] = "interrupted"
+            raise
+        except Exception as e:
+            logger.error(f"Ingestion {job_id} failed: {str(e)}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = datetime.utcnow()
+            await self._save_job(job)
+            self.jobs.pop(job_id, None)
+            self.tasks.pop(job_id, None)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+ingestion_service = IngestionService()
@@ -0,0 +1,152 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Літери, що трапляються лише в одній з мов
+UK_LETTERS = frozenset("іїєґ")
+RU_LETTERS = frozenset("ыэъё")
+_LETTERS_RE = re.compile(r"[^\W\d_]+(?:['ʼ’][^\W\d_]+)*")
+
+# Паралельні новинні тексти для початкових профілів n-грам: однаковий
+# зміст і близька довжина, щоб профілі відрізнялися саме мовою
+SEED_TEXTS = {
+    "uk": (
+        "Уряд України ухвалив рішення про виділення додаткових коштів на відновлення енергетичної "
+        "інфраструктури. Про це повідомили у Міністерстві енергетики. Як зазначають експерти, ціни на "
+        "електроенергію для населення залишаться незмінними до кінця року. У Києві та області через негоду "
+        "знеструмлено понад сто населених пунктів. Рятувальники працюють цілодобово, щоб якнайшвидше "
+        "відновити живлення. Президент провів зустріч із представниками місцевої влади, де обговорили "
+        "підготовку до опалювального сезону. Громадське мовлення запускає нову програму для підлітків, яка "
+        "розповідатиме про історію та культуру своєї країни. Новини регіону: у Львові відкрили сучасний "
+        "дитячий садок, а в Одесі ремонтують набережну. Що відомо про наслідки обстрілу? Його жертвами "
+        "стали шестеро людей, ще дев'ятеро отримали поранення. Також читайте головні події дня та прогноз "
+        "погоди на вихідні."
+    ),
+    "ru": (
+        "Правительство приняло решение о выделении дополнительных средств на восстановление энергетической "
+        "инфраструктуры. Об этом сообщили в Министерстве энергетики. Как отмечают эксперты, цены на "
+        "электроэнергию для населения останутся неизменными до конца года. В Москве и области из-за непогоды "
+        "обесточены более ста населённых пунктов. Спасатели работают круглосуточно, чтобы как можно быстрее "
+        "восстановить электроснабжение. Президент провёл встречу с представителями местной власти, где "
+        "обсудили подготовку к отопительному сезону. Общественное телевидение запускает новую программу для "
+        "подростков, которая будет рассказывать об истории и культуре своей страны. Новости региона: в "
+        "Петербурге открыли современный детский сад, а в Сочи ремонтируют набережную. Что известно о "
+        "последствиях происшествия? Его жертвами стали шесть человек, ещё девять получили ранения. Также "
+        "читайте главные события дня и прогноз погоды на выходные."
+    ),
+    "en": (
+        "The government has approved additional funding to restore the energy infrastructure, the Ministry "
+        "of Energy said on Tuesday. According to experts, electricity prices for households will remain "
+        "unchanged until the end of the year. More than one hundred towns and villages lost power after the "
+        "storm. Rescue teams are working around the clock to restore supply as quickly as possible. The "
+        "president met with local officials to discuss preparations for the heating season. Public "
+        "broadcasting is launching a new programme for teenagers that will tell the story of the country's "
+        "history and culture. Regional news: a modern kindergarten opened in the city, and the embankment is "
+        "being repaired. What do we know about the consequences of the attack? Six people were killed and "
+        "nine others were injured. Read the main events of the day and the weather forecast for the weekend."
+    ),
+}
+
+class LanguageIdentifier:
+    """Offline uk/ru/en identification from character n-grams.
+
+    Each language has a profile of character 1-3-grams (words padded with
+    spaces); a text is scored by naive Bayes over its n-grams, and letters
+    unique to one language (і ї є ґ vs ы э ъ ё) add `marker_weight` each,
+    which separates Ukrainian from Russian even in short titles. Only the
+    first `max_chars` characters are scored. No network access: meant for
+    text that was already fetched (page head, stored HTML).
+    """
+
+    def __init__(self, samples: Optional[Iterable[Tuple[str, str]]] = None, alpha: float = 0.5,
+                 marker_weight: float = 4.0, min_letters: int = 12, max_chars: int = 1000):
+        self.alpha = alpha
+        self.marker_weight = marker_weight
+        self.min_letters = min_letters
+        self.max_chars = max_chars
+        self._log_prob: Dict[str, Dict[str, float]] = {}
+        self._log_unseen: Dict[str, float] = {}
+        self.fit(samples if samples is not None else
+                 [(text, language) for language, text in SEED_TEXTS.items()])
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return _LETTERS_RE.findall(text.lower())
+
+    @staticmethod
+    def _ngrams(words: List[str]) -> Counter:
+        grams = Counter()
+        for word in words:
+            padded = f" {word} "
+            for n in (1, 2, 3):
+                for i in range(len(padded) - n + 1):
+                    gram = padded[i:i + n]
+                    if gram != " ":
+                        grams[gram] += 1
+        return grams
+
+    def fit(self, samples: Iterable[Tuple[str, str]]) -> None:
+        """Будує профілі з пар (текст, мова)."""
+        profiles: Dict[str, Counter] = {}
+        for text, language in samples:
+            profiles.setdefault(language, Counter()).update(self._ngrams(self._words(text)))
+        vocabulary = len(set().union(*profiles.values())) + 1 if profiles else 1
+        self._log_prob, self._log_unseen = {}, {}
+        for language, grams in profiles.items():
+            denominator = math.log(sum(grams.values()) + self.alpha * vocabulary)
+            self._log_prob[language] = {gram: math.log(count + self.alpha) - denominator
+                                        for gram, count in grams.items()}
+            self._log_unseen[language] = math.log(self.alpha) - denominator
+
+    @property
+    def languages(self) -> List[str]:
+        return list(self._log_prob)
+
+    def identify(self, text: Optional[str]) -> Optional[Dict]:
+        """{'language': код мови, 'confidence': апостеріорна ймовірність} або None для короткого тексту."""
+        if not text:
+            return None
+        words = self._words(text[:self.max_chars])
+        letters = sum(len(word) for word in words)
+        if letters < self.min_letters:
+            return None
+        grams = self._ngrams(words)
+        uk_markers = sum(count for gram, count in grams.items() if len(gram) == 1 and gram in UK_LETTERS)
+        ru_markers = sum(count for gram, count in grams.items() if len(gram) == 1 and gram in RU_LETTERS)
+
+        scores = {}
+        for language, log_prob in self._log_prob.items():
+            unseen = self._log_unseen[language]
+            scores[language] = sum(count * log_prob.get(gram, unseen) for gram, count in grams.items())
+        if "uk" in scores:
+            scores["uk"] += self.marker_weight * (uk_markers - ru_markers)
+        if "ru" in scores:
+            scores["ru"] += self.marker_weight * (ru_markers - uk_markers)
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        normalizer = sum(math.exp(score - top) for score in scores.values())
+        return {"language": best, "confidence": 1.0 / normalizer}
+
+    def detect(self, text: Optional[str], min_confidence: float = 0.0) -> Optional[str]:
+        """Код мови або None, якщо текст закороткий чи впевненість нижча за поріг."""
+        result = self.identify(text)
+        if result is None or result["confidence"] < min_confidence:
+            return None
+        return result["language"]
+
+    def resolve(self, text: Optional[str], declared: Optional[str], min_confidence: float) -> Optional[str]:
+        """Мова сторінки: розпізнана з тексту, якщо впевнено, інакше заявлена.
+
+        Заявлену мову поза uk/ru/en (de, pl, ...) не перекриваємо -
+        ідентифікатор їх не знає і назвав би латиницю англійською.
+        """
+        if declared and declared not in self._log_prob:
+            return declared
+        return self.detect(text, min_confidence) or declared
+
+    def identify_many(self, texts: Iterable[Optional[str]]) -> List[Optional[Dict]]:
+        return [self.identify(text) for text in texts]
+
+language_identifier = LanguageIdentifier()
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.request import getproxies, proxy_bypass
+import httpx
+from ..config.liveness_config import liveness_config
+from .domain_normalizer import domain_normalizer
+from .fetch_scheduler import USER_AGENT, fetch_scheduler
+from .metrics import LIVENESS_CHECKS, record_cache
+
+logger = logging.getLogger(__name__)
+
+LIVE = 'live'
+DEAD = 'dead'
+PARKED = 'parked'
+MARKETPLACE = 'marketplace'
+# Сервер не відповів вчасно: це не доказ, що сайту немає
+UNKNOWN = 'unknown'
+# Такі домени не варто розкривати, аналізувати ШІ чи завантажувати
+DROPPED_STATUSES = {DEAD, PARKED, MARKETPLACE}
+
+# Майданчики продажу доменів: редірект туди означає, що сайту немає
+MARKETPLACE_DOMAINS = {
+    'sedo.com', 'dan.com', 'afternic.com', 'hugedomains.com', 'buydomains.com', 'sav.com',
+    'undeveloped.com', 'atom.com', 'squadhelp.com', 'domainmarket.com', 'flippa.com',
+    'brandbucket.com', 'efty.com', 'uniregistry.com', 'domainagents.com',
+}
+# Сервіси паркування (редірект або сторінка з їхніми скриптами)
+PARKING_DOMAINS = {
+    'sedoparking.com', 'parkingcrew.net', 'bodis.com', 'above.com', 'parklogic.com',
+    'skenzo.com', 'domainparking.ru', 'parking.reg.ru',
+}
+PARKED_MARKERS = (
+    'domain is for sale', 'domain may be for sale', 'buy this domain', 'this domain is parked',
+    'parked free', 'sedoparking', 'parkingcrew', 'bodis.com',
+    'домен продається', 'домен продаётся', 'домен продается', 'домен припаркований',
+    'домен припаркован', 'цей домен можна купити', 'этот домен можно купить',
+)
+
+class LivenessChecker:
+    """Concurrent liveness probe for candidate domains.
+
+    A domain is resolved in DNS (skipped when a proxy handles it), falling
+    back to `www.<domain>` for sites without an apex record, and its home
+    page is requested once: http:// first so redirects reveal the final
+    host, https:// if http is refused. Only the first `scan_bytes`
+    of the page are read, to spot parking pages. The outcome - live, dead,
+    parked or marketplace - is cached per registered domain. A probe that
+    only timed out is `unknown`: such domains are not dropped, just
+    processed last, and the result is cached for `unknown_ttl` only.
+
+    Checks run on a private event loop thread with one shared httpx
+    client, so the synchronous search code (running in worker threads) can
+    probe hundreds of domains at once; concurrent checks of one domain
+    share a single probe.
+    """
+
+    def __init__(self, ttl: float = None, negative_ttl: float = None, timeout: float = None,
+                 concurrency: int = None, scan_bytes: int = None, max_entries: int = None,
+                 unknown_ttl: float = None):
+        self.ttl = ttl if ttl is not None else liveness_config.LIVENESS_TTL
+        self.negative_ttl = negative_ttl if negative_ttl is not None else liveness_config.LIVENESS_NEGATIVE_TTL
+        self.unknown_ttl = unknown_ttl if unknown_ttl is not None else liveness_config.LIVENESS_UNKNOWN_TTL
+        self.timeout = timeout or liveness_config.LIVENESS_TIMEOUT
+        self.concurrency = concurrency or liveness_config.LIVENESS_CONCURRENCY
+        self.scan_bytes = scan_bytes or liveness_config.LIVENESS_SCAN_BYTES
+        self.max_entries = max_entries or liveness_config.LIVENESS_MAX_ENTRIES
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def cached(self, domain: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+        return None
+
+    def _store(self, result: Dict) -> None:
+        ttl = {LIVE: self.ttl, UNKNOWN: self.unknown_ttl}.get(result['status'], self.negative_ttl)
+        with self._lock:
+            self._entries[result['domain']] = (result, time.monotonic() + ttl)
+            self._entries.move_to_end(result['domain'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="liveness-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _proxied(self, domain: str) -> bool:
+        # За проксі DNS розв'язує сам проксі - локальна перевірка нічого не означає
+        proxies = getproxies()
+        return any(scheme in proxies for scheme in ('http', 'https', 'all')) and not proxy_bypass(domain)
+
+    async def _resolves(self, domain: str) -> bool:
+        try:
+            await asyncio.get_running_loop().getaddrinfo(domain, None, type=socket.SOCK_STREAM)
+            return True
+        except (socket.gaierror, UnicodeError):
+            return False
+
+    async def _fetch_start(self, url: str) -> Tuple[httpx.Response, bytes]:
+        await fetch_scheduler.await_slot(url)
+        response = await self._client.send(self._client.build_request('GET', url), stream=True)
+        body = b''
+        try:
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) >= self.scan_bytes:
+                    break
+        finally:
+            await response.aclose()
+        fetch_scheduler.report(url, status=response.status_code,
+                               retry_after=response.headers.get('Retry-After'))
+        return response, body[:self.scan_bytes]
+
+    def _classify(self, domain: str, response: httpx.Response, body: bytes) -> Tuple[str, str]:
+        final_host = response.url.host or domain
+        final_domain = domain_normalizer.normalize(final_host)
+        if final_domain in MARKETPLACE_DOMAINS:
+            return MARKETPLACE, f"redirects to {final_host}"
+        if final_domain in PARKING_DOMAINS or final_host in PARKING_DOMAINS:
+            return PARKED, f"redirects to {final_host}"
+        text = body.decode('utf-8', errors='ignore').lower()
+        for marker in PARKED_MARKERS:
+            if marker in text:
+                return PARKED, f"page contains '{marker}'"
+        if response.status_code >= 500:
+            return DEAD, f"HTTP {response.status_code}"
+        # 4xx (зокрема 403 від анти-бот захисту) - сервер живий
+        return LIVE, f"HTTP {response.status_code}"
+
+    async def _probe(self, domain: str) -> Dict:
+        result = {'domain': domain, 'final_url': None, 'checked_at': time.time()}
+        # Частина сайтів працює лише на www. (без A-запису для самого домену)
+        hosts = [domain] if domain.startswith('www.') else [domain, f"www.{domain}"]
+        if not self._proxied(domain):
+            for index, host in enumerate(hosts):
+                if await self._resolves(host):
+                    hosts = hosts[index:]
+                    break
+            else:
+                result.update(status=DEAD, reason='DNS lookup failed')
+                return result
+
+        error = None
+        timed_out = False
+        async with self._semaphore:
+            for url in (f"{scheme}://{host}/" for host in hosts for scheme in ('http', 'https')):
+                try:
+                    response, body = await self._fetch_start(url)
+                except (httpx.TransportError, httpx.TooManyRedirects) as e:
+                    error = f"{type(e).__name__}: {str(e)}"
+                    # Таймаут (з'єднання, читання, пулу) - повільний сервер, а не мертвий
+                    timed_out = timed_out or isinstance(e, httpx.TimeoutException)
+                    continue
+                status, reason = self._classify(domain, response, body)
+                result.update(status=status, reason=reason, final_url=str(response.url))
+                return result
+
+        result.update(status=UNKNOWN if timed_out else DEAD, reason=error)
+        return result
+
+    async def _check(self, domain: str) -> Dict:
+        pending = self._pending.get(domain)
+        if pending is None:
+            pending = self._pending[domain] = asyncio.ensure_future(self._probe(domain))
+            try:
+                result = await pending
+                LIVENESS_CHECKS.inc(status=result['status'])
+                self._store(result)
+                return result
+            finally:
+                self._pending.pop(domain, None)
+        return await asyncio.shield(pending)
+
+    async def check_many(self, domains: Iterable[str]) -> Dict[str, Dict]:
+        """Результати перевірки для всіх доменів (кеш + нові перевірки паралельно)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(follow_redirects=True, max_redirects=5, timeout=self.timeout,
+                                             headers={'User-Agent': USER_AGENT})
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        results, missing = {}, []
+        for domain in dict.fromkeys(domain for domain in domains if domain):
+            cached = self.cached(domain)
+            record_cache("liveness", cached is not None)
+            if cached is not None:
+                results[domain] = cached
+            else:
+                missing.append(domain)
+
+        checked = await asyncio.gather(*(self._check(domain) for domain in missing), return_exceptions=True)
+        for domain, result in zip(missing, checked):
+            if isinstance(result, Exception):
+                logger.warning(f"Liveness check of {domain} failed: {str(result)}")
+                continue
+            results[domain] = result
+        return results
+
+    def check(self, domains: Iterable[str], timeout: Optional[float] = None) -> Dict[str, Dict]:
+        """Синхронний виклик check_many з будь-якого потоку."""
+        domains = list(domains)
+        if not domains:
+            return {}
+        future = asyncio.run_coroutine_threadsafe(self.check_many(domains), self._ensure_loop())
+        try:
+            # Після таймауту перевірки не скасовуються: їхні результати потраплять у кеш
+            return future.result(timeout if timeout is not None else self.timeout * 6)
+        except Exception as e:
+            logger.warning(f"Liveness check of {len(domains)} domains failed: {str(e)}")
+            # Не вдалося перевірити - нічого не відкидаємо, лише беремо кеш
+            cached = {domain: self.cached(domain) for domain in domains}
+            return {domain: result for domain, result in cached.items() if result}
+
+    def is_dropped(self, result: Optional[Dict]) -> bool:
+        return bool(result) and result['status'] in DROPPED_STATUSES
+
+    def is_unknown(self, result: Optional[Dict]) -> bool:
+        return bool(result) and result['status'] == UNKNOWN
+
+liveness_checker = LivenessChecker()
@@ -0,0 +1,188 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+import requests
+from .metrics import LLM_REJECTED, track_stage
+from .profiler import submit
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """Ковзне вікно останніх затримок для обчислення перцентилів."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures.
+
+    While open every call is rejected; after `reset_timeout` a single
+    probe call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("LLM circuit breaker opened")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+def is_service_failure(error: Optional[BaseException]) -> bool:
+    """Чи свідчить помилка про збій сервісу: таймаут, мережа або 5xx.
+
+    Відповідь, яку не вдалося розібрати, чи 4xx - помилка окремого виклику:
+    сервіс відповів, тож запобіжник її не рахує. None - вичерпаний дедлайн.
+    """
+    if error is None or isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code >= 500
+
+class LLMClient:
+    """Call policy for the local LLM service.
+
+    - deadline per call = p95 of observed latency * `deadline_factor`,
+      clamped to [min_deadline, max_deadline];
+    - a hedged duplicate request is sent once the primary exceeds the p90
+      latency, the first valid answer wins;
+    - a circuit breaker rejects calls while the service is failing, so
+      callers fall back to local domain extraction immediately. Only
+      timeouts, transport errors and 5xx count as failures; an answer
+      that is not a JSON object fails just that call.
+
+    `query()` returns the parsed JSON dict or None; callers own the fallback.
+    """
+
+    def __init__(self, base_url: str = None, min_deadline: float = 2.0, max_deadline: float = 30.0,
+                 deadline_factor: float = 2.0, hedge_percentile: float = 90, min_samples: int = 20,
+                 breaker: Optional[CircuitBreaker] = None, max_workers: int = 16):
+        self.base_url = base_url or os.getenv("LLM_URL", "http://127.0.0.1:8080/")
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.deadline_factor = deadline_factor
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    def deadline(self) -> float:
+        if len(self.latency) < self.min_samples:
+            return self.max_deadline
+        p95 = self.latency.percentile(95)
+        return min(self.max_deadline, max(self.min_deadline, p95 * self.deadline_factor))
+
+    def hedge_delay(self) -> Optional[float]:
+        if len(self.latency) < self.min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def _request(self, params: Dict, timeout: float) -> Dict:
+        started = time.monotonic()
+        response = self.session.get(self.base_url, params=params, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+        if not isinstance(result, dict):
+            raise ValueError("LLM response is not a JSON object")
+        self.latency.add(time.monotonic() - started)
+        return result
+
+    def query(self, params: Dict) -> Optional[Dict]:
+        """Виконує запит до ШІ з урахуванням дедлайну, хеджування та запобіжника."""
+        if not self.breaker.allow():
+            LLM_REJECTED.inc()
+            return None
+
+        with track_stage("llm_call"):
+            return self._query(params)
+
+    def _query(self, params: Dict) -> Optional[Dict]:
+        deadline = self.deadline()
+        started = time.monotonic()
+        pending = {submit(self._executor, self._request, params, deadline)}
+
+        hedge_delay = self.hedge_delay()
+        if hedge_delay is not None and hedge_delay < deadline:
+            done, _ = wait(pending, timeout=hedge_delay)
+            if not done:
+                # Запит у "хвості" розподілу затримок: дублюємо його
+                pending.add(submit(self._executor, self._request, params, deadline - hedge_delay))
+
+        error = None
+        # Чи відповів сервіс хоч раз (нехай і непридатною відповіддю)
+        responded = False
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    responded = responded or not is_service_failure(e)
+                    continue
+                self.breaker.record_success()
+                return result
+
+        # Незавершені запити обмежені власним timeout і завершаться самі.
+        # Таймаут враховуємо як спостереження, інакше дедлайн лише звужувався б.
+        if error is None or isinstance(error, requests.Timeout):
+            self.latency.add(deadline)
+        logger.warning(f"LLM call failed after {time.monotonic() - started:.1f}s "
+                       f"(deadline {deadline:.1f}s): {error or 'deadline exceeded'}")
+        if responded:
+            # Сервіс працює: закриває й напіввідкритий запобіжник після пробного виклику
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return None
+
+llm_client = LLMClient()
@@ -0,0 +1,232 @@
+import logging
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from ..config.classifier_config import classifier_config
+from .domain_normalizer import domain_normalizer
+from .storage_service import SourceStorage
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w{3,}")
+_PATH_SPLIT_RE = re.compile(r"[^\w]+")
+# Скільки слів назви брати в ознаки
+MAX_TEXT_WORDS = 60
+
+# Мітки реєстру - вільні назви типів і регіонів; ключові слова переводять їх
+# у словник відповіді ШІ (type, coverage). Порядок важливий: перший збіг
+MEDIA_TYPE_KEYWORDS = (
+    ('tv', ('тб', 'телебач', 'телекан', 'tv')),
+    ('radio', ('радіо', 'радио', 'radio')),
+    ('press', ('друк', 'газет', 'журнал', 'press', 'print', 'newspaper', 'magazine')),
+    ('blog', ('блог', 'blog')),
+    ('news', ('онлайн', 'інтернет', 'новин', 'сайт', 'агенц', 'агентств', 'online', 'news', 'web')),
+)
+COVERAGE_KEYWORDS = (
+    ('international', ('міжнар', 'світ', 'international', 'world')),
+    ('national', ('всеукр', 'загальнонац', 'національ', 'україна', 'national', 'ukraine')),
+    ('regional', ('обл', 'регіон', 'щина', 'region', 'oblast')),
+)
+# Тип медіа -> категорія сайту DomainAnalyzer (news, blog, corporate, ...)
+TYPE_CATEGORIES = {'news': 'news', 'tv': 'news', 'radio': 'news', 'press': 'news', 'blog': 'blog'}
+
+def _match(label: Optional[str], table) -> Optional[str]:
+    label = (label or "").lower()
+    for value, keywords in table:
+        if any(keyword in label for keyword in keywords):
+            return value
+    return None
+
+def llm_labels(predictions: Dict[str, Optional[Dict]]) -> Dict[str, Optional[str]]:
+    """type і coverage у словнику ШІ та category DomainAnalyzer з передбачених міток реєстру.
+
+    Мітка без відповідника - None; регіон без ознак області чи країни -
+    місто, тобто local.
+    """
+    labels = {target: prediction["label"] if prediction else None for target, prediction in predictions.items()}
+    media_type = _match(labels.get("media_type"), MEDIA_TYPE_KEYWORDS) or _match(
+        labels.get("super_type"), MEDIA_TYPE_KEYWORDS)
+    region = labels.get("region")
+    coverage = _match(region, COVERAGE_KEYWORDS) or ("local" if region else None)
+    return {"type": media_type, "coverage": coverage, "category": TYPE_CATEGORIES.get(media_type)}
+
+def _label(value) -> Optional[str]:
+    """Мітка з документа; NaN з pandas і порожні рядки - відсутня мітка."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    return value if value and value.lower() != "nan" else None
+
+def site_name(metadata: Optional[Dict]) -> Optional[str]:
+    """Назва сайту з <head> (og:site_name або title) - відповідник назви з реєстру."""
+    if not metadata:
+        return None
+    return (metadata.get("opengraph") or {}).get("site_name") or metadata.get("title")
+
+def extract_features(url: str, name: Optional[str] = None) -> List[str]:
+    """Токени ознак сайту: частини хоста та слова назви.
+
+    Ті самі ознаки при навчанні й класифікації: з реєстру є лише URL та
+    назва, тож з <head> нового сайту береться тільки назва (site_name), а
+    шлях URL не враховується - у реєстрі це розділ сайту, а в пошуку стаття.
+    """
+    features = []
+    subdomain, domain, suffix = domain_normalizer.split(url or "")
+    if domain:
+        features.append(f"dom:{domain}")
+        # Символьні триграми назви домену: radiosvoboda, tvoemisto, ...
+        padded = f"^{domain}$"
+        features.extend(f"c3:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        for part in _PATH_SPLIT_RE.split(domain):
+            if part:
+                features.append(f"dp:{part}")
+    if suffix:
+        features.append(f"tld:{suffix}")
+        features.extend(f"sfx:{label}" for label in suffix.split("."))
+    features.extend(f"sub:{label}" for label in subdomain.split(".") if label and label != "www")
+
+    words = _WORD_RE.findall((name or "").lower())[:MAX_TEXT_WORDS]
+    features.extend(f"w:{word}" for word in words)
+    return features
+
+def hash_features(features: Iterable[str], n_features: int) -> Counter:
+    """Розріджений вектор: номер кошика (crc32, стабільний між процесами) -> кількість."""
+    return Counter(zlib.crc32(feature.encode("utf-8")) % n_features for feature in features)
+
+class HashedNaiveBayes:
+    """Multinomial naive Bayes over hashed sparse features.
+
+    Feature tokens are hashed (crc32, stable across processes) into
+    `n_features` buckets, so the model has no vocabulary to build and
+    memory grows only with the buckets seen per class. Prediction is a
+    dictionary lookup per feature and class.
+    """
+
+    def __init__(self, n_features: int, alpha: float):
+        self.n_features = n_features
+        self.alpha = alpha
+        self._class_counts: Counter = Counter()
+        self._feature_counts: Dict[str, Counter] = {}
+        self._log_prior: Dict[str, float] = {}
+        self._log_weights: Dict[str, Dict[int, float]] = {}
+        self._log_unseen: Dict[str, float] = {}
+
+    def partial_fit(self, vector: Counter, label: str) -> None:
+        self._class_counts[label] += 1
+        self._feature_counts.setdefault(label, Counter()).update(vector)
+
+    def finalize(self, min_class_samples: int = 1) -> None:
+        """Перераховує логарифми ймовірностей; рідкісні мітки відкидаються."""
+        classes = [label for label, count in self._class_counts.items() if count >= min_class_samples]
+        total = sum(self._class_counts[label] for label in classes)
+        self._log_prior, self._log_weights, self._log_unseen = {}, {}, {}
+        for label in classes:
+            counts = self._feature_counts[label]
+            denominator = math.log(sum(counts.values()) + self.alpha * self.n_features)
+            self._log_prior[label] = math.log(self._class_counts[label] / total)
+            self._log_unseen[label] = math.log(self.alpha) - denominator
+            self._log_weights[label] = {bucket: math.log(count + self.alpha) - denominator
+                                        for bucket, count in counts.items()}
+
+    @property
+    def classes(self) -> List[str]:
+        return list(self._log_prior)
+
+    def predict(self, vector: Counter) -> Optional[Dict]:
+        """{'label': найімовірніша мітка, 'confidence': її апостеріорна ймовірність}."""
+        if not self._log_prior:
+            return None
+        scores = {}
+        for label, log_prior in self._log_prior.items():
+            weights, unseen = self._log_weights[label], self._log_unseen[label]
+            scores[label] = log_prior + sum(count * weights.get(bucket, unseen) for bucket, count in vector.items())
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        normalizer = sum(math.exp(score - top) for score in scores.values())
+        return {"label": best, "confidence": 1.0 / normalizer}
+
+class MediaClassifier:
+    """Local classifier for registry labels (media_type, super_type, region).
+
+    One HashedNaiveBayes model per target is trained from labelled
+    known_sources (URL, domain and name). `classify` answers in
+    microseconds; a result is `confident` only when every target reaches
+    the configured probability, and only the rest should go to the LLM.
+    """
+
+    def __init__(self, targets: Optional[List[str]] = None, threshold: Optional[float] = None):
+        self.targets = targets or classifier_config.CLASSIFIER_TARGETS
+        self.threshold = threshold if threshold is not None else classifier_config.CLASSIFIER_CONFIDENCE
+        self._models: Dict[str, HashedNaiveBayes] = {}
+        self._lock = threading.Lock()
+        self.trained_on = 0
+
+    def _new_models(self) -> Dict[str, HashedNaiveBayes]:
+        return {target: HashedNaiveBayes(classifier_config.CLASSIFIER_FEATURES, classifier_config.CLASSIFIER_ALPHA)
+                for target in self.targets}
+
+    @staticmethod
+    def _fit_batch(models: Dict[str, HashedNaiveBayes], sources: Iterable[Dict]) -> int:
+        fitted = 0
+        for source in sources:
+            labels = {target: _label(source.get(target)) for target in models}
+            if not any(labels.values()):
+                continue
+            url = source.get("url") if isinstance(source.get("url"), str) else source.get("domain")
+            vector = hash_features(extract_features(url or "", name=_label(source.get("name"))),
+                                   classifier_config.CLASSIFIER_FEATURES)
+            for target, label in labels.items():
+                if label:
+                    models[target].partial_fit(vector, label)
+            fitted += 1
+        return fitted
+
+    def _install(self, models: Dict[str, HashedNaiveBayes], fitted: int) -> None:
+        for model in models.values():
+            model.finalize(classifier_config.CLASSIFIER_MIN_CLASS_SAMPLES)
+        # Нова модель підміняється цілком - класифікація не бачить напівнавченої
+        with self._lock:
+            self._models, self.trained_on = models, fitted
+
+    def fit(self, sources: Iterable[Dict]) -> int:
+        """Навчає моделі заново на переданих документах known_sources."""
+        models = self._new_models()
+        fitted = self._fit_batch(models, sources)
+        self._install(models, fitted)
+        return fitted
+
+    async def train(self, storage: SourceStorage) -> int:
+        """Навчає моделі на всьому known_sources з мітками."""
+        models = self._new_models()
+        fitted = 0
+        async for batch in storage.iter_batches("known_sources"):
+            fitted += self._fit_batch(models, batch)
+        self._install(models, fitted)
+        logger.info(f"Media classifier trained on {fitted} labelled sources: "
+                    + ", ".join(f"{target}={len(model.classes)} labels" for target, model in models.items()))
+        return fitted
+
+    @property
+    def ready(self) -> bool:
+        return any(model.classes for model in self._models.values())
+
+    def classify(self, url: str, name: Optional[str] = None) -> Dict:
+        """Передбачення для кожної мітки та чи всі вони впевнені.
+
+        {'predictions': {target: {'label', 'confidence'} | None}, 'confident': bool}
+        """
+        models = self._models
+        vector = hash_features(extract_features(url, name), classifier_config.CLASSIFIER_FEATURES)
+        predictions = {}
+        for target in self.targets:
+            model = models.get(target)
+            predictions[target] = model.predict(vector) if model else None
+        confident = bool(predictions) and all(
+            prediction is not None and prediction["confidence"] >= self.threshold
+            for prediction in predictions.values())
+        return {"predictions": predictions, "confident": confident}
+
+media_classifier = MediaClassifier()
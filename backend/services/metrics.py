@@ -0,0 +1,248 @@
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+from .profiler import record_stage
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, key)} {_format(value)}" for key, value in items]
+        return lines
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [counts per bucket..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = 'le="%s"' % _format(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format(state[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Мінімальний реєстр метрик у текстовому форматі Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "sm_parse_stage_duration_seconds", "Duration of search/import pipeline stages", ["stage"])
+STAGE_ERRORS = registry.counter(
+    "sm_parse_stage_errors_total", "Failed pipeline stage executions", ["stage"])
+CACHE_REQUESTS = registry.counter(
+    "sm_parse_cache_requests_total", "Cache lookups by result", ["cache", "result"])
+HTTP_SECONDS = registry.histogram(
+    "sm_parse_http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"])
+HTTP_IN_FLIGHT = registry.gauge(
+    "sm_parse_http_requests_in_flight", "HTTP requests currently being served")
+BROWSER_DRIVERS = registry.gauge(
+    "sm_parse_browser_drivers", "Browser drivers by state", ["state"])
+BROWSER_RSS = registry.gauge(
+    "sm_parse_browser_rss_bytes", "Resident memory of the Chrome process tree")
+BROWSER_RESTARTS = registry.counter(
+    "sm_parse_browser_worker_restarts_total", "Browser worker processes replaced", ["reason"])
+LLM_REJECTED = registry.counter(
+    "sm_parse_llm_rejected_total", "LLM calls skipped while the circuit breaker is open")
+CLASSIFIER_DECISIONS = registry.counter(
+    "sm_parse_classifier_decisions_total", "Media source analyses answered locally or sent to the LLM", ["route"])
+DUPLICATES_SKIPPED = registry.counter(
+    "sm_parse_duplicate_entries_skipped_total", "Near-duplicate search entries skipped before resolution", ["provider"])
+SINGLE_FLIGHT = registry.counter(
+    "sm_parse_single_flight_calls_total", "Coalesced calls by role: leader ran the work, shared joined it",
+    ["name", "role"])
+DISCOVERY_SKIPPED = registry.counter(
+    "sm_parse_discovery_skipped_total", "Search entries skipped as already processed by an earlier run", ["provider"])
+PAGE_BYTES = registry.counter(
+    "sm_parse_page_bytes_total", "Page body bytes read for site metadata", ["fetcher"])
+KNOWN_SOURCES_SKIPPED = registry.counter(
+    "sm_parse_known_source_skipped_total", "Search entries skipped as already in the known sources registry", ["provider"])
+LIVENESS_CHECKS = registry.counter(
+    "sm_parse_liveness_checks_total", "Candidate domain liveness probes by outcome", ["status"])
+DEADLINE_EXCEEDED = registry.counter(
+    "sm_parse_deadline_exceeded_total", "Request stages cut short by the request latency budget", ["stage"])
+THROTTLED = registry.counter(
+    "sm_parse_throttled_total", "Responses that triggered politeness backoff", ["target"])
+
+@contextmanager
+def track_stage(stage: str, awaits: bool = False):
+    """Вимірює тривалість етапу; винятки рахуються як помилки етапу.
+
+    `awaits` - етап віддає керування event loop (не блокує його).
+    """
+    started = time.perf_counter()
+    cpu_started = time.thread_time()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        wall = time.perf_counter() - started
+        STAGE_SECONDS.observe(wall, stage=stage)
+        record_stage(stage, wall, time.thread_time() - cpu_started, blocking=not awaits)
+
+def timed_stage(stage: str):
+    """Декоратор для track_stage (для sync та async функцій)."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track_stage(stage, awaits=True):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def process_tree(pid: int) -> List[int]:
+    """PID процесу та всіх його нащадків (Linux /proc; інакше лише сам pid)."""
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return [pid]
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm може містити пробіли - ppid йде після останньої ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+def process_tree_rss(pid: int) -> int:
+    """RSS процесу та всіх його нащадків у байтах (Linux /proc; інакше 0)."""
+    total = 0
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for current in process_tree(pid):
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
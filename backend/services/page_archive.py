@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from ..config.archive_config import archive_config
+from .metrics import record_cache
+
+try:
+    import zstandard
+except ImportError:
+    # zstandard є в requirements.txt; zlib - лише запасний кодек для
+    # середовищ, де його не вдалося встановити (стиснення гірше й повільніше)
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Перші байти файлу блоба - кодек, яким його стиснено
+CODEC_ZSTD = b"ZST1"
+CODEC_ZLIB = b"ZLB1"
+HEADER_SIZE = 4
+
+class PageArchive:
+    """Content-addressed on-disk archive of fetched pages.
+
+    Each distinct body is stored once as blobs/<sha256[:2]>/<sha256>,
+    compressed with zstd behind a 4-byte codec header. zlib is only a
+    fallback for installs without the zstandard package (a warning is
+    logged); zlib blobs stay readable once zstandard is installed. A SQLite index keeps every response by URL and
+    fetch time with its status, content type and validators (ETag,
+    Last-Modified), so analyzers can re-run against the archive instead of
+    the network and fetches can revalidate with conditional requests.
+    Blob reads are memory-mapped. `prune` applies the retention limits:
+    maximum age, versions per URL and total compressed size.
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = None, max_age_days: float = None,
+                 max_versions: int = None, level: int = None):
+        self.root = root or archive_config.ARCHIVE_DIR
+        self.max_bytes = max_bytes or archive_config.ARCHIVE_MAX_BYTES
+        self.max_age_days = max_age_days or archive_config.ARCHIVE_MAX_AGE_DAYS
+        self.max_versions = max_versions or archive_config.ARCHIVE_MAX_VERSIONS
+        self.level = level or archive_config.ARCHIVE_COMPRESSION_LEVEL
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Каталог і індекс створюються при першому зверненні, не при імпорті
+        if self._conn is None:
+            os.makedirs(os.path.join(self.root, "blobs"), exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.root, "index.db"), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " digest TEXT PRIMARY KEY, size INTEGER NOT NULL, stored_size INTEGER NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, final_url TEXT,"
+                " fetched_at TEXT NOT NULL, checked_at TEXT NOT NULL, status_code INTEGER,"
+                " content_type TEXT, etag TEXT, last_modified TEXT, digest TEXT NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS responses_url ON responses (url, fetched_at);"
+                "CREATE INDEX IF NOT EXISTS responses_fetched ON responses (fetched_at);"
+                "CREATE INDEX IF NOT EXISTS responses_digest ON responses (digest);"
+            )
+            self._conn = conn
+            if zstandard is None:
+                logger.warning("zstandard is not installed, page archive falls back to zlib")
+        return self._conn
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _compress(self, content: bytes) -> bytes:
+        if zstandard is not None:
+            return CODEC_ZSTD + zstandard.ZstdCompressor(level=self.level).compress(content)
+        return CODEC_ZLIB + zlib.compress(content, min(self.level, 9))
+
+    @staticmethod
+    def _decompress(buffer) -> bytes:
+        codec, body = bytes(buffer[:HEADER_SIZE]), buffer[HEADER_SIZE:]
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Archive blob is zstd-compressed but zstandard is not installed")
+            return zstandard.ZstdDecompressor().decompress(body)
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(body)
+        raise ValueError(f"Unknown archive blob codec: {codec!r}")
+
+    def read_blob(self, digest: str) -> bytes:
+        """Вміст блоба; файл відображається в пам'ять, а не читається в буфер."""
+        with open(self._blob_path(digest), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    return self._decompress(view)
+                finally:
+                    view.release()
+
+    def _write_blob(self, digest: str, content: bytes, data: Optional[bytes] = None) -> int:
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if data is None:
+            data = self._compress(content)
+        # Пишемо у тимчасовий файл і перейменовуємо - читач не побачить неповного блоба
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def put(self, url: str, content: bytes, status_code: int = 200, headers: Optional[Dict] = None,
+            final_url: Optional[str] = None, fetched_at: Optional[datetime] = None) -> str:
+        """Зберігає відповідь; повертає sha256 вмісту."""
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        digest = hashlib.sha256(content).hexdigest()
+        # Стискаємо поза блокуванням; запис блоба й індексу - під ним, щоб prune
+        # не видалив блоб між записом і вставкою відповіді
+        data = None if os.path.exists(self._blob_path(digest)) else self._compress(content)
+        fetched = (fetched_at or datetime.utcnow()).isoformat()
+        with self._lock:
+            conn = self._db()
+            stored_size = self._write_blob(digest, content, data)
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO blobs (digest, size, stored_size) VALUES (?, ?, ?)",
+                             (digest, len(content), stored_size))
+                conn.execute(
+                    "INSERT INTO responses (url, final_url, fetched_at, checked_at, status_code,"
+                    " content_type, etag, last_modified, digest) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, final_url or url, fetched, fetched, status_code, headers.get("content-type"),
+                     headers.get("etag"), headers.get("last-modified"), digest))
+                # Лишаємо max_versions останніх версій URL
+                conn.execute(
+                    "DELETE FROM responses WHERE url = ? AND id NOT IN ("
+                    " SELECT id FROM responses WHERE url = ? ORDER BY fetched_at DESC, id DESC LIMIT ?)",
+                    (url, url, self.max_versions))
+        return digest
+
+    def latest(self, url: str, at: Optional[datetime] = None) -> Optional[Dict]:
+        """Остання збережена відповідь для URL (на момент `at`) без вмісту."""
+        with self._lock:
+            query = "SELECT * FROM responses WHERE url = ?"
+            params = [url]
+            if at is not None:
+                query += " AND fetched_at <= ?"
+                params.append(at.isoformat())
+            row = self._db().execute(query + " ORDER BY fetched_at DESC, id DESC LIMIT 1", params).fetchone()
+        return dict(row) if row else None
+
+    def get(self, url: str, at: Optional[datetime] = None) -> Optional[Dict]:
+        """Остання збережена відповідь разом з вмістом (`content`, bytes)."""
+        record = self.latest(url, at)
+        if record is None:
+            return None
+        try:
+            record["content"] = self.read_blob(record["digest"])
+        except FileNotFoundError:
+            logger.warning(f"Archive blob {record['digest']} for {url} is missing")
+            return None
+        return record
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since з останньої збереженої відповіді."""
+        record = self.latest(url)
+        headers = {}
+        if record and record["status_code"] == 200:
+            if record["etag"]:
+                headers["If-None-Match"] = record["etag"]
+            if record["last_modified"]:
+                headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def revalidated(self, url: str, checked_at: Optional[datetime] = None) -> None:
+        """Сервер відповів 304: збережена версія актуальна."""
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute(
+                    "UPDATE responses SET checked_at = ? WHERE id = ("
+                    " SELECT id FROM responses WHERE url = ? ORDER BY fetched_at DESC, id DESC LIMIT 1)",
+                    ((checked_at or datetime.utcnow()).isoformat(), url))
+
+    def _remove_orphans(self, conn: sqlite3.Connection) -> int:
+        orphans = [row["digest"] for row in conn.execute(
+            "SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM responses)")]
+        for digest in orphans:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+        conn.executemany("DELETE FROM blobs WHERE digest = ?", [(digest,) for digest in orphans])
+        return len(orphans)
+
+    def prune(self, batch: int = 500) -> Dict:
+        """Видаляє застарілі відповіді, потім найстаріші понад ліміт розміру, та непотрібні блоби."""
+        cutoff = (datetime.utcnow() - timedelta(days=self.max_age_days)).isoformat()
+        with self._lock:
+            conn = self._db()
+            with conn:
+                expired = conn.execute("DELETE FROM responses WHERE checked_at < ?", (cutoff,)).rowcount
+                removed = self._remove_orphans(conn)
+                evicted = 0
+                while (conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+                       > self.max_bytes):
+                    deleted = conn.execute(
+                        "DELETE FROM responses WHERE id IN ("
+                        " SELECT id FROM responses ORDER BY checked_at LIMIT ?)", (batch,)).rowcount
+                    removed += self._remove_orphans(conn)
+                    evicted += deleted
+                    if not deleted:
+                        break
+        result = {"expired": expired, "evicted": evicted, "blobs_removed": removed}
+        logger.info(f"Page archive pruned: {result}")
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            conn = self._db()
+            responses, urls = conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM responses").fetchone()
+            blobs, size, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()
+        return {"responses": responses, "urls": urls, "blobs": blobs, "bytes": size, "stored_bytes": stored,
+                "codec": "zstd" if zstandard is not None else "zlib"}
+
+page_archive = PageArchive()
+
+def archived_content(url: str) -> Optional[bytes]:
+    """Вміст збереженої сторінки (HTTP 200) або None: архів вимкнено, сторінки немає чи не читається."""
+    if not archive_config.ARCHIVE_ENABLED:
+        return None
+    try:
+        record = page_archive.get(url)
+    except Exception as e:
+        logger.warning(f"Archive read for {url} failed: {str(e)}")
+        return None
+    record_cache("page_archive", record is not None)
+    return record["content"] if record and record["status_code"] == 200 else None
@@ -0,0 +1,92 @@
+import logging
+import re
+from typing import Dict, Optional, Tuple
+from ..config.metadata_config import metadata_config
+from .fetch_scheduler import fetch_scheduler
+from .html_analysis import parse_head
+from .language_id import language_identifier
+from .metrics import PAGE_BYTES, track_stage
+
+logger = logging.getLogger(__name__)
+
+# Кінець <head>: закриваючий тег або початок <body> (коли </head> пропущено)
+_HEAD_END_RE = re.compile(rb"</head\s*>|<body[\s>]", re.IGNORECASE)
+_HEADER_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+class HeadParseError(Exception):
+    """<head> отримано, але розібрати його не вдалося."""
+
+class MetadataFetcher:
+    """Reads site metadata from the page <head> only.
+
+    The response is streamed and the connection is dropped as soon as
+    </head> (or <body>) arrives or `max_bytes` have been read, so a site
+    costs a few kilobytes and an HTMLParser pass instead of a full page
+    download and newspaper3k article extraction.
+    """
+
+    def __init__(self, max_bytes: int = None, chunk_size: int = None):
+        self.max_bytes = max_bytes or metadata_config.METADATA_MAX_BYTES
+        self.chunk_size = chunk_size or metadata_config.METADATA_CHUNK_SIZE
+
+    def _charset(self, content_type: str, head: bytes) -> str:
+        match = _HEADER_CHARSET_RE.search(content_type or '') or _META_CHARSET_RE.search(head[:4096])
+        if match:
+            charset = match.group(1)
+            return charset.decode('ascii', 'ignore') if isinstance(charset, bytes) else charset
+        return 'utf-8'
+
+    def _read_head(self, response) -> Tuple[bytes, int, bool]:
+        """Повертає (байти до кінця <head>, прочитано байтів, чи знайдено кінець)."""
+        buffer = bytearray()
+        received = 0
+        for chunk in response.iter_content(self.chunk_size):
+            # Тег може бути розрізаний між чанками - шукаємо з невеликим перекриттям
+            start = max(len(buffer) - 16, 0)
+            buffer += chunk
+            received += len(chunk)
+            match = _HEAD_END_RE.search(buffer, start)
+            if match:
+                return bytes(buffer[:match.start()]), received, True
+            if len(buffer) >= self.max_bytes:
+                return bytes(buffer[:self.max_bytes]), received, False
+        return bytes(buffer), received, False
+
+    def fetch(self, url: str) -> Optional[Dict]:
+        """Метадані сторінки або None, якщо її не вдалося отримати як HTML.
+
+        FetchDisallowed - заборонено robots.txt, HeadParseError - <head> не розібрано.
+        """
+        with track_stage("metadata_fetch"):
+            response = fetch_scheduler.fetch(url, stream=True, headers={'Accept': 'text/html,application/xhtml+xml'})
+            try:
+                content_type = response.headers.get('Content-Type', '')
+                if response.status_code >= 400 or (content_type and 'html' not in content_type.lower()):
+                    logger.debug(f"No HTML head for {url}: {response.status_code} {content_type}")
+                    return None
+                head, received, complete = self._read_head(response)
+                final_url = response.url or url
+            finally:
+                response.close()
+
+            PAGE_BYTES.inc(received, fetcher="head")
+            charset = self._charset(content_type, head)
+            try:
+                html = head.decode(charset, errors='replace')
+            except LookupError:
+                html = head.decode('utf-8', errors='replace')
+            try:
+                metadata = parse_head(html, final_url)
+            except Exception as e:
+                raise HeadParseError(f"Failed to parse head of {url}: {str(e)}") from e
+            # <html lang> часто лишають "en" або не вказують - мову визначаємо за текстом
+            metadata['declared_language'] = metadata['language']
+            metadata['language'] = language_identifier.resolve(
+                ' '.join(filter(None, (metadata['title'], metadata['description']))),
+                metadata['declared_language'], metadata_config.LANGUAGE_MIN_CONFIDENCE)
+
+        metadata.update({'url': url, 'final_url': final_url, 'bytes': received, 'head_complete': complete})
+        return metadata
+
+metadata_fetcher = MetadataFetcher()
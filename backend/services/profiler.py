@@ -0,0 +1,222 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class RequestProfile:
+    """Per-request stage breakdown: wall and CPU time for every stage.
+
+    Stages executed on the event loop thread are accounted separately as
+    `loop_blocked` - sync Selenium / requests calls there stall every
+    other request served by the process. Threads working for the request
+    (thread pool and executor workers, see `in_profile` / `submit`) are
+    tracked so the sampler can follow the request off the loop thread.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._threads: Dict[int, List] = {}
+        self._lock = threading.Lock()
+
+    def enter_thread(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            entry = self._threads.setdefault(ident, [0, threading.current_thread().name])
+            entry[0] += 1
+
+    def exit_thread(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            entry = self._threads.get(ident)
+            if entry is not None:
+                entry[0] -= 1
+                if entry[0] <= 0:
+                    del self._threads[ident]
+
+    def threads(self) -> Dict[int, str]:
+        """Потоки, що зараз працюють на запит: {ident: назва}."""
+        with self._lock:
+            return {ident: name for ident, (_, name) in self._threads.items()}
+
+    def record(self, stage: str, wall: float, cpu: float, on_loop: bool) -> None:
+        with self._lock:
+            stats = self.stages.setdefault(stage, {"count": 0, "wall": 0.0, "cpu": 0.0, "loop_blocked": 0.0})
+            stats["count"] += 1
+            stats["wall"] += wall
+            stats["cpu"] += cpu
+            if on_loop:
+                stats["loop_blocked"] += wall
+
+    def summary(self) -> Dict:
+        return {
+            "name": self.name,
+            "wall": round(time.perf_counter() - self.started, 4),
+            "cpu": round(time.process_time() - self.cpu_started, 4),
+            "stages": {stage: {k: round(v, 4) for k, v in stats.items()}
+                       for stage, stats in sorted(self.stages.items(), key=lambda item: -item[1]["wall"])},
+        }
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+def record_stage(stage: str, wall: float, cpu: float, blocking: bool = True) -> None:
+    """Hook for metrics.track_stage; no-op unless the request is profiled.
+
+    A blocking (sync) stage that ran on a thread with a running event loop
+    is counted as loop-blocked time.
+    """
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(stage, wall, cpu, on_loop=blocking and asyncio._get_running_loop() is not None)
+
+def in_profile(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Calls `fn`, counting the current thread into the active profile.
+
+    For work handed to another thread (run_in_threadpool, executors) that
+    runs with the request's context; without a profile it is a plain call.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return fn(*args, **kwargs)
+    profile.enter_thread()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profile.exit_thread()
+
+def submit(executor, fn: Callable[..., T], *args, **kwargs):
+    """executor.submit that keeps the caller's context in the worker.
+
+    The worker sees the request profile, so `record_stage` still records
+    stages and the sampler follows the worker thread.
+    """
+    return executor.submit(contextvars.copy_context().run, in_profile, fn, *args, **kwargs)
+
+class SamplingProfiler:
+    """Samples the stacks of the request's threads every `interval` seconds.
+
+    The threads are the one that started profiling plus every thread the
+    profile currently tracks (see RequestProfile.threads). Output is a
+    speedscope file with one "sampled" profile per thread
+    (https://www.speedscope.app).
+    """
+
+    def __init__(self, profile: RequestProfile, thread_id: int, interval: float = 0.005):
+        self.profile = profile
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames: List[Dict] = []
+        self._frame_index: Dict[Tuple, int] = {}
+        # ident потоку -> (назва, стеки, ваги)
+        self.threads: Dict[int, Tuple[str, List[List[int]], List[float]]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _stack(self, frame) -> List[int]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self._frame_index.get(key)
+            if index is None:
+                index = self._frame_index[key] = len(self.frames)
+                self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            threads = self.profile.threads()
+            threads.setdefault(self.thread_id, "request")
+            for ident, name in threads.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                _, samples, weights = self.threads.setdefault(ident, (name, [], []))
+                samples.append(self._stack(frame))
+                weights.append(now - last)
+            last = now
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def to_speedscope(self, name: str) -> Dict:
+        # Спершу потік запиту, далі робочі потоки за кількістю зразків
+        ordered = sorted(self.threads.items(), key=lambda item: (item[0] != self.thread_id, -len(item[1][1])))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "sm_parse",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{name} [{thread_name}]",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            } for _, (thread_name, samples, weights) in ordered],
+        }
+
+@contextmanager
+def profile_request(name: str, output_dir: str, interval: float = 0.005):
+    """Profiles the request's threads and the stages recorded while active.
+
+    Writes `<output_dir>/<timestamp>-<name>.speedscope.json` and logs the
+    per-stage wall/CPU breakdown. Yields the RequestProfile; its
+    `output_path` attribute is set on exit.
+    """
+    profile = RequestProfile(name)
+    sampler = SamplingProfiler(profile, threading.get_ident(), interval)
+    token = _current_profile.set(profile)
+    sampler.start()
+    try:
+        yield profile
+    finally:
+        sampler.stop()
+        _current_profile.reset(token)
+        os.makedirs(output_dir, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "request"
+        base = os.path.join(output_dir, f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}-{safe_name}")
+        summary = profile.summary()
+        try:
+            with open(f"{base}.speedscope.json", "w") as f:
+                json.dump(sampler.to_speedscope(name), f)
+            with open(f"{base}.stages.json", "w") as f:
+                json.dump(summary, f, indent=2)
+            profile.output_path = f"{base}.speedscope.json"
+        except OSError as e:
+            logger.error(f"Failed to write profile for {name}: {str(e)}")
+            profile.output_path = None
+
+        lines = [f"Profile {name}: wall {summary['wall']}s, cpu {summary['cpu']}s"]
+        for stage, stats in summary["stages"].items():
+            lines.append(f"  {stage:20} x{stats['count']:<4} wall {stats['wall']:.3f}s "
+                         f"cpu {stats['cpu']:.3f}s loop-blocked {stats['loop_blocked']:.3f}s")
+        logger.info("\n".join(lines))
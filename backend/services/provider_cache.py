@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from ..config.cache_config import cache_config
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """"Новини  Київ " і "новини київ" - один і той самий запит."""
+    return " ".join(unicodedata.normalize("NFC", query or "").lower().split())
+
+class ProviderCache:
+    """Cache of search provider results (DuckDuckGo, Google News RSS).
+
+    Keys are (provider, normalized query, sorted provider params). A fresh
+    entry is returned as is. In stale-while-revalidate mode an expired
+    entry within `max_stale` is returned too and one background refresh is
+    scheduled for it; older entries are fetched synchronously. A failed
+    synchronous fetch falls back to whatever stale value is still held.
+
+    Results that fail `valid` (by default: empty) and None are negative:
+    they are kept for `negative_ttl` only, never served stale and never
+    replace a good entry, so an empty page or a feed that failed to parse
+    is retried soon instead of hiding results for the whole TTL.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_stale: float = 3600.0,
+                 stale_while_revalidate: bool = True, max_entries: int = 5000,
+                 refresh_workers: int = 2, negative_ttl: float = 30.0):
+        self.ttls = ttls
+        self.negative_ttl = negative_ttl
+        self.max_stale = max_stale
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_entries = max_entries
+        # ключ -> (значення, час отримання, чи валідне)
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float, bool]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="provider-cache")
+
+    def key(self, provider: str, query: str, params: Optional[Dict] = None) -> Tuple:
+        return (provider, normalize_query(query), tuple(sorted((params or {}).items())))
+
+    def _store(self, key: Tuple, value: Any, ok: bool) -> None:
+        if not ok and (value is None or self.negative_ttl <= 0):
+            return
+        with self._lock:
+            current = self._entries.get(key)
+            if not ok and current is not None and current[2]:
+                # Порожня відповідь не витісняє попередній добрий результат
+                return
+            self._entries[key] = (value, time.monotonic(), ok)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _refresh(self, key: Tuple, fetch: Callable[[], Any], valid: Callable[[Any], bool]) -> None:
+        try:
+            value = fetch()
+            self._store(key, value, value is not None and valid(value))
+        except Exception as e:
+            logger.warning(f"Background refresh of {key[0]} '{key[1]}' failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, provider: str, query: str, params: Optional[Dict], fetch: Callable[[], Any],
+            valid: Callable[[Any], bool] = bool) -> Any:
+        """Результат провайдера з кешу або через `fetch()`."""
+        key = self.key(provider, query, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            value, fetched_at, ok = entry
+            ttl = self.ttls.get(provider, 0.0) if ok else self.negative_ttl
+            age = time.monotonic() - fetched_at
+            if age < ttl:
+                CACHE_REQUESTS.inc(cache=f"provider_{provider}", result="hit" if ok else "negative_hit")
+                return value
+            if not ok:
+                entry = None
+            elif self.stale_while_revalidate and age < ttl + self.max_stale:
+                CACHE_REQUESTS.inc(cache=f"provider_{provider}", result="stale")
+                with self._lock:
+                    schedule = key not in self._refreshing
+                    self._refreshing.add(key)
+                if schedule:
+                    self._executor.submit(self._refresh, key, fetch, valid)
+                return value
+
+        CACHE_REQUESTS.inc(cache=f"provider_{provider}", result="miss")
+        try:
+            value = fetch()
+        except Exception:
+            if entry is not None:
+                logger.warning(f"{provider} failed for '{key[1]}', serving stale results")
+                return entry[0]
+            raise
+        ok = value is not None and valid(value)
+        self._store(key, value, ok)
+        if not ok and entry is not None:
+            # Провайдер повернув порожнє - віддаємо збережений добрий результат
+            logger.warning(f"{provider} returned no results for '{key[1]}', serving stale results")
+            return entry[0]
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+provider_cache = ProviderCache(
+    cache_config.PROVIDER_CACHE_TTL,
+    max_stale=cache_config.PROVIDER_CACHE_MAX_STALE,
+    stale_while_revalidate=cache_config.PROVIDER_CACHE_SWR,
+    max_entries=cache_config.PROVIDER_CACHE_MAX_ENTRIES,
+    negative_ttl=cache_config.PROVIDER_CACHE_NEGATIVE_TTL,
+)
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import httpx
+from ..config.archive_config import archive_config
+from .fetch_scheduler import fetch_scheduler
+from .html_analysis import analyze_page
+from .metrics import record_cache
+from .page_archive import PageArchive, page_archive
+from .storage_service import SourceStorage, source_storage
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+def _normalize_url(url: str) -> str:
+    url = str(url or "").strip()
+    if url and "://" not in url:
+        url = f"https://{url}"
+    return url
+
+class ReanalysisService:
+    """Bulk re-analysis of known_sources.
+
+    Pages are fetched concurrently with async I/O, HTML scoring runs in a
+    process pool, results go to `source_analysis` with one bulk upsert per
+    batch. After every batch the run checkpoint is saved to
+    `reanalysis_runs`, so an interrupted run can be resumed. The checkpoint
+    is the `_id` of the last source of the batch and sources are read in
+    `_id` order, so inserts and deletes in known_sources between batches or
+    before a resume neither skip nor repeat sources.
+
+    Fetched pages are kept in the page archive and revalidated with
+    conditional requests on the next run; a run started with
+    `from_archive` scores the archived pages without any network access.
+    """
+
+    def __init__(self, storage: Optional[SourceStorage] = None, batch_size: int = 200,
+                 concurrency: int = 32, processes: Optional[int] = None, timeout: float = 15.0,
+                 archive: Optional[PageArchive] = None):
+        self.storage = storage or source_storage
+        self.archive = archive or (page_archive if archive_config.ARCHIVE_ENABLED else None)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.processes = processes or os.cpu_count() or 1
+        self.timeout = timeout
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._speed: Dict[str, float] = {}
+
+    async def _load_run(self, run_id: str) -> Optional[Dict]:
+        return await self.storage.find_one("reanalysis_runs", run_id)
+
+    async def _save_run(self, run: Dict) -> None:
+        run["updated_at"] = datetime.utcnow()
+        await self.storage.upsert_many("reanalysis_runs", [run])
+
+    async def get_progress(self, run_id: str) -> Optional[Dict]:
+        """Стан запуску: оброблено, всього, швидкість та ETA."""
+        run = await self._load_run(run_id)
+        if not run:
+            return None
+        speed = self._speed.get(run_id, 0.0)
+        remaining = max(run.get("total", 0) - run.get("scanned", 0), 0)
+        run["sources_per_sec"] = round(speed, 2)
+        run["eta_seconds"] = round(remaining / speed) if speed else None
+        return run
+
+    async def start(self, resume_run_id: Optional[str] = None, from_archive: bool = False) -> Dict:
+        """Запускає (або продовжує) перевірку у фоновій задачі."""
+        run = await self._prepare_run(resume_run_id, from_archive)
+        task = self.tasks.get(run["run_id"])
+        if task and not task.done():
+            return run
+        self.tasks[run["run_id"]] = asyncio.create_task(self._execute(run))
+        return run
+
+    async def run(self, resume_run_id: Optional[str] = None, from_archive: bool = False) -> Dict:
+        """Виконує перевірку до кінця (для CLI)."""
+        run = await self._prepare_run(resume_run_id, from_archive)
+        await self._execute(run)
+        return await self.get_progress(run["run_id"])
+
+    async def _prepare_run(self, resume_run_id: Optional[str], from_archive: bool = False) -> Dict:
+        if resume_run_id:
+            run = await self._load_run(resume_run_id)
+            if not run:
+                raise ValueError(f"Unknown reanalysis run: {resume_run_id}")
+            if run.get("status") == "completed":
+                return run
+            run.pop("_id", None)
+        else:
+            run = {
+                "run_id": uuid.uuid4().hex,
+                "cursor": None,
+                "scanned": 0,
+                "processed": 0,
+                "failed": 0,
+                # Продовжений запуск читає сторінки з того ж джерела
+                "pages_from": "archive" if from_archive else "network",
+                "started_at": datetime.utcnow(),
+            }
+        if run.get("pages_from") == "archive" and self.archive is None:
+            raise ValueError("Page archive is disabled")
+        run["status"] = "running"
+        run["total"] = await self.storage.count("known_sources")
+        await self._save_run(run)
+        return run
+
+    @staticmethod
+    def _archived_page(url: str, record: Dict) -> Dict:
+        return {"url": url, "final_url": record["final_url"], "status_code": record["status_code"],
+                "html": record["content"], "fetched_at": record["fetched_at"]}
+
+    async def _read_archive(self, url: str) -> Dict:
+        """Сторінка з архіву замість мережі."""
+        try:
+            record = await asyncio.to_thread(self.archive.get, url)
+        except Exception as e:
+            return {"url": url, "error": f"archive read failed: {str(e)}"}
+        record_cache("page_archive", record is not None)
+        if record is None:
+            return {"url": url, "error": "not archived"}
+        return self._archived_page(url, record)
+
+    async def _fetch(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str) -> Dict:
+        async with semaphore:
+            try:
+                # Умовний запит: якщо сторінка не змінилась, сервер відповість 304
+                headers = await asyncio.to_thread(self.archive.conditional_headers, url) if self.archive else {}
+                response = await fetch_scheduler.afetch(client, url, headers=headers)
+                if response.status_code == 304 and headers:
+                    record = await asyncio.to_thread(self.archive.get, url)
+                    if record is not None:
+                        record_cache("page_archive", True)
+                        await asyncio.to_thread(self.archive.revalidated, url)
+                        return self._archived_page(url, record)
+                    # Блоб зник - перезавантажуємо без умов
+                    response = await fetch_scheduler.afetch(client, url)
+                if self.archive is not None:
+                    if headers:
+                        record_cache("page_archive", False)
+                    if response.status_code == 200:
+                        await asyncio.to_thread(self.archive.put, url, response.content, response.status_code,
+                                                dict(response.headers), str(response.url))
+                return {"url": url, "final_url": str(response.url),
+                        "status_code": response.status_code, "html": response.text}
+            except Exception as e:
+                return {"url": url, "error": str(e)}
+
+    async def _analyze_batch(self, sources: List[Dict], client: Optional[httpx.AsyncClient],
+                             semaphore: asyncio.Semaphore, pool: ProcessPoolExecutor) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        urls = [_normalize_url(source.get("url")) for source in sources]
+        if client is None:
+            pages = await asyncio.gather(*(self._read_archive(url) for url in urls if url))
+        else:
+            pages = await asyncio.gather(*(self._fetch(client, semaphore, url) for url in urls if url))
+
+        # CPU-частину (розбір і оцінку HTML) виконуємо в пулі процесів
+        futures = [
+            loop.run_in_executor(pool, analyze_page, page.get("final_url", page["url"]), page["html"])
+            if page.get("html") else None
+            for page in pages
+        ]
+        scored = await asyncio.gather(*(f for f in futures if f is not None), return_exceptions=True)
+        scored_iter = iter(scored)
+
+        source_ids = {_normalize_url(source.get("url")): source.get("_id") for source in sources}
+        analyzed_at = datetime.utcnow()
+        results = []
+        for page, future in zip(pages, futures):
+            doc = {
+                "url": page["url"],
+                "source_id": source_ids.get(page["url"]),
+                "final_url": page.get("final_url"),
+                "status_code": page.get("status_code"),
+                "is_active": page.get("status_code") is not None and page["status_code"] < 400,
+                "analyzed_at": analyzed_at,
+                # Для сторінок з архіву - коли їх було завантажено
+                "fetched_at": page.get("fetched_at"),
+            }
+            analysis = next(scored_iter) if future is not None else None
+            if isinstance(analysis, dict):
+                doc.update(analysis)
+            else:
+                doc["error"] = page.get("error") or (str(analysis) if analysis else None)
+            results.append(doc)
+        return results
+
+    async def _execute(self, run: Dict) -> None:
+        run_id = run["run_id"]
+        started = time.monotonic()
+        processed_now = 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency)
+        pool = ProcessPoolExecutor(max_workers=self.processes,
+                                   mp_context=multiprocessing.get_context("spawn"))
+        from_archive = run.get("pages_from") == "archive"
+        try:
+            async with httpx.AsyncClient(headers=HEADERS, timeout=self.timeout, limits=limits,
+                                         follow_redirects=True, verify=False) as http_client:
+                # З архіву сторінки читаються без мережі
+                client = None if from_archive else http_client
+                while True:
+                    sources = await self.storage.list_after("known_sources", run.get("cursor"),
+                                                            limit=self.batch_size)
+                    if not sources:
+                        break
+
+                    results = await self._analyze_batch(sources, client, semaphore, pool)
+                    await self.storage.upsert_many("source_analysis", results)
+
+                    # Чекпоінт після кожного пакета
+                    run["cursor"] = sources[-1]["_id"]
+                    run["scanned"] = run.get("scanned", 0) + len(sources)
+                    run["processed"] += len(results)
+                    run["failed"] += sum(1 for doc in results if doc.get("error"))
+                    processed_now += len(sources)
+                    self._speed[run_id] = processed_now / max(time.monotonic() - started, 1e-6)
+                    await self._save_run(run)
+                    logger.info(f"Reanalysis {run_id}: {run['scanned']}/{run['total']} "
+                                f"({self._speed[run_id]:.1f} sources/sec)")
+
+            run["status"] = "completed"
+            run["finished_at"] = datetime.utcnow()
+            if self.archive is not None and not from_archive:
+                await asyncio.to_thread(self.archive.prune)
+        except asyncio.CancelledError:
+            run["status"] = "interrupted"
+            raise
+        except Exception as e:
+            logger.error(f"Reanalysis {run_id} failed: {str(e)}")
+            run["status"] = "failed"
+            run["error"] = str(e)
+        finally:
+            pool.shutdown(cancel_futures=True)
+            await self._save_run(run)
+
+reanalysis_service = ReanalysisService()
@@ -1,21 +1,37 @@
 import os
 import logging
 from typing import List, Dict, Optional
-import requests
-from bs4 import BeautifulSoup
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 import feedparser
-from urllib.parse import urlparse, quote, unquote
-import json
+from urllib.parse import quote
 import concurrent.futures
-import time
+import threading
 import urllib3
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
 from newspaper import Article
 from duckduckgo_search import DDGS
+from ..config.archive_config import archive_config
+from ..config.classifier_config import classifier_config
+from ..config.liveness_config import liveness_config
+from ..config.metadata_config import metadata_config
+from .browser_pool import get_browser_pool
+from .deadline import NO_DEADLINE, Deadline, DeadlineExceeded
+from .discovery_state import DiscoveryState
 from .domain_service import domain_analyzer
+from .domain_normalizer import domain_normalizer
+from .html_analysis import is_news_page
+from .fetch_scheduler import fetch_scheduler
+from .liveness import liveness_checker
+from .llm_client import llm_client
+from .media_classifier import llm_labels, media_classifier, site_name
+from .page_archive import archived_content, page_archive
+from .page_metadata import HeadParseError, metadata_fetcher
+from .profiler import submit
+from .provider_cache import normalize_query, provider_cache
+from .single_flight import SingleFlight
+from .source_matcher import source_matcher
+from .story_clustering import cluster as cluster_stories, strip_publisher
+from .metrics import CLASSIFIER_DECISIONS, DUPLICATES_SKIPPED, KNOWN_SOURCES_SKIPPED, PAGE_BYTES, record_cache, track_stage
 
 # Вимикаємо попередження про незахищені HTTPS запити
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -24,36 +40,92 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class SearchService:
+def _entry_published(entry) -> Optional[datetime]:
+    published = entry.get('published_parsed')
+    return datetime(*published[:6]) if published else None
+
+class SearchBatchState:
+    """Shared state of a multi-query search batch.
+
+    Regional queries overlap heavily: the same Google News links and
+    article URLs show up for many of them. Resolved links and per-URL
+    analyses are cached here so that work happens once per batch, and
+    `domains` records which queries found each domain (first one first).
+    Cache entries are futures: a query that needs a key another query is
+    still computing waits for that result instead of computing it again.
+    """
+
     def __init__(self):
-        self.driver = None
-        self.setup_driver()
-        self.domain_cache = {}  # Кеш для результатів аналізу доменів
+        self.lock = threading.Lock()
+        self.resolved: Dict[str, concurrent.futures.Future] = {}
+        self.analyses: Dict[str, concurrent.futures.Future] = {}
+        self.domains: Dict[str, List[str]] = {}
 
-    def setup_driver(self):
+    def cached(self, cache: Dict, name: str, key: str, compute):
+        with self.lock:
+            future = cache.get(key)
+            hit = future is not None
+            if not hit:
+                future = cache[key] = concurrent.futures.Future()
+        record_cache(name, hit)
+        if hit:
+            return future.result()
         try:
-            options = uc.ChromeOptions()
-            options.add_argument('--headless')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--window-size=1920,1080')
-            options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            self.driver = uc.Chrome(options=options)
-            self.driver.set_page_load_timeout(30)
-            logging.info("WebDriver initialized successfully")
-        except Exception as e:
-            logging.error(f"Failed to initialize WebDriver: {str(e)}")
-            self.driver = None
+            value = compute(key)
+        except BaseException as e:
+            # Помилку не кешуємо: наступний запит пакета спробує ще раз
+            with self.lock:
+                cache.pop(key, None)
+            future.set_exception(e)
+            raise
+        future.set_result(value)
+        return value
 
-    def __del__(self):
-        if self.driver:
-            try:
-                self.driver.quit()
-                logging.info("WebDriver closed successfully")
-            except Exception as e:
-                logging.error(f"Error closing WebDriver: {str(e)}")
+    def claim(self, domain: str, query: str) -> bool:
+        """Записує, що запит знайшов домен; True якщо він перший у пакеті."""
+        with self.lock:
+            queries = self.domains.setdefault(domain, [])
+            if query not in queries:
+                queries.append(query)
+            return queries[0] == query
+
+    def overlap_stats(self, queries: List[str], grouped: Dict[str, List[Dict]]) -> Dict:
+        total = sum(len(results) for results in grouped.values())
+        shared = sorted(((domain, found_by) for domain, found_by in self.domains.items() if len(found_by) > 1),
+                        key=lambda item: (-len(item[1]), item[0]))
+        exclusive = {query: 0 for query in queries}
+        for found_by in self.domains.values():
+            if len(found_by) == 1:
+                exclusive[found_by[0]] += 1
+        return {
+            'total_results': total,
+            'unique_domains': len(self.domains),
+            'duplicate_ratio': round(1 - len(self.domains) / total, 3) if total else 0.0,
+            'exclusive_domains': exclusive,
+            'shared_domains': [{'domain': domain, 'queries': found_by} for domain, found_by in shared],
+        }
+
+class SearchService:
+    # Параметри DuckDuckGo та Google News входять у ключ кешу провайдера
+    DDG_PARAMS = {'region': 'ua', 'safesearch': 'off', 'timelimit': 'm'}
+    GOOGLE_NEWS_PARAMS = {'hl': 'uk', 'gl': 'UA', 'ceid': 'UA:uk'}
+
+    def __init__(self, use_browser: Optional[bool] = None):
+        # Глобальний бюджет одночасних запитів для всіх пакетних пошуків
+        self._batch_slots = threading.BoundedSemaphore(int(os.getenv("SEARCH_BATCH_CONCURRENCY", "8")))
+        # USE_BROWSER=0 вимикає Chrome: посилання розкриваються HTTP-редиректами.
+        # Chrome працює в окремих процесах пулу браузерів (запускається при першому запиті)
+        self.use_browser = os.getenv("USE_BROWSER", "1") != "0" if use_browser is None else use_browser
+        self.domain_cache = {}  # Кеш для результатів аналізу доменів
+        self.local_classifications = {}  # Локальний класифікатор для доменів знайдених URL
+        self.google_news_url = os.getenv("GOOGLE_NEWS_RSS_URL", "https://news.google.com/rss/search")
+        # Провайдер DuckDuckGo: (query, max_results) -> [{'title', 'href', 'body'}]
+        self.ddg_backend = self.ddgs_text
+        # Однакові одночасні пошуки, розкриття посилань та аналізи виконуються один раз
+        self._search_flight = SingleFlight("search")
+        self._resolve_flight = SingleFlight("resolve")
+        self._url_analysis_flight = SingleFlight("url_analysis")
+        self._domain_analysis_flight = SingleFlight("domain_analysis")
 
     def extract_domain(self, url: str) -> str:
         """Extract domain from URL."""
@@ -68,61 +140,35 @@ class SearchService:
         return text.strip()
 
     def is_news_website(self, url, content=None):
-        score = 0
-        
-        # URL-based checks
-        news_indicators = ['news', 'article', 'story', 'press', 'media', 'journal']
-        url_lower = url.lower()
-        for indicator in news_indicators:
-            if indicator in url_lower:
-                score += 1
-
-        # Content-based checks if available
-        if content:
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Check for article tags
-            if soup.find('article'):
-                score += 2
-            
-            # Check for publication date
-            date_patterns = ['date', 'published', 'time', 'posted']
-            for pattern in date_patterns:
-                if soup.find(attrs={'class': lambda x: x and pattern in x.lower() if x else False}):
-                    score += 1
-            
-            # Check for social media sharing buttons
-            social_patterns = ['share', 'twitter', 'facebook', 'linkedin']
-            for pattern in social_patterns:
-                if soup.find(attrs={'class': lambda x: x and pattern in x.lower() if x else False}):
-                    score += 1
+        # Без переданого вмісту - сторінка з архіву, якщо її вже завантажували
+        if content is None:
+            content = archived_content(url)
+        return is_news_page(url, content)
 
-        return score >= 3
+    def resolve_redirects(self, url):
+        """Розкриває посилання через HTTP-редиректи (без браузера)."""
+        try:
+            with track_stage("http_resolve"):
+                response = fetch_scheduler.fetch(url, respect_robots=False, allow_redirects=True,
+                                                 stream=True, timeout=10)
+                response.close()
+                return response.url
+        except Exception as e:
+            logger.error(f"Error resolving redirects for {url}: {str(e)}")
+            return url
 
     def get_real_url(self, url):
         if not url:
             return None
 
-        if not self.driver:
-            self.setup_driver()
-            if not self.driver:
-                return url
+        if not self.use_browser:
+            return self.resolve_redirects(url)
 
         try:
-            self.driver.get(url)
-            time.sleep(2)  # Wait for any JavaScript redirects
-
-            current_url = self.driver.current_url
-            
-            # If still on Google News, try to find the actual link
-            if 'news.google.com' in current_url:
-                links = self.driver.find_elements(By.TAG_NAME, 'a')
-                for link in links:
-                    href = link.get_attribute('href')
-                    if href and 'news.google.com' not in href and 'accounts.google.com' not in href:
-                        return href
-            
-            return current_url
+            # Ввічливі паузи рахуються тут: воркери не мають спільного планувальника
+            fetch_scheduler.wait(url)
+            with track_stage("selenium_resolve"):
+                return get_browser_pool().resolve(url)
         except Exception as e:
             logging.error(f"Error getting real URL for {url}: {str(e)}")
             return url
@@ -132,22 +178,19 @@ class SearchService:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            feed = feedparser.parse(response.content)
+            with track_stage("rss_fetch"):
+                response = fetch_scheduler.fetch(url, provider='google_news', respect_robots=False,
+                                                 headers=headers, timeout=10)
+                feed = feedparser.parse(response.content)
             return feed
         except Exception as e:
             logging.error(f"Error fetching RSS feed from {url}: {str(e)}")
             return None
 
     def extract_base_domain(self, url: str) -> str:
-        """Витягує базовий домен з URL."""
+        """Витягує базовий домен з URL (kyiv.suspilne.media -> suspilne.media, www.misto.kiev.ua -> misto.kiev.ua)."""
         try:
-            parsed = urlparse(url)
-            # Отримуємо основний домен (наприклад, suspilne.media з kyiv.suspilne.media)
-            domain_parts = parsed.netloc.split('.')
-            if len(domain_parts) > 2:
-                return '.'.join(domain_parts[-2:])
-            return parsed.netloc
+            return domain_normalizer.normalize(url)
         except Exception as e:
             logger.error(f"Error extracting base domain from {url}: {str(e)}")
             return ""
@@ -164,19 +207,12 @@ class SearchService:
             }}"""
             
             # Відправляємо запит до ШІ (без URL параметра)
-            ai_url = f"http://127.0.0.1:8080/?text={quote(prompt)}"
-            response = requests.get(ai_url, timeout=30)
-            
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    if result and isinstance(result, dict) and 'domain' in result:
-                        return {
-                            'domain': result['domain'],
-                            'description': ''
-                        }
-                except Exception as e:
-                    logger.error(f"Failed to parse AI response for {url}: {str(e)}")
+            result = llm_client.query({'text': prompt})
+            if result and 'domain' in result:
+                return {
+                    'domain': result['domain'],
+                    'description': ''
+                }
             
             # Якщо щось пішло не так, витягуємо домен з URL
             return {
@@ -197,20 +233,46 @@ class SearchService:
             ai_analysis = self.get_ai_analysis(url)
             if not ai_analysis:
                 return None
-                
+
+            metadata = None
+            head_unparsed = False
             try:
-                # Пробуємо отримати додаткову інформацію через newspaper3k
-                article = Article(url)
-                article.download()
-                article.parse()
-                
-                # Доповнюємо аналіз від ШІ даними з article
-                if not ai_analysis.get('description'):
-                    ai_analysis['description'] = article.meta_description
-                    
+                # Лише <head> сторінки: опис, мова, RSS та canonical
+                metadata = metadata_fetcher.fetch(url)
+            except HeadParseError as e:
+                head_unparsed = True
+                logger.warning(str(e))
             except Exception as e:
-                logger.warning(f"Failed to get additional info via newspaper3k for {url}: {str(e)}")
-                # Продовжуємо роботу навіть якщо newspaper3k не спрацював
+                logger.warning(f"Failed to fetch page head for {url}: {str(e)}")
+
+            if metadata:
+                if not ai_analysis.get('description'):
+                    ai_analysis['description'] = metadata['description']
+                ai_analysis['language'] = metadata['language']
+                ai_analysis['canonical_url'] = metadata['canonical_url']
+                ai_analysis['feeds'] = [feed['url'] for feed in metadata['feeds']]
+            elif head_unparsed and metadata_config.METADATA_NEWSPAPER_FALLBACK:
+                # Лише якщо сторінку дозволено й отримано як HTML, але <head> не розібрано:
+                # заборонене robots.txt, помилки HTTP і не-HTML повторно не завантажуємо
+                try:
+                    # Запасний варіант: повне завантаження через newspaper3k
+                    fetch_scheduler.wait(url)
+                    with track_stage("newspaper_download"):
+                        article = Article(url)
+                        article.download()
+                        article.parse()
+                    html = (article.html or '').encode('utf-8')
+                    PAGE_BYTES.inc(len(html), fetcher="newspaper")
+                    # Повна сторінка потрапляє в архів для повторного аналізу без мережі
+                    if html and archive_config.ARCHIVE_ENABLED:
+                        page_archive.put(url, html)
+
+                    if not ai_analysis.get('description'):
+                        ai_analysis['description'] = article.meta_description
+
+                except Exception as e:
+                    logger.warning(f"Failed to get additional info via newspaper3k for {url}: {str(e)}")
+                    # Продовжуємо роботу навіть якщо newspaper3k не спрацював
                 
             return ai_analysis
             
@@ -218,18 +280,53 @@ class SearchService:
             logger.error(f"Error analyzing website {url}: {str(e)}")
             return None
 
-    def search_google_news(self, query, max_results=10):
-        base_url = "https://news.google.com/rss/search?q="
+    def google_news_entries(self, query, max_results=10) -> List:
+        """Записи RSS Google News без розкриття посилань."""
         encoded_query = quote(query)
-        rss_url = f"{base_url}{encoded_query}&hl=uk&gl=UA&ceid=UA:uk"
+        params = '&'.join(f"{name}={value}" for name, value in self.GOOGLE_NEWS_PARAMS.items())
+        rss_url = f"{self.google_news_url}?q={encoded_query}&{params}"
         
-        feed = self.get_rss_feed(rss_url)
+        # Стрічка, що не розібралася або не містить записів, не кешується надовго
+        feed = provider_cache.get('google_news', query, self.GOOGLE_NEWS_PARAMS,
+                                  lambda: self.get_rss_feed(rss_url), valid=lambda feed: bool(feed.entries))
         if not feed:
             return []
-        
+        return feed.entries[:max_results]
+
+    def _resolve(self, link, batch: Optional[SearchBatchState] = None):
+        if batch is not None:
+            return batch.cached(batch.resolved, "batch_resolve", link, self._resolve_shared)
+        return self._resolve_shared(link)
+
+    def _resolve_shared(self, link):
+        # Одне посилання, що розкривається кількома пошуками одночасно, - один запуск Chrome
+        return self._resolve_flight.do(link, self.get_real_url, link)[0]
+
+    def _analyze_url(self, url: str) -> Optional[Dict]:
+        return self._url_analysis_flight.do(url, self._analyze_found_url, url)[0]
+
+    def _analyze_found_url(self, url: str) -> Optional[Dict]:
+        """Аналіз знайденого URL: впевнені випадки - локальний класифікатор, решта - ШІ."""
+        if classifier_config.CLASSIFIER_ENABLED and media_classifier.ready:
+            base_domain = self.extract_base_domain(url)
+            # Класифікація за хостом і назвою сайту - одна на домен
+            local = self.local_classifications.get(base_domain)
+            if local is None:
+                local = self.local_classifications[base_domain] = self.classify_locally(url)
+            if local['confident']:
+                CLASSIFIER_DECISIONS.inc(route="local")
+                result = local['result']
+                analysis = {'domain': base_domain, 'description': result['description'], 'classified_by': 'local',
+                            'type': result['type'], 'coverage': result['coverage']}
+                analysis.update((target, prediction['label']) for target, prediction in local['predictions'].items())
+                return analysis
+            CLASSIFIER_DECISIONS.inc(route="llm")
+        return self.get_ai_analysis(url)
+
+    def search_google_news(self, query, max_results=10, batch: Optional[SearchBatchState] = None):
         results = []
-        for entry in feed.entries[:max_results]:
-            real_url = self.get_real_url(entry.link)
+        for entry in self.google_news_entries(query, max_results):
+            real_url = self._resolve(entry.link, batch)
             if real_url:
                 results.append({
                     'title': entry.title,
@@ -239,15 +336,66 @@ class SearchService:
         
         return results
 
+    def classify_locally(self, url: str) -> Dict:
+        """Тип, надтип і регіон медіа з локального класифікатора за хостом і <head> сайту.
+
+        Повертає передбачення, чи можна обійтися без ШІ (усі мітки впевнені й
+        мають відповідник у словнику ШІ) та результат у форматі відповіді ШІ
+        для analyze_media_source; мітки реєстру - у local_prediction.
+        """
+        base_domain = self.extract_base_domain(url)
+        metadata = None
+        try:
+            metadata = metadata_fetcher.fetch(f"https://{base_domain}")
+        except Exception as e:
+            logger.warning(f"Failed to fetch page head for {base_domain}: {str(e)}")
+        with track_stage("local_classification"):
+            classified = media_classifier.classify(url, site_name(metadata))
+        predictions = classified['predictions']
+        labels = llm_labels(predictions)
+        result = {
+            'base_domain': base_domain,
+            'name': site_name(metadata),
+            'description': ((metadata or {}).get('description') or '')[:200],
+            'type': labels['type'],
+            'language': (metadata or {}).get('language'),
+            'coverage': labels['coverage'],
+            # Надійність реєстр не розмічає
+            'reliability_score': None,
+            'social_media': {'facebook': None, 'twitter': None, 'telegram': None},
+            'has_rss': bool((metadata or {}).get('feeds')),
+            'classified_by': 'local',
+            'confidence': min((prediction['confidence'] for prediction in predictions.values() if prediction),
+                              default=0.0),
+            'local_prediction': predictions,
+        }
+        confident = classified['confident'] and labels['type'] is not None and labels['coverage'] is not None
+        return {'predictions': predictions, 'confident': confident, 'result': result}
+
     def analyze_media_source(self, url: str) -> Dict:
         """Аналізує медіа-ресурс та його базовий домен."""
+        # Аналізи одного домену з різних пошуків об'єднуються
+        return self._domain_analysis_flight.do(self.extract_base_domain(url), self._analyze_media_source, url)[0]
+
+    def _analyze_media_source(self, url: str) -> Dict:
         try:
             base_domain = self.extract_base_domain(url)
             
             # Перевіряємо кеш
+            record_cache("domain_analysis", base_domain in self.domain_cache)
             if base_domain in self.domain_cache:
                 logger.info(f"Using cached analysis for domain {base_domain}")
                 return self.domain_cache[base_domain]
+
+            # Впевнені випадки класифікуємо локально, до ШІ йдуть лише сумнівні
+            local = None
+            if classifier_config.CLASSIFIER_ENABLED and media_classifier.ready:
+                local = self.classify_locally(url)
+                if local['confident']:
+                    CLASSIFIER_DECISIONS.inc(route="local")
+                    self.domain_cache[base_domain] = local['result']
+                    return local['result']
+                CLASSIFIER_DECISIONS.inc(route="llm")
             
             # Формуємо промпт для аналізу базового домену
             prompt = """Проаналізуй це медіа-джерело та поверни JSON з такими полями:
@@ -269,95 +417,288 @@ class SearchService:
             """
             
             # Відправляємо запит до ШІ
-            ai_url = f"http://127.0.0.1:8080/?text={quote(prompt)}&url={quote(base_domain)}"
-            response = requests.get(ai_url, timeout=30)
-            
-            if response.status_code == 200:
-                try:
-                    result = response.json()
-                    # Зберігаємо в кеш
-                    self.domain_cache[base_domain] = result
-                    return result
-                except json.JSONDecodeError:
-                    logger.error(f"Failed to parse AI response for {base_domain}")
-                    return None
-            else:
-                logger.error(f"AI service returned status {response.status_code} for {base_domain}")
+            result = llm_client.query({'text': prompt, 'url': base_domain})
+            if result is None:
+                logger.error(f"AI service unavailable for {base_domain}")
                 return None
+            
+            if local is not None:
+                result['local_prediction'] = local['predictions']
+
+            # Зберігаємо в кеш
+            self.domain_cache[base_domain] = result
+            return result
                 
         except Exception as e:
             logger.error(f"Error analyzing media source {url}: {str(e)}")
             return None
 
-    def search_media(self, query, max_results=20):
+    def ddgs_text(self, query, max_results=20) -> List[Dict]:
+        fetch_scheduler.wait(provider='ddg')
+        try:
+            with DDGS() as ddgs:
+                with track_stage("ddg_query"):
+                    return list(ddgs.text(query, max_results=max_results, **self.DDG_PARAMS))
+        except Exception as e:
+            if 'ratelimit' in type(e).__name__.lower() or '429' in str(e):
+                fetch_scheduler.report(provider='ddg', status=429)
+            raise
+
+    def _collect(self, url: str, query: str, results: List[Dict], seen_domains: set,
+                 batch: Optional[SearchBatchState], deadline: Deadline = NO_DEADLINE) -> Optional[str]:
+        """Додає результат для URL; повертає рівень збагачення (analyzed або resolved), None без домену."""
+        enrichment = 'analyzed'
+        try:
+            # Отримуємо аналіз від ШІ або витягуємо базовий домен
+            if batch is not None:
+                media_info = deadline.run("analysis", batch.cached, batch.analyses, "batch_analysis", url,
+                                          self._analyze_url)
+            else:
+                media_info = deadline.run("analysis", self._analyze_url, url)
+        except DeadlineExceeded:
+            # Бюджет вичерпано - домен з самого URL, без ШІ
+            media_info = {'domain': self.extract_base_domain(url), 'description': ''}
+            enrichment = 'resolved'
+        domain = media_info['domain']
+        if not domain:
+            return None
+
+        if domain not in seen_domains:
+            seen_domains.add(domain)
+            if batch is not None:
+                batch.claim(domain, query)
+            result = {
+                'url': url,
+                'domain': domain,
+                'description': media_info.get('description', ''),
+                'found_at': str(datetime.utcnow().isoformat()),
+                'enrichment': enrichment,
+            }
+            # Мітки реєстру від локального класифікатора зберігаються разом із джерелом
+            if media_info.get('classified_by'):
+                result.update((key, value) for key, value in media_info.items() if key not in ('domain', 'description'))
+            results.append(result)
+        return enrichment
+
+    def search_media(self, query, max_results=20, batch: Optional[SearchBatchState] = None,
+                     discovery: Optional[DiscoveryState] = None, deadline: Optional[Deadline] = None):
+        """Пошук нових медіа за запитом.
+
+        `discovery` - стан попередніх запусків цього запиту: вже оброблені
+        записи пропускаються (якщо увімкнено), нові - записуються в нього.
+        Одночасні пошуки того самого запиту з тими самими параметрами
+        виконуються один раз, решта отримує їхній результат.
+
+        `deadline` - бюджет часу: коли він вичерпується, пошук повертає
+        зібране; `enrichment` кожного результату показує, наскільки повно
+        його оброблено (analyzed, resolved - без ШІ, domain_only - лише
+        домен видання без розкриття посилання).
+        """
+        deadline = deadline or NO_DEADLINE
+        key = (normalize_query(query), max_results, discovery.skip_seen if discovery is not None else None,
+               deadline.budget_ms)
+        (results, used, exceeded), shared = self._search_flight.do(key, self._search_shared, query, max_results,
+                                                                   batch, discovery, deadline)
+        if shared:
+            # Результат спільний з іншим викликом: переносимо його стан, ознаку
+            # обрізаного бюджетом пошуку та першовідкривачів у власні, а записи копіюємо
+            if exceeded:
+                deadline.exceeded = True
+            if discovery is not None and used is not None:
+                discovery.merge(used)
+            if batch is not None:
+                for result in results:
+                    batch.claim(result['domain'], query)
+            return [dict(result) for result in results]
+        return results
+
+    def _search_shared(self, query, max_results, batch: Optional[SearchBatchState],
+                       discovery: Optional[DiscoveryState], deadline: Deadline):
+        """Результат для спільного пошуку: записи, стан запиту та чи обрізав його бюджет."""
+        results = self._search_media(query, max_results, batch, discovery, deadline)
+        return results, discovery, deadline.exceeded
+
+    def _search_media(self, query, max_results=20, batch: Optional[SearchBatchState] = None,
+                      discovery: Optional[DiscoveryState] = None, deadline: Deadline = NO_DEADLINE):
         results = []
         seen_domains = set()
+        # Кандидати: url (DDG) або link (Google News, потребує розкриття),
+        # текст для кластеризації та домен-підказка, відомий без розкриття/ШІ
+        candidates = []
+
+        # Етапи йдуть від дешевих до дорогих: пошук у провайдерів, локальні
+        # перевірки за доменом-підказкою, далі розкриття посилань та аналіз ШІ
 
         # Search using DuckDuckGo
         try:
-            with DDGS() as ddgs:
-                ddg_results = list(ddgs.text(
-                    query,
-                    max_results=max_results,
-                    region='ua',
-                    safesearch='off',
-                    timelimit='m'
-                ))
-                for result in ddg_results:
-                    try:
-                        url = result.get('link')
-                        if not url:
-                            continue
-                            
-                        # Отримуємо аналіз від ШІ або витягуємо базовий домен
-                        media_info = self.get_ai_analysis(url)
-                        domain = media_info['domain']
-                        
-                        if domain and domain not in seen_domains:
-                            seen_domains.add(domain)
-                            results.append({
-                                'url': url,
-                                'domain': domain,
-                                'description': media_info.get('description', ''),
-                                'found_at': str(datetime.utcnow().isoformat())
-                            })
-                            
-                    except Exception as e:
-                        logger.error(f"Error processing result: {str(e)}")
-                        continue
+            ddg_results = deadline.run("ddg", provider_cache.get, 'ddg', query,
+                                       dict(self.DDG_PARAMS, max_results=max_results),
+                                       lambda: self.ddg_backend(query, max_results))
+            for result in ddg_results:
+                url = result.get('href') or result.get('link')
+                if url:
+                    candidates.append({
+                        'url': url,
+                        'text': f"{strip_publisher(result.get('title', ''))} {result.get('body', '')}",
+                        'hint': self.extract_base_domain(url),
+                        'provider': 'ddg',
+                    })
 
+        except DeadlineExceeded:
+            logger.warning(f"DuckDuckGo search for '{query}' did not fit the deadline")
         except Exception as e:
             logger.error(f"Error searching DuckDuckGo: {str(e)}")
 
         # Search using Google News
         try:
-            google_results = self.search_google_news(query)
-            for result in google_results:
-                try:
-                    url = result.get('url')
-                    if not url:
-                        continue
-                        
-                    # Отримуємо аналіз від ШІ або витягуємо базовий домен
-                    media_info = self.get_ai_analysis(url)
-                    domain = media_info['domain']
-                    
-                    if domain and domain not in seen_domains:
-                        seen_domains.add(domain)
-                        results.append({
-                            'url': url,
-                            'domain': domain,
-                            'description': media_info.get('description', ''),
-                            'found_at': str(datetime.utcnow().isoformat())
-                        })
-                        
-                except Exception as e:
-                    logger.error(f"Error processing Google result: {str(e)}")
-                    continue
+            for entry in deadline.run("google_news", self.google_news_entries, query):
+                # <source url="..."> - сайт видання; опис RSS дублює заголовок
+                source = entry.get('source') or {}
+                candidates.append({
+                    'link': entry.get('link'),
+                    'text': entry.get('title', ''),
+                    'hint': self.extract_base_domain(source.get('href', '')) or None,
+                    'site': source.get('href') or None,
+                    'provider': 'google_news',
+                    'guid': entry.get('id'),
+                    'published': _entry_published(entry),
+                })
 
+        except DeadlineExceeded:
+            logger.warning(f"Google News search for '{query}' did not fit the deadline")
         except Exception as e:
             logger.error(f"Error searching Google News: {str(e)}")
 
+        # Повторний запуск: обробляємо лише записи, яких не було минулого разу
+        if discovery is not None:
+            candidates = [candidate for candidate in candidates if not discovery.should_skip(
+                candidate['provider'], candidate.get('guid'), (candidate.get('url'), candidate.get('link')),
+                candidate.get('published'))]
+
+        # Уже відомі джерела (разом із субдоменами та соцмережевими псевдонімами)
+        # відкидаємо до перевірки доступності, розкриття посилань і аналізу
+        with track_stage("known_source_match"):
+            known = source_matcher.match_many(candidate.get('url') or candidate['hint'] for candidate in candidates)
+        for candidate, match in zip(candidates, known):
+            if match is not None:
+                KNOWN_SOURCES_SKIPPED.inc(provider=candidate['provider'])
+        candidates = [candidate for candidate, match in zip(candidates, known) if match is None]
+
+        # Мертві, припарковані та виставлені на продаж домени не потрапляють
+        # до розкриття посилань і аналізу; перевірка йде паралельно для всіх
+        liveness = {}
+        if liveness_config.LIVENESS_CHECK:
+            try:
+                with track_stage("liveness_check"):
+                    liveness = deadline.run("liveness_check", liveness_checker.check,
+                                            [candidate['hint'] for candidate in candidates])
+            except DeadlineExceeded:
+                pass
+
+        # Одна історія часто синдикується багатьма URL: спершу обробляємо
+        # представника кожного кластера, решту - лише якщо вони ведуть до нового домену.
+        # Домени, що не відповіли на перевірку вчасно, - в кінці своєї групи
+        with track_stage("story_clustering"):
+            representatives = cluster_stories([candidate['text'] for candidate in candidates])
+        order = sorted(range(len(candidates)), key=lambda i: (
+            representatives[i] != i, liveness_checker.is_unknown(liveness.get(candidates[i]['hint']))))
+
+        # Кандидати, до яких не дійшла черга в межах бюджету
+        pending = []
+        # Представники кластерів, що дали результат
+        collected_representatives = set()
+        for i in order:
+            candidate = candidates[i]
+            url = None
+            # Позначаються лише записи, що дали результат: відкинуті перевіркою
+            # доступності, дублікати, помилки та не повністю оброблені наступний запуск повторить
+            collected = False
+            try:
+                if representatives[i] != i and candidate['hint'] in seen_domains:
+                    DUPLICATES_SKIPPED.inc(provider=candidate['provider'])
+                    # Дублікат зібраної історії позначається разом з нею: інакше наступного
+                    # разу, коли представника пропустить discovery, він сам стане представником
+                    collected = representatives[i] in collected_representatives
+                    url = candidate.get('url')
+                    continue
+                if liveness_checker.is_dropped(liveness.get(candidate['hint'])):
+                    continue
+                if deadline.expired:
+                    pending.append(candidate)
+                    continue
+                url = candidate.get('url') or deadline.run("resolve", self._resolve, candidate.get('link'), batch)
+                if not url:
+                    continue
+                collected = self._collect(url, query, results, seen_domains, batch, deadline) == 'analyzed'
+                if collected:
+                    collected_representatives.add(i)
+
+            except DeadlineExceeded:
+                pending.append(candidate)
+            except Exception as e:
+                logger.error(f"Error processing {candidate['provider']} result: {str(e)}")
+                continue
+            finally:
+                if discovery is not None and collected:
+                    discovery.mark(candidate.get('guid'), (url, candidate.get('link')), candidate.get('published'))
+
+        self._add_partial(pending, query, results, seen_domains, batch)
         return results
 
+    def _add_partial(self, pending: List[Dict], query: str, results: List[Dict], seen_domains: set,
+                     batch: Optional[SearchBatchState]) -> None:
+        """Результати без розкриття посилань і ШІ - лише з того, що відомо локально."""
+        for candidate in pending:
+            domain = candidate['hint']
+            if not domain or domain in seen_domains:
+                continue
+            seen_domains.add(domain)
+            if batch is not None:
+                batch.claim(domain, query)
+            results.append({
+                'url': candidate.get('url') or candidate.get('site') or f"https://{domain}",
+                'domain': domain,
+                'description': '',
+                'found_at': str(datetime.utcnow().isoformat()),
+                # URL з DuckDuckGo вже справжній; з Google News відомий лише сайт видання
+                'enrichment': 'resolved' if candidate.get('url') else 'domain_only',
+            })
+
+    def search_batch(self, queries: List[str], max_results: int = 20, concurrency: int = 8,
+                     discovery: Optional[Dict[str, DiscoveryState]] = None,
+                     deadline: Optional[Deadline] = None) -> Dict:
+        """Пошук за списком запитів зі спільною дедуплікацією та кешем.
+
+        Повертає результати по кожному запиту, статистику перетину доменів
+        та `domains` (домен -> запити, що його знайшли; перший - першовідкривач).
+        `deadline` - спільний бюджет часу всього пакета.
+        """
+        queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+        batch = SearchBatchState()
+        grouped: Dict[str, List[Dict]] = {}
+        errors: Dict[str, str] = {}
+
+        def run(query):
+            with self._batch_slots:
+                return self.search_media(query, max_results, batch, (discovery or {}).get(query), deadline)
+
+        workers = max(1, min(concurrency, len(queries)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {submit(pool, run, query): query for query in queries}
+            for future in concurrent.futures.as_completed(futures):
+                query = futures[future]
+                try:
+                    grouped[query] = future.result()
+                except Exception as e:
+                    logger.error(f"Error in batch search for '{query}': {str(e)}")
+                    grouped[query] = []
+                    errors[query] = str(e)
+
+        return {
+            'queries': [{'query': query, 'results': grouped[query], 'error': errors.get(query)}
+                        for query in queries],
+            'overlap': batch.overlap_stats(queries, grouped),
+            'domains': batch.domains,
+        }
+
 search_service = SearchService() 
\ No newline at end of file
@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Tuple, TypeVar
+from .metrics import SINGLE_FLIGHT
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Coalesces identical concurrent calls.
+
+    The first caller for a key (the leader) runs the function; callers
+    that arrive with the same key while it is in flight wait for and share
+    its result or exception instead of repeating the work. Nothing is
+    cached: once the call finishes the next caller runs it again. Callers
+    are threads (search work runs in the thread pool), so the shared value
+    must be treated as read-only.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args, **kwargs) -> Tuple[T, bool]:
+        """Повертає (результат, чи спільний з іншим викликом)."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        SINGLE_FLIGHT.inc(name=self.name, role="leader" if leader else "shared")
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._calls)
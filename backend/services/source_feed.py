@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+# Службова подія для відстаючого клієнта: черга переповнилась, треба перепідключитись
+_LAGGED = None
+
+class SourceFeed:
+    """In-process push feed of new_sources changes.
+
+    Every event (source_added, source_verified, sources_synced) gets a
+    cursor "<epoch>-<seq>" and is kept in a ring buffer of `buffer_size`
+    events. A client that reconnects with its last cursor gets the missed
+    events replayed from the buffer; when the cursor is from another
+    process start (epoch) or already evicted, it gets a `reset` event and
+    must reload /new-sources. Each subscriber has a bounded queue; one that
+    falls `queue_size` events behind is sent `lagged` and dropped, so a slow
+    client never holds back the others. Events are published from the
+    event loop thread; the feed is per process.
+    """
+
+    def __init__(self, buffer_size: int = 10000, queue_size: int = 1000):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self._seq = 0
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def cursor(self) -> str:
+        return f"{self.epoch}-{self._seq}"
+
+    def _parse(self, cursor: Optional[str]) -> Optional[int]:
+        """Номер події з курсора або None, якщо курсор з іншого запуску/невірний."""
+        epoch, _, seq = (cursor or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def publish(self, event_type: str, **payload) -> Dict:
+        self._seq += 1
+        event = {"cursor": self.cursor, "type": event_type, "at": datetime.utcnow().isoformat(), **payload}
+        self._buffer.append((self._seq, event))
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Клієнт відстав: звільняємо чергу, він перепідключиться з курсором
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_LAGGED)
+                self._subscribers.discard(queue)
+            else:
+                queue.put_nowait((self._seq, event))
+        return event
+
+    def since(self, cursor: Optional[str]) -> Optional[List[Dict]]:
+        """Події після курсора; None - курсор застарів і потрібне повне перезавантаження."""
+        seq = self._parse(cursor)
+        if seq is None or seq > self._seq:
+            return None
+        oldest = self._buffer[0][0] if self._buffer else self._seq + 1
+        # Події seq+1.. мають бути в буфері, інакше частину вже витіснено
+        if seq + 1 < oldest and seq < self._seq:
+            return None
+        return [event for event_seq, event in self._buffer if event_seq > seq]
+
+    async def stream(self, cursor: Optional[str] = None,
+                     heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict]]:
+        """Події від курсора (або від поточного моменту) і далі в реальному часі.
+
+        Перша подія - `hello` з поточним курсором (без курсора) або `reset`.
+        З `heartbeat` після кожних heartbeat секунд тиші видається None.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Підписуємось до читання буфера, щоб не пропустити подій між ними
+        self._subscribers.add(queue)
+        try:
+            last = self._seq
+            if cursor is None:
+                yield {"cursor": self.cursor, "type": "hello"}
+            else:
+                backlog = self.since(cursor)
+                if backlog is None:
+                    yield {"cursor": self.cursor, "type": "reset"}
+                else:
+                    for event in backlog:
+                        yield event
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is _LAGGED:
+                    yield {"cursor": f"{self.epoch}-{last}", "type": "lagged"}
+                    return
+                last, event = item
+                yield event
+        finally:
+            self._subscribers.discard(queue)
+
+source_feed = SourceFeed()
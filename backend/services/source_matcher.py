@@ -0,0 +1,161 @@
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from .domain_normalizer import domain_normalizer
+from .storage_service import SourceStorage
+
+logger = logging.getLogger(__name__)
+
+# Платформи, де одне джерело - це сторінка/канал, а не весь домен
+PLATFORM_DOMAINS = {
+    't.me', 'telegram.me', 'facebook.com', 'fb.com', 'instagram.com', 'youtube.com', 'youtu.be',
+    'twitter.com', 'x.com', 'tiktok.com', 'threads.net', 'linkedin.com', 'vk.com', 'ok.ru',
+    'google.com', 'blogspot.com', 'wordpress.com', 'medium.com', 'livejournal.com', 'substack.com',
+}
+# Субдомени, що не змінюють сайт
+TRANSPARENT_SUBDOMAINS = {'www', 'm', 'mobile', 'amp'}
+# Службові сегменти шляху платформ, що не є псевдонімом джерела
+PLATFORM_PATH_PREFIXES = {'s', 'c', 'channel', 'user', 'pg', 'groups', 'pages'}
+
+def _handle(value: str) -> str:
+    return value.strip().lstrip('@').strip('/').lower()
+
+def _url_path(value: str) -> str:
+    """Шлях URL без кінцевого "/" (порожній для кореня чи голого хоста)."""
+    value = value.strip()
+    return urlparse(value if '://' in value else f"//{value}").path.rstrip('/')
+
+class SourceMatcher:
+    """Known-source lookup by host, parent domains and aliases.
+
+    Known sources are stored in a reversed-label trie: public suffix, then
+    registered domain, then subdomain labels (`com.ua -> suspilne ->
+    kyiv`). Looking up a host walks its labels once and returns the
+    deepest known source on the way, so `kyiv.suspilne.media` and
+    `www.suspilne.media` resolve to a known `suspilne.media`.
+
+    A host node keeps its sources by URL path, so registry rows for
+    different sections of one host (`bbc.co.uk/ukrainian`,
+    `bbc.co.uk/russian`) stay distinct; a lookup prefers the source with
+    the same path, then the host root.
+
+    On social/blog platforms a source is a channel, not the domain: the
+    platform domain itself is never a source, and `t.me/suspilne` is keyed
+    by its first path segment. `@handle` aliases from the registry match
+    that segment on any platform.
+    """
+
+    END = "\0"
+
+    def __init__(self):
+        self._root: Dict = {}
+        self._handles: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.size = 0
+        self.loaded = False
+
+    def _path(self, value: str) -> Tuple[List[str], bool]:
+        """Ключі трі для URL/хоста та чи це сторінка на платформі."""
+        subdomain, domain, suffix = domain_normalizer.split(value)
+        if not domain:
+            return [], False
+        labels = [label for label in subdomain.split('.') if label]
+        if labels and labels[0] in TRANSPARENT_SUBDOMAINS:
+            labels = labels[1:]
+        path = [suffix, domain] + labels[::-1]
+        if f"{domain}.{suffix}" in PLATFORM_DOMAINS and not labels:
+            segments = [segment for segment in urlparse(value if '://' in value else f"//{value}").path.split('/')
+                        if segment]
+            if segments and segments[0].lower() in PLATFORM_PATH_PREFIXES:
+                segments = segments[1:]
+            if segments:
+                path.append('/' + _handle(segments[0]))
+            return path, True
+        return path, False
+
+    @staticmethod
+    def _entry(source: Dict) -> Dict:
+        return {key: source.get(key) for key in ('_id', 'url', 'domain', 'name')}
+
+    def _insert(self, value: str, entry: Dict, host_only: bool = False) -> bool:
+        path, on_platform = self._path(value)
+        # Сам домен платформи (facebook.com без сторінки) не може бути джерелом
+        if not path or (on_platform and not path[-1].startswith('/')):
+            return False
+        node = self._root
+        for key in path:
+            node = node.setdefault(key, {})
+        # На платформі сторінка вже в ключах трі - шлях не розрізняє джерела;
+        # домен джерела (None) лише веде до нього, але не є його точною адресою
+        key = None if host_only else '' if on_platform else _url_path(value)
+        node.setdefault(self.END, {}).setdefault(key, entry)
+        return True
+
+    def add(self, source: Dict) -> None:
+        """Додає джерело: URL, домен та соціальний псевдонім (якщо є)."""
+        entry = self._entry(source)
+        alias = str(source.get('social_alias') or '').strip()
+        with self._lock:
+            added = False
+            for value, host_only in ((source.get('url'), False), (source.get('domain'), True)):
+                if isinstance(value, str) and value.strip():
+                    added = self._insert(value.strip(), entry, host_only) or added
+            if alias.startswith('@'):
+                self._handles.setdefault(_handle(alias), entry)
+                added = True
+            elif alias:
+                added = self._insert(alias, entry) or added
+            self.size += added
+
+    def add_many(self, sources: Iterable[Dict]) -> None:
+        for source in sources:
+            self.add(source)
+
+    def match(self, value: str) -> Optional[Dict]:
+        """Відоме джерело для URL/хоста або його батьківського домену.
+
+        Повертає {'source': ..., 'exact': чи збігся сам хост/сторінка}
+        або None. Поза платформами `exact` вимагає ще й того самого шляху
+        URL: bbc.co.uk/news і bbc.co.uk/ukrainian - різні джерела одного хоста.
+        """
+        if not value or not isinstance(value, str):
+            return None
+        path, on_platform = self._path(value.strip())
+        url_path = '' if on_platform else _url_path(value)
+        found, exact = None, False
+        node = self._root
+        for index, key in enumerate(path):
+            node = node.get(key)
+            if node is None:
+                break
+            if self.END in node:
+                entries = node[self.END]
+                exact = index + 1 == len(path) and url_path in entries
+                found = entries[url_path] if exact else (
+                    entries.get('') or entries.get(None) or next(iter(entries.values())))
+        if found is None and on_platform and path and path[-1].startswith('/'):
+            handle_match = self._handles.get(path[-1][1:])
+            if handle_match is not None:
+                return {'source': handle_match, 'exact': True}
+        if found is None:
+            return None
+        return {'source': found, 'exact': exact}
+
+    def match_many(self, values: Iterable[str]) -> List[Optional[Dict]]:
+        return [self.match(value) for value in values]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._root, self._handles, self.size = {}, {}, 0
+
+    async def load(self, storage: SourceStorage) -> int:
+        """Будує індекс з усього known_sources."""
+        self.clear()
+        async for batch in storage.iter_batches("known_sources"):
+            self.add_many(batch)
+        self.loaded = True
+        logger.info(f"Source matcher loaded {self.size} known sources")
+        return self.size
+
+source_matcher = SourceMatcher()
@@ -0,0 +1,496 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from ..config.storage_config import storage_config
+from .metrics import timed_stage
+
+logger = logging.getLogger(__name__)
+
+# Поле-ключ для дедуплікації в кожній колекції
+COLLECTION_KEYS = {
+    "known_sources": "url",
+    "new_sources": "url",
+    "source_analysis": "url",
+    "reanalysis_runs": "run_id",
+    "discovery_state": "query",
+    "ingestion_jobs": "job_id",
+}
+
+def collection_key(collection: str) -> str:
+    """Returns the dedupe key field for a collection."""
+    return COLLECTION_KEYS.get(collection, "url")
+
+def normalize_key(value: Any) -> Optional[str]:
+    """Значення ключа у вигляді, в якому його зберігають і шукають усі бекенди.
+
+    Ключ завжди рядок: інакше Mongo зберігав би число як число, а SQLite
+    як рядок, і пошук за тим самим значенням поводився б по-різному.
+    Порожні значення (None, "", NaN з pandas) повертаються як None.
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    value = str(value)
+    return value or None
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+class SourceStorage(ABC):
+    """Interface for source storage backends.
+
+    Documents are plain dicts. Every collection has a unique key field
+    (see COLLECTION_KEYS); documents without a key value are skipped.
+    Key values are stored and looked up as strings (see normalize_key).
+    Returned documents always carry a string `_id`.
+    """
+
+    def __init__(self, batch_size: int = None):
+        self.batch_size = batch_size or storage_config.STORAGE_BATCH_SIZE
+
+    @abstractmethod
+    async def init(self) -> None:
+        """Creates tables / unique indexes."""
+
+    @abstractmethod
+    async def insert_many(self, collection: str, documents: List[Dict[str, Any]]) -> int:
+        """Bulk insert, skipping duplicates. Returns number of inserted documents."""
+
+    @abstractmethod
+    async def upsert_many(self, collection: str, documents: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Bulk insert-or-merge by key. Returns (inserted, updated)."""
+
+    @abstractmethod
+    async def find_existing(self, collection: str, keys: Iterable[str]) -> Set[str]:
+        """Returns the subset of keys that already exist in the collection."""
+
+    @abstractmethod
+    async def find_one(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        """Finds a document by its key value."""
+
+    @abstractmethod
+    async def list(self, collection: str, query: Optional[Dict[str, Any]] = None,
+                   skip: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Paginated listing in insertion order. `query` is an equality filter."""
+
+    @abstractmethod
+    async def list_after(self, collection: str, after: Optional[str] = None,
+                         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Keyset pagination: documents with `_id` greater than `after`, in `_id` order.
+
+        Unlike `skip`, the cursor does not shift when documents are inserted
+        or deleted between pages, so it can be stored as a checkpoint.
+        """
+
+    @abstractmethod
+    def iter_batches(self, collection: str, batch_size: int = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Iterates over the whole collection in batches (for export)."""
+
+    @abstractmethod
+    async def update_one(self, collection: str, doc_id: str, fields: Dict[str, Any]) -> bool:
+        """Sets fields on a document by `_id`."""
+
+    @abstractmethod
+    async def delete_many(self, collection: str, doc_ids: List[str]) -> int:
+        """Deletes documents by `_id`."""
+
+    @abstractmethod
+    async def count(self, collection: str, query: Optional[Dict[str, Any]] = None) -> int:
+        """Counts documents matching an equality filter."""
+
+    async def close(self) -> None:
+        """Releases backend resources."""
+
+    def _keyed(self, collection: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drops documents without a key and duplicates inside the batch (last wins).
+
+        The key field of the returned documents is normalized to a string.
+        """
+        key = collection_key(collection)
+        unique = {}
+        for doc in documents:
+            value = normalize_key(doc.get(key))
+            if value is None:
+                continue
+            unique[value] = doc if doc[key] == value else {**doc, key: value}
+        skipped = len(documents) - len(unique)
+        if skipped:
+            logger.debug(f"Skipped {skipped} documents without unique '{key}' in {collection}")
+        return list(unique.values())
+
+    @staticmethod
+    def _lookup_keys(keys: Iterable[Any]) -> List[str]:
+        return list({value for value in map(normalize_key, keys) if value is not None})
+
+class MongoSourceStorage(SourceStorage):
+    """MongoDB storage on top of motor, using unordered bulk writes."""
+
+    def __init__(self, mongodb_url: str = None, database: str = None, batch_size: int = None, client=None):
+        super().__init__(batch_size)
+        if client is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            client = AsyncIOMotorClient(mongodb_url or storage_config.MONGODB_URL)
+        self.client = client
+        self.db = self.client[database or storage_config.MONGODB_DATABASE]
+
+    def _to_id(self, doc_id: str):
+        from bson import ObjectId
+
+        return ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
+
+    def _convert(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        if doc and '_id' in doc:
+            doc['_id'] = str(doc['_id'])
+        return doc
+
+    @timed_stage("db_write")
+    async def init(self) -> None:
+        for collection, key in COLLECTION_KEYS.items():
+            await self.db[collection].create_index(key, unique=True)
+        logger.info("MongoDB storage indexes created successfully")
+
+    @timed_stage("db_write")
+    async def insert_many(self, collection: str, documents: List[Dict[str, Any]]) -> int:
+        from pymongo.errors import BulkWriteError
+
+        inserted = 0
+        for batch in _chunks(self._keyed(collection, documents), self.batch_size):
+            batch = [{k: v for k, v in doc.items() if k != '_id'} for doc in batch]
+            try:
+                result = await self.db[collection].insert_many(batch, ordered=False)
+                inserted += len(result.inserted_ids)
+            except BulkWriteError as e:
+                # Дублікати пропускаємо, решту документів вставлено
+                inserted += e.details.get("nInserted", 0)
+        return inserted
+
+    @timed_stage("db_write")
+    async def upsert_many(self, collection: str, documents: List[Dict[str, Any]]) -> Tuple[int, int]:
+        from pymongo import UpdateOne
+
+        key = collection_key(collection)
+        inserted = updated = 0
+        for batch in _chunks(self._keyed(collection, documents), self.batch_size):
+            operations = [
+                UpdateOne({key: doc[key]},
+                          {"$set": {k: v for k, v in doc.items() if k != '_id'}},
+                          upsert=True)
+                for doc in batch
+            ]
+            result = await self.db[collection].bulk_write(operations, ordered=False)
+            inserted += result.upserted_count
+            updated += result.matched_count
+        return inserted, updated
+
+    @timed_stage("db_read")
+    async def find_existing(self, collection: str, keys: Iterable[str]) -> Set[str]:
+        key = collection_key(collection)
+        existing = set()
+        for batch in _chunks(self._lookup_keys(keys), self.batch_size):
+            cursor = self.db[collection].find({key: {"$in": batch}}, {key: 1, "_id": 0})
+            async for doc in cursor:
+                existing.add(doc[key])
+        return existing
+
+    @timed_stage("db_read")
+    async def find_one(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        doc = await self.db[collection].find_one({collection_key(collection): normalize_key(key)})
+        return self._convert(doc) if doc else None
+
+    @timed_stage("db_read")
+    async def list(self, collection: str, query: Optional[Dict[str, Any]] = None,
+                   skip: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        cursor = self.db[collection].find(query or {}).sort("_id", 1).skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return [self._convert(doc) async for doc in cursor]
+
+    @timed_stage("db_read")
+    async def list_after(self, collection: str, after: Optional[str] = None,
+                         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = {"_id": {"$gt": self._to_id(after)}} if after else {}
+        cursor = self.db[collection].find(query).sort("_id", 1)
+        if limit:
+            cursor = cursor.limit(limit)
+        return [self._convert(doc) async for doc in cursor]
+
+    async def iter_batches(self, collection: str, batch_size: int = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        batch_size = batch_size or self.batch_size
+        batch = []
+        async for doc in self.db[collection].find({}).sort("_id", 1).batch_size(batch_size):
+            batch.append(self._convert(doc))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @timed_stage("db_write")
+    async def update_one(self, collection: str, doc_id: str, fields: Dict[str, Any]) -> bool:
+        result = await self.db[collection].update_one({"_id": self._to_id(doc_id)}, {"$set": fields})
+        return result.matched_count > 0
+
+    @timed_stage("db_write")
+    async def delete_many(self, collection: str, doc_ids: List[str]) -> int:
+        if not doc_ids:
+            return 0
+        result = await self.db[collection].delete_many({"_id": {"$in": [self._to_id(i) for i in doc_ids]}})
+        return result.deleted_count
+
+    @timed_stage("db_read")
+    async def count(self, collection: str, query: Optional[Dict[str, Any]] = None) -> int:
+        return await self.db[collection].count_documents(query or {})
+
+    async def close(self) -> None:
+        self.client.close()
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+class SQLiteSourceStorage(SourceStorage):
+    """Embedded storage: one table per collection with a unique key column
+    and a JSON document. Runs in WAL mode; writes are batched into one
+    transaction per `batch_size` documents. Datetimes are stored as ISO strings.
+    """
+
+    # Обмеження SQLite на кількість параметрів у запиті
+    MAX_PARAMS = 500
+
+    def __init__(self, path: str = None, batch_size: int = None):
+        super().__init__(batch_size)
+        self.path = path or storage_config.SQLITE_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        self._tables: Set[str] = set()
+
+    def _table(self, collection: str) -> str:
+        if not collection.isidentifier():
+            raise ValueError(f"Invalid collection name: {collection}")
+        if collection not in self._tables:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {collection} ("
+                "_id TEXT PRIMARY KEY, key TEXT UNIQUE NOT NULL, doc TEXT NOT NULL)"
+            )
+            self._tables.add(collection)
+        return collection
+
+    def _dumps(self, doc: Dict[str, Any]) -> str:
+        return json.dumps({k: v for k, v in doc.items() if k != '_id'},
+                          default=_json_default, ensure_ascii=False)
+
+    def _loads(self, doc_id: str, raw: str) -> Dict[str, Any]:
+        doc = json.loads(raw)
+        doc['_id'] = doc_id
+        return doc
+
+    def _where(self, query: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        if not query:
+            return "", []
+        clauses, params = [], []
+        for field, value in query.items():
+            if field == '_id':
+                clauses.append("_id = ?")
+            else:
+                if not field.replace('_', '').isalnum():
+                    raise ValueError(f"Invalid field name: {field}")
+                clauses.append(f"json_extract(doc, '$.{field}') = ?")
+            params.append(value)
+        return " WHERE " + " AND ".join(clauses), params
+
+    async def _run(self, func, *args):
+        def locked():
+            with self._lock:
+                return func(*args)
+        return await asyncio.to_thread(locked)
+
+    @timed_stage("db_write")
+    async def init(self) -> None:
+        def create():
+            for collection in COLLECTION_KEYS:
+                self._table(collection)
+            self._conn.commit()
+        await self._run(create)
+        logger.info(f"SQLite storage initialized at {self.path}")
+
+    def _existing_sync(self, table: str, keys: List[str]) -> Dict[str, Tuple[str, str]]:
+        found = {}
+        for batch in _chunks(keys, self.MAX_PARAMS):
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, _id, doc FROM {table} WHERE key IN ({placeholders})", batch
+            )
+            for key, doc_id, raw in rows:
+                found[key] = (doc_id, raw)
+        return found
+
+    @timed_stage("db_write")
+    async def insert_many(self, collection: str, documents: List[Dict[str, Any]]) -> int:
+        key = collection_key(collection)
+        documents = self._keyed(collection, documents)
+
+        def insert():
+            table = self._table(collection)
+            inserted = 0
+            for batch in _chunks(documents, self.batch_size):
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} (_id, key, doc) VALUES (?, ?, ?)",
+                    [(uuid.uuid4().hex[:24], doc[key], self._dumps(doc)) for doc in batch],
+                )
+                self._conn.commit()
+                inserted += self._conn.total_changes - before
+            return inserted
+        return await self._run(insert)
+
+    @timed_stage("db_write")
+    async def upsert_many(self, collection: str, documents: List[Dict[str, Any]]) -> Tuple[int, int]:
+        key = collection_key(collection)
+        documents = self._keyed(collection, documents)
+
+        def upsert():
+            table = self._table(collection)
+            inserted = updated = 0
+            for batch in _chunks(documents, self.batch_size):
+                existing = self._existing_sync(table, [doc[key] for doc in batch])
+                new_rows, changed_rows = [], []
+                for doc in batch:
+                    match = existing.get(doc[key])
+                    if match:
+                        merged = json.loads(match[1])
+                        merged.update(json.loads(self._dumps(doc)))
+                        changed_rows.append((json.dumps(merged, ensure_ascii=False), match[0]))
+                    else:
+                        new_rows.append((uuid.uuid4().hex[:24], doc[key], self._dumps(doc)))
+                self._conn.executemany(f"INSERT INTO {table} (_id, key, doc) VALUES (?, ?, ?)", new_rows)
+                self._conn.executemany(f"UPDATE {table} SET doc = ? WHERE _id = ?", changed_rows)
+                self._conn.commit()
+                inserted += len(new_rows)
+                updated += len(changed_rows)
+            return inserted, updated
+        return await self._run(upsert)
+
+    @timed_stage("db_read")
+    async def find_existing(self, collection: str, keys: Iterable[str]) -> Set[str]:
+        keys = self._lookup_keys(keys)
+
+        def find():
+            return set(self._existing_sync(self._table(collection), keys))
+        return await self._run(find)
+
+    @timed_stage("db_read")
+    async def find_one(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        def find():
+            row = self._conn.execute(
+                f"SELECT _id, doc FROM {self._table(collection)} WHERE key = ?", (normalize_key(key),)
+            ).fetchone()
+            return self._loads(*row) if row else None
+        return await self._run(find)
+
+    @timed_stage("db_read")
+    async def list(self, collection: str, query: Optional[Dict[str, Any]] = None,
+                   skip: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        where, params = self._where(query)
+
+        def select():
+            rows = self._conn.execute(
+                f"SELECT _id, doc FROM {self._table(collection)}{where} "
+                f"ORDER BY rowid LIMIT ? OFFSET ?",
+                params + [limit if limit else -1, skip],
+            )
+            return [self._loads(doc_id, raw) for doc_id, raw in rows]
+        return await self._run(select)
+
+    @timed_stage("db_read")
+    async def list_after(self, collection: str, after: Optional[str] = None,
+                         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        def select():
+            # _id - первинний ключ: вибірка йде індексом, без OFFSET
+            rows = self._conn.execute(
+                f"SELECT _id, doc FROM {self._table(collection)} WHERE _id > ? ORDER BY _id LIMIT ?",
+                (after or "", limit if limit else -1),
+            )
+            return [self._loads(doc_id, raw) for doc_id, raw in rows]
+        return await self._run(select)
+
+    async def iter_batches(self, collection: str, batch_size: int = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        batch_size = batch_size or self.batch_size
+        last_rowid = 0
+
+        def select():
+            return self._conn.execute(
+                f"SELECT rowid, _id, doc FROM {self._table(collection)} "
+                f"WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size),
+            ).fetchall()
+
+        while True:
+            rows = await self._run(select)
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            yield [self._loads(doc_id, raw) for _, doc_id, raw in rows]
+
+    @timed_stage("db_write")
+    async def update_one(self, collection: str, doc_id: str, fields: Dict[str, Any]) -> bool:
+        def update():
+            table = self._table(collection)
+            row = self._conn.execute(f"SELECT doc FROM {table} WHERE _id = ?", (doc_id,)).fetchone()
+            if not row:
+                return False
+            doc = json.loads(row[0])
+            doc.update(json.loads(self._dumps(fields)))
+            self._conn.execute(f"UPDATE {table} SET doc = ? WHERE _id = ?",
+                               (json.dumps(doc, ensure_ascii=False), doc_id))
+            self._conn.commit()
+            return True
+        return await self._run(update)
+
+    @timed_stage("db_write")
+    async def delete_many(self, collection: str, doc_ids: List[str]) -> int:
+        def delete():
+            table = self._table(collection)
+            before = self._conn.total_changes
+            for batch in _chunks(list(doc_ids), self.MAX_PARAMS):
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(f"DELETE FROM {table} WHERE _id IN ({placeholders})", batch)
+            self._conn.commit()
+            return self._conn.total_changes - before
+        return await self._run(delete)
+
+    @timed_stage("db_read")
+    async def count(self, collection: str, query: Optional[Dict[str, Any]] = None) -> int:
+        where, params = self._where(query)
+
+        def count():
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM {self._table(collection)}{where}", params
+            ).fetchone()[0]
+        return await self._run(count)
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+
+def create_storage(backend: str = None) -> SourceStorage:
+    """Creates a storage backend by name ("mongo" or "sqlite")."""
+    backend = (backend or storage_config.STORAGE_BACKEND).lower()
+    if backend == "sqlite":
+        return SQLiteSourceStorage()
+    if backend == "mongo":
+        return MongoSourceStorage()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+source_storage = create_storage()
@@ -0,0 +1,102 @@
+import hashlib
+import re
+from typing import Dict, List, Sequence
+import numpy as np
+
+HASH_BITS = 64
+# 4 смуги по 16 біт: два SimHash з відстанню <= 3 гарантовано збігаються хоча б в одній
+BANDS = 4
+MAX_DISTANCE = 3
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# "Заголовок - Назва видання" у Google News: назва видання не є частиною історії
+_PUBLISHER_SUFFIX_RE = re.compile(r"\s+[-–—|]\s+[^-–—|]{1,60}$")
+
+_BIT_SHIFTS = np.arange(HASH_BITS, dtype=np.uint64)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def _tokens(text: str) -> List[str]:
+    words = [word for word in _TOKEN_RE.findall(text.lower()) if len(word) > 1]
+    # Слова та біграми: біграми відрізняють різні історії з однаковою лексикою
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def _token_hash(token: str, cache: Dict[str, int]) -> int:
+    value = cache.get(token)
+    if value is None:
+        value = cache[token] = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+    return value
+
+def strip_publisher(title: str) -> str:
+    return _PUBLISHER_SUFFIX_RE.sub("", title or "")
+
+def simhash(texts: Sequence[str]) -> np.ndarray:
+    """64-бітні SimHash для всіх текстів одним векторним проходом."""
+    cache: Dict[str, int] = {}
+    doc_ids, hashes = [], []
+    for index, text in enumerate(texts):
+        for token in _tokens(text or ""):
+            doc_ids.append(index)
+            hashes.append(_token_hash(token, cache))
+    if not hashes:
+        return np.zeros(len(texts), dtype=np.uint64)
+
+    token_hashes = np.array(hashes, dtype="<u8")
+    # Біти кожного токена (біт i -> стовпець i); голос +1 за 1 та -1 за 0
+    bits = np.unpackbits(token_hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    doc_ids = np.array(doc_ids)
+    starts = np.flatnonzero(np.r_[True, doc_ids[1:] != doc_ids[:-1]])
+    ones = np.add.reduceat(bits, starts, axis=0, dtype=np.int32)
+    lengths = np.diff(np.r_[starts, len(doc_ids)])
+    votes = np.zeros((len(texts), HASH_BITS), dtype=np.int32)
+    votes[doc_ids[starts]] = 2 * ones - lengths[:, None]
+    weights = np.uint64(1) << _BIT_SHIFTS
+    return ((votes > 0).astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    xor = np.bitwise_xor(a, b).astype(np.uint64)
+    return _POPCOUNT8[xor.reshape(-1, 1).view(np.uint8)].sum(axis=1).reshape(xor.shape)
+
+def cluster(texts: Sequence[str], max_distance: int = MAX_DISTANCE) -> List[int]:
+    """Групує майже однакові тексти.
+
+    Повертає для кожного тексту індекс представника кластера (першого
+    за порядком члена). Кандидати шукаються по смугах SimHash (LSH), тож
+    вартість близька до лінійної навіть для тисяч записів. Назва видання
+    в кінці тексту відкидається до хешування, хоч би звідки прийшов текст.
+    """
+    count = len(texts)
+    if count == 0:
+        return []
+    texts = [strip_publisher(text) for text in texts]
+    fingerprints = simhash(texts)
+    empty = np.array([not _tokens(text or "") for text in texts])
+    parent = list(range(count))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    band_bits = HASH_BITS // BANDS
+    mask = np.uint64((1 << band_bits) - 1)
+    for band in range(BANDS):
+        keys = (fingerprints >> np.uint64(band * band_bits)) & mask
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # Межі груп з однаковим значенням смуги
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, count])
+        for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+            members = order[start:start + size]
+            members = members[~empty[members]]
+            if len(members) < 2:
+                continue
+            distances = hamming(fingerprints[members][:, None], fingerprints[members][None, :])
+            for i, j in zip(*np.nonzero(np.triu(distances <= max_distance, k=1))):
+                a, b = find(int(members[i])), find(int(members[j]))
+                if a != b:
+                    # Представник - член з найменшим індексом
+                    parent[max(a, b)] = min(a, b)
+
+    return [find(i) for i in range(count)]
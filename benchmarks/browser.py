@@ -0,0 +1,70 @@
+"""Chrome page-load benchmark for the Selenium resolution path.
+
+Loads the same URLs through ChromeBrowser.resolve (the code the browser
+workers run) and reports per-page latency and the RSS of the Chrome
+process tree. Run once with
+the lean settings (default) and once without to compare:
+
+    BROWSER_LEAN=0 python -m benchmarks.browser --output full.json
+    BROWSER_LEAN=1 python -m benchmarks.browser --output lean.json
+
+Needs Chrome and network access (or --url pointing at local pages).
+"""
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.run import REPO_ROOT, percentile
+
+DEFAULT_URLS = [
+    "https://www.pravda.com.ua/",
+    "https://suspilne.media/",
+    "https://www.ukrinform.ua/",
+    "https://lb.ua/",
+    "https://zaxid.net/",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Chrome page-load benchmark")
+    parser.add_argument("--url", action="append", help="URL для завантаження (можна кілька)")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--output", help="Файл для JSON результатів")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from backend.config.browser_config import browser_config
+    from backend.services.browser_pool import ChromeBrowser
+
+    # Chrome у поточному процесі, без пулу: вимірюємо лише завантаження сторінок
+    browser = ChromeBrowser(lean=browser_config.BROWSER_LEAN)
+    browser.setup_driver()
+    if not browser.driver:
+        sys.exit("Chrome failed to start")
+    urls = args.url or DEFAULT_URLS
+    latencies, peak_rss = [], 0
+    try:
+        for _ in range(args.rounds):
+            for url in urls:
+                started = time.perf_counter()
+                browser.resolve(url)
+                latencies.append(time.perf_counter() - started)
+                peak_rss = max(peak_rss, browser.rss())
+    finally:
+        browser.quit()
+
+    report = {
+        "lean": browser.lean,
+        "pages": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "peak_chrome_rss_mb": round(peak_rss / (1024 * 1024), 1),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Evaluation of the local media classifier.
+
+Cross-validates the classifier on labelled known sources - a registry CSV
+(the import format: Назва, Адреса, Медіа Тип, Super Type, Регіон) or the
+configured storage - and reports per-target accuracy, how many domains
+would be answered locally (LLM calls saved) and how accurate those local
+answers are, plus prediction latency:
+
+    python -m benchmarks.classifier --csv registry.csv --threshold 0.9
+    python -m benchmarks.classifier --folds 5 --output classifier.json
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+import zlib
+from typing import Dict, List
+
+from benchmarks.run import REPO_ROOT, percentile
+
+# Колонки CSV реєстру -> поля known_sources
+CSV_COLUMNS = {
+    "Назва": "name",
+    "Адреса": "url",
+    "Медіа Тип": "media_type",
+    "Super Type": "super_type",
+    "Регіон": "region",
+}
+
+def read_csv(path: str) -> List[Dict]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [{CSV_COLUMNS.get(key, key): value for key, value in row.items()} for row in csv.DictReader(f)]
+
+async def read_storage() -> List[Dict]:
+    from backend.services.storage_service import source_storage
+    await source_storage.init()
+    sources = []
+    async for batch in source_storage.iter_batches("known_sources"):
+        sources.extend(batch)
+    return sources
+
+def evaluate(sources: List[Dict], folds: int, threshold: float) -> Dict:
+    from backend.services.media_classifier import MediaClassifier, _label, llm_labels
+
+    classifier = MediaClassifier(threshold=threshold)
+    targets = classifier.targets
+    # Розбиття за доменом стабільне між запусками
+    fold_of = [zlib.crc32(str(source.get("url") or source.get("domain")).encode()) % folds for source in sources]
+    totals = {target: {"labelled": 0, "correct": 0, "confident": 0, "confident_correct": 0} for target in targets}
+    local = {"domains": 0, "answered": 0, "all_correct": 0}
+    latencies, train_seconds = [], 0.0
+
+    for fold in range(folds):
+        started = time.perf_counter()
+        classifier.fit(source for source, f in zip(sources, fold_of) if f != fold)
+        train_seconds += time.perf_counter() - started
+        for source, f in zip(sources, fold_of):
+            if f != fold:
+                continue
+            labels = {target: _label(source.get(target)) for target in targets}
+            if not any(labels.values()):
+                continue
+            url = source.get("url") or source.get("domain") or ""
+            started = time.perf_counter()
+            classified = classifier.classify(url, name=_label(source.get("name")))
+            latencies.append(time.perf_counter() - started)
+
+            all_correct = True
+            for target, label in labels.items():
+                prediction = classified["predictions"][target]
+                correct = prediction is not None and prediction["label"] == label
+                all_correct = all_correct and (label is None or correct)
+                if label is None:
+                    continue
+                stats = totals[target]
+                stats["labelled"] += 1
+                stats["correct"] += correct
+                if prediction is not None and prediction["confidence"] >= threshold:
+                    stats["confident"] += 1
+                    stats["confident_correct"] += correct
+            local["domains"] += 1
+            # Як у пошуку: без ШІ лише впевнені мітки, що мають відповідник у словнику ШІ
+            schema = llm_labels(classified["predictions"])
+            if classified["confident"] and schema["type"] and schema["coverage"]:
+                local["answered"] += 1
+                local["all_correct"] += all_correct
+
+    def ratio(part: int, whole: int) -> float:
+        return round(part / whole, 4) if whole else 0.0
+
+    return {
+        "sources": len(sources),
+        "folds": folds,
+        "threshold": threshold,
+        "targets": {
+            target: {
+                "labelled": stats["labelled"],
+                "accuracy": ratio(stats["correct"], stats["labelled"]),
+                "confident_share": ratio(stats["confident"], stats["labelled"]),
+                "confident_accuracy": ratio(stats["confident_correct"], stats["confident"]),
+            }
+            for target, stats in totals.items()
+        },
+        # Домени, для яких аналіз обійшовся б без ШІ, і точність цих відповідей
+        "llm_calls_saved": local["answered"],
+        "llm_calls_saved_share": ratio(local["answered"], local["domains"]),
+        "local_answer_accuracy": ratio(local["all_correct"], local["answered"]),
+        "predict_us_p50": round(percentile(latencies, 50) * 1e6, 1),
+        "predict_us_p95": round(percentile(latencies, 95) * 1e6, 1),
+        "train_seconds_per_fold": round(train_seconds / folds, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Local media classifier evaluation")
+    parser.add_argument("--csv", help="CSV реєстру; без нього - known_sources зі сховища")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, help="Поріг впевненості (за замовчуванням CLASSIFIER_CONFIDENCE)")
+    parser.add_argument("--output", help="Файл для JSON результатів")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from backend.config.classifier_config import classifier_config
+
+    sources = read_csv(args.csv) if args.csv else asyncio.run(read_storage())
+    threshold = args.threshold if args.threshold is not None else classifier_config.CLASSIFIER_CONFIDENCE
+    report = evaluate(sources, max(args.folds, 2), threshold)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Local stand-ins for every external dependency of the search pipeline.
+
+- DDG stand-in:        GET /search?q=&max_results=  -> JSON [{title, href, body}]
+- Google News RSS:     GET /rss/search?q=           -> RSS with redirecting links
+                       GET /rss/articles/<host>/<n> -> 302 to the publisher page
+- Publisher farm:      HTTP proxy; serves pages for any http://<host>/... so
+                       publisher domains never touch DNS or the real network
+- Scripted LLM:        GET /?text=&url=             -> JSON, with injectable
+                       latency, tail latency, failures (500) and
+                       invalid answers (200 with a non-JSON body)
+                       POST /_config                -> changes llm_* settings
+                       of the running server (JSON body); `llm_slow_next`
+                       makes the next N requests slow, `/_stats` counts calls
+
+All servers run in one child process (see `start_fake_servers`).
+"""
+import hashlib
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+from xml.sax.saxutils import escape
+
+ZONES = ['com.ua', 'kiev.ua', 'in.ua', 'ua', 'com', 'media', 'news', 'org.ua', 'lviv.ua', 'net']
+WORDS = ['новини', 'події', 'місто', 'регіон', 'влада', 'економіка', 'спорт', 'культура',
+         'громада', 'війна', 'освіта', 'транспорт', 'погода', 'бізнес', 'здоров\'я']
+
+def site_farm(size: int):
+    """Deterministic list of publisher hosts across several (multi-label) zones."""
+    sites = []
+    for i in range(size):
+        zone = ZONES[i % len(ZONES)]
+        sub = 'www.' if i % 3 == 0 else ('kyiv.' if i % 7 == 0 else '')
+        sites.append(f"{sub}media{i:04d}.{zone}")
+    return sites
+
+def _rng(*parts) -> random.Random:
+    seed = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+    return random.Random(int(seed[:16], 16))
+
+def pick_sites(sites, query: str, count: int):
+    """Zipf-like choice so that different queries overlap on popular outlets."""
+    rng = _rng(query)
+    weights = [1.0 / (rank + 1) for rank in range(len(sites))]
+    return [rng.choices(sites, weights)[0] for _ in range(count)]
+
+def story_title(query: str, n: int) -> str:
+    rng = _rng(query, n // 3)  # кожні три записи - одна "синдикована" історія
+    return f"{query}: " + " ".join(rng.choice(WORDS) for _ in range(6))
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/plain; charset=utf-8",
+              headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+class DDGHandler(_Handler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        query = params.get('q', [''])[0]
+        max_results = int(params.get('max_results', ['20'])[0])
+        sites = pick_sites(self.config['sites'], 'ddg:' + query, max_results)
+        results = [{
+            'title': story_title(query, n),
+            'href': f"http://{host}/article/{_rng(query, 'ddg', n).randrange(100000)}",
+            'body': story_title(query, n) + ' ...',
+        } for n, host in enumerate(sites)]
+        self._send(200, json.dumps(results, ensure_ascii=False).encode(), "application/json")
+
+class NewsRSSHandler(_Handler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.startswith('/rss/articles/'):
+            host, n = parsed.path[len('/rss/articles/'):].split('/', 1)
+            self._send(302, headers={'Location': f"http://{host}/article/{n}"})
+            return
+        query = parse_qs(parsed.query).get('q', [''])[0]
+        port = self.server.server_address[1]
+        items = []
+        for n, host in enumerate(pick_sites(self.config['sites'], 'gn:' + query, self.config['rss_items'])):
+            article = _rng(query, 'gn', n).randrange(100000)
+            items.append(
+                f"<item><title>{escape(story_title(query, n))}</title>"
+                f"<link>http://127.0.0.1:{port}/rss/articles/{host}/{article}</link>"
+                f"<guid isPermaLink=\"false\">{host}-{article}</guid>"
+                f"<pubDate>{formatdate(time.time() - n * 3600, usegmt=True)}</pubDate>"
+                f"<description>{escape(story_title(query, n))}</description>"
+                f"<source url=\"http://{host}\">{host}</source></item>"
+            )
+        body = ("<?xml version=\"1.0\" encoding=\"UTF-8\"?><rss version=\"2.0\"><channel>"
+                f"<title>{escape(query)}</title>{''.join(items)}</channel></rss>")
+        self._send(200, body.encode(), "application/rss+xml; charset=utf-8")
+
+class PublisherHandler(_Handler):
+    """Acts as an HTTP proxy: the request line carries the absolute URL."""
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        host = parsed.hostname or self.headers.get('Host', 'unknown').split(':')[0]
+        if parsed.path == '/robots.txt':
+            self._send(200, b"User-agent: *\nAllow: /\n")
+            return
+        rng = _rng(host, parsed.path)
+        paragraphs = "".join(
+            f"<p class=\"text\">{' '.join(rng.choice(WORDS) for _ in range(40))}</p>"
+            for _ in range(self.config['page_paragraphs'])
+        )
+        name = host.split('.')[-3] if host.count('.') >= 2 else host.split('.')[0]
+        body = (
+            "<!DOCTYPE html><html lang=\"uk\"><head><meta charset=\"utf-8\">"
+            f"<title>{name} - новини регіону</title>"
+            f"<meta name=\"description\" content=\"{name}: останні новини регіону\">"
+            f"<meta property=\"og:site_name\" content=\"{name}\">"
+            f"<meta property=\"og:title\" content=\"{name}\">"
+            f"<link rel=\"canonical\" href=\"http://{host}{parsed.path}\">"
+            f"<link rel=\"alternate\" type=\"application/rss+xml\" href=\"http://{host}/rss\">"
+            "</head><body><header class=\"share-buttons\"></header>"
+            f"<article><time class=\"published-date\">2024-01-01</time>{paragraphs}</article>"
+            "</body></html>"
+        )
+        self._send(200, body.encode(), "text/html; charset=utf-8")
+
+class LLMHandler(_Handler):
+    URL_RE = re.compile(r"https?://[^\s\"']+")
+    lock = threading.Lock()
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/_config':
+            self._send(404)
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.lock:
+            self.config.update(json.loads(body or b'{}'))
+        self._send(204)
+
+    def do_GET(self):
+        config = self.config
+        if urlparse(self.path).path == '/_stats':
+            self._send(200, json.dumps({"requests": config['llm_requests']}).encode(), "application/json")
+            return
+        rng = random.Random()
+        with self.lock:
+            config['llm_requests'] += 1
+            slow = config['llm_slow_next'] > 0
+            config['llm_slow_next'] = max(config['llm_slow_next'] - 1, 0)
+        latency = config['llm_latency_ms'] + rng.uniform(0, config['llm_jitter_ms'])
+        if slow or rng.random() < config['llm_slow_rate']:
+            latency *= 10
+        time.sleep(latency / 1000)
+        if rng.random() < config['llm_failure_rate']:
+            self._send(500, b"model overloaded")
+            return
+        if rng.random() < config['llm_invalid_rate']:
+            self._send(200, b"Sorry, I cannot answer that.", "text/plain")
+            return
+
+        params = parse_qs(urlparse(self.path).query)
+        if 'url' in params:
+            domain = params['url'][0]
+            result = {
+                "base_domain": domain, "name": domain.split('.')[0], "description": f"{domain} news",
+                "type": "news", "language": "uk", "coverage": "regional", "reliability_score": 70,
+                "social_media": {"facebook": None, "twitter": None, "telegram": None}, "has_rss": True,
+            }
+        else:
+            match = self.URL_RE.search(params.get('text', [''])[0])
+            host = urlparse(match.group(0)).hostname if match else ''
+            result = {"domain": (host or '').removeprefix('www.')}
+        self._send(200, json.dumps(result).encode(), "application/json")
+
+HANDLERS = {
+    'ddg': DDGHandler,
+    'rss': NewsRSSHandler,
+    'publisher': PublisherHandler,
+    'llm': LLMHandler,
+}
+
+DEFAULT_CONFIG = {
+    'farm_size': 300,
+    'rss_items': 10,
+    'page_paragraphs': 60,
+    'llm_latency_ms': 50.0,
+    'llm_jitter_ms': 20.0,
+    'llm_slow_rate': 0.0,
+    'llm_failure_rate': 0.0,
+    'llm_invalid_rate': 0.0,
+    'llm_slow_next': 0,
+    'llm_requests': 0,
+}
+
+def _serve(config: dict, ports) -> None:
+    config = dict(DEFAULT_CONFIG, **config)
+    config['sites'] = site_farm(config['farm_size'])
+    servers = {}
+    for name, handler in HANDLERS.items():
+        handler_cls = type(handler.__name__, (handler,), {'config': config})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler_cls)
+        server.daemon_threads = True
+        servers[name] = server
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ports.put({name: server.server_address[1] for name, server in servers.items()})
+    threading.Event().wait()
+
+def start_fake_servers(config: dict = None):
+    """Starts all stand-ins in a child process. Returns (process, {name: base_url})."""
+    ctx = multiprocessing.get_context("spawn")
+    ports = ctx.Queue()
+    process = ctx.Process(target=_serve, args=(config or {}, ports), daemon=True)
+    process.start()
+    urls = {name: f"http://127.0.0.1:{port}" for name, port in ports.get(timeout=30).items()}
+    return process, urls
+
+def fake_ddg_backend(base_url: str):
+    """DDG provider for SearchService.ddg_backend that queries the stand-in."""
+    from backend.services.fetch_scheduler import fetch_scheduler
+    from backend.services.metrics import track_stage
+
+    def search(query, max_results=20):
+        with track_stage("ddg_query"):
+            response = fetch_scheduler.fetch(
+                f"{base_url}/search?q={quote(query)}&max_results={max_results}",
+                provider='ddg', respect_robots=False)
+            return response.json()
+    return search
@@ -0,0 +1,102 @@
+"""Accuracy and throughput of the offline language identifier.
+
+Runs the uk/ru/en identifier over a labelled sample - the built-in one
+below or a JSONL file with {"text", "language", "declared"?} lines, where
+`declared` is the page's <html lang> - and reports accuracy, the
+confusion matrix, undetermined texts, documents/sec and, when declared
+languages are present, the accuracy of trusting <html lang> instead:
+
+    python -m benchmarks.language
+    python -m benchmarks.language --sample labelled.jsonl --min-confidence 0.8
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+from benchmarks.run import REPO_ROOT
+
+# Заголовки й описи сторінок; declared - те, що сайт вказав у <html lang>
+SAMPLE = [
+    {"text": "Суспільне Новини — головні події в Україні та світі", "language": "uk", "declared": "en"},
+    {"text": "У Харкові через обстріл пошкоджено школу та житловий будинок", "language": "uk", "declared": "uk"},
+    {"text": "Синоптики попереджають про сильний вітер і грозу в західних областях", "language": "uk",
+     "declared": None},
+    {"text": "Кабмін продовжив програму єОселя: хто може отримати пільгову іпотеку", "language": "uk",
+     "declared": "en"},
+    {"text": "Місцеві новини Житомира та області: політика, економіка, спорт", "language": "uk",
+     "declared": "ru"},
+    {"text": "Як отримати ґрант на розвиток бізнесу у 2024 році — покрокова інструкція", "language": "uk",
+     "declared": "uk"},
+    {"text": "Депутати міськради затвердили бюджет на наступний рік", "language": "uk", "declared": None},
+    {"text": "Новости Одессы и региона: происшествия, политика, культура", "language": "ru", "declared": "ru"},
+    {"text": "Что изменится с первого января: новые правила для водителей", "language": "ru", "declared": "uk"},
+    {"text": "Синоптики предупреждают о сильном ветре и грозе в западных областях", "language": "ru",
+     "declared": "en"},
+    {"text": "Эксперты объяснили, почему подорожали продукты в магазинах", "language": "ru", "declared": None},
+    {"text": "Депутаты горсовета утвердили бюджет на следующий год", "language": "ru", "declared": "ru"},
+    {"text": "Latest news from Ukraine: politics, business and culture", "language": "en", "declared": "en"},
+    {"text": "Kyiv Independent — news from Ukraine, Eastern Europe and beyond", "language": "en",
+     "declared": "en"},
+    {"text": "Forecasters warn of strong winds and thunderstorms in the western regions", "language": "en",
+     "declared": None},
+    {"text": "City council approves budget for next year after long debate", "language": "en", "declared": "uk"},
+]
+
+def read_sample(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def evaluate(sample: List[Dict], min_confidence: float) -> Dict:
+    from backend.services.language_id import language_identifier
+
+    started = time.perf_counter()
+    results = language_identifier.identify_many(item["text"] for item in sample)
+    elapsed = time.perf_counter() - started
+
+    confusion = Counter()
+    correct = undetermined = declared_total = declared_correct = 0
+    for item, result in zip(sample, results):
+        predicted = result["language"] if result and result["confidence"] >= min_confidence else None
+        if predicted is None:
+            undetermined += 1
+        correct += predicted == item["language"]
+        confusion[f"{item['language']}->{predicted}"] += 1
+        if "declared" in item:
+            declared_total += 1
+            declared_correct += (item["declared"] or "").split("-")[0].lower() == item["language"]
+
+    report = {
+        "documents": len(sample),
+        "min_confidence": min_confidence,
+        "accuracy": round(correct / len(sample), 4) if sample else 0.0,
+        "undetermined": undetermined,
+        "confusion": dict(sorted(confusion.items())),
+        "docs_per_sec": round(len(sample) / elapsed, 1) if elapsed else None,
+    }
+    if declared_total:
+        # Точність довіри до <html lang> на тих самих документах
+        report["declared_accuracy"] = round(declared_correct / declared_total, 4)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline language identification evaluation")
+    parser.add_argument("--sample", help="JSONL з полями text, language (та declared)")
+    parser.add_argument("--min-confidence", type=float, default=0.0)
+    parser.add_argument("--output", help="Файл для JSON результатів")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    sample = read_sample(args.sample) if args.sample else SAMPLE
+    report = evaluate(sample, args.min_confidence)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
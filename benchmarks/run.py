@@ -0,0 +1,254 @@
+"""Offline end-to-end benchmarks.
+
+Every external dependency is replaced by a local stand-in (see
+fake_servers.py) and MongoDB by the embedded SQLite storage backend, so
+the numbers are reproducible without network access.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json
+
+Results are JSON: throughput, p50/p95/p99 latency and peak RSS per
+benchmark, tagged with the current git commit.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [f"новини {city}" for city in (
+    "Київ", "Львів", "Одеса", "Харків", "Дніпро", "Запоріжжя", "Вінниця", "Полтава",
+    "Чернігів", "Суми", "Житомир", "Рівне", "Луцьк", "Ужгород", "Херсон", "Миколаїв",
+)]
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss: кілобайти на Linux, байти на macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def summarize(latencies: List[float], wall: float, units: int) -> Dict:
+    return {
+        "iterations": len(latencies),
+        "throughput_per_sec": round(units / wall, 3) if wall else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+async def measure(func: Callable, iterations: int, units_per_call: int = 1) -> Dict:
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        result = func(i)
+        if asyncio.iscoroutine(result):
+            await result
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started, iterations * units_per_call)
+
+def registry_csv(rows: int, ukrainian_columns: bool) -> bytes:
+    from benchmarks.fake_servers import site_farm
+
+    sites = site_farm(rows)
+    out = io.StringIO()
+    if ukrainian_columns:
+        out.write("Назва,Адреса,Соціальний псевдонім,Медіа Тип,Super Type,Регіон\n")
+        for i, host in enumerate(sites):
+            out.write(f"Media {i},http://{host},@media{i},Онлайн-медіа,Media,Київ\n")
+    else:
+        out.write("domain,name,url\n")
+        for i, host in enumerate(sites):
+            out.write(f"{host},Media {i},http://{host}\n")
+    return out.getvalue().encode()
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+def configure_environment(urls: Dict[str, str], workdir: str, storage: str) -> None:
+    os.environ.setdefault("STORAGE_BACKEND", storage)
+    os.environ.setdefault("SQLITE_PATH", os.path.join(workdir, "bench.db"))
+    os.environ["USE_BROWSER"] = "0"
+    os.environ["LLM_URL"] = urls["llm"] + "/"
+    os.environ["GOOGLE_NEWS_RSS_URL"] = urls["rss"] + "/rss/search"
+    # Всі "видавці" обслуговуються фермою, що працює як HTTP-проксі
+    os.environ["HTTP_PROXY"] = os.environ["http_proxy"] = urls["publisher"]
+    os.environ["NO_PROXY"] = os.environ["no_proxy"] = "127.0.0.1,localhost"
+
+async def run_benchmarks(args, urls: Dict[str, str]) -> Dict:
+    import httpx
+    from benchmarks.fake_servers import fake_ddg_backend, site_farm
+    from backend.services.fetch_scheduler import fetch_scheduler
+    from backend.services.search_service import search_service
+    from backend.services.db_service import db_service
+    from backend.services.metrics import PAGE_BYTES
+    from app import app
+
+    # Локальні заглушки не потребують ввічливих пауз
+    fetch_scheduler.host_rate = fetch_scheduler.host_burst = 10000.0
+    fetch_scheduler.PROVIDER_RATES = {name: 10000.0 for name in fetch_scheduler.PROVIDER_RATES}
+    search_service.ddg_backend = fake_ddg_backend(urls["ddg"])
+    await db_service.init_db()
+
+    results = {}
+    iterations = args.iterations
+
+    # Нормалізація доменів: унікальні хости (кожен проходить трі) та стовпець
+    # CSV, де хости повторюються (спрацьовує пам'ять на хост)
+    import pandas as pd
+    from backend.services.domain_normalizer import DomainNormalizer, load_trie
+
+    trie = load_trie()
+    hosts = [f"https://news{i}.site{i % 5000}.com.ua/{i}" for i in range(args.normalize_hosts)]
+    results["DomainNormalizer.normalize_many (unique hosts)"] = await measure(
+        lambda i: DomainNormalizer(trie).normalize_many(hosts), 3, len(hosts))
+    column = pd.Series([hosts[i % 1000] for i in range(args.normalize_hosts * 10)])
+    results["DomainNormalizer.normalize_series (repeated hosts)"] = await measure(
+        lambda i: DomainNormalizer(trie).normalize_series(column), 3, len(column))
+
+    def search(i):
+        search_service.search_media(QUERIES[i % len(QUERIES)])
+    results["search_service.search_media"] = await measure(search, iterations)
+
+    sites = site_farm(iterations)
+    page_bytes = lambda: sum(PAGE_BYTES.value(fetcher=name) for name in ("head", "newspaper"))
+    bytes_before = page_bytes()
+
+    def analyze(i):
+        search_service.analyze_website(f"http://{sites[i]}/")
+    results["search_service.analyze_website"] = await measure(analyze, iterations)
+    results["search_service.analyze_website"]["page_bytes_per_site"] = (page_bytes() - bytes_before) // iterations
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def api_search(i):
+            response = await client.post("/api/v1/search-media", json={"query": QUERIES[i % len(QUERIES)]})
+            response.raise_for_status()
+        results["POST /search-media"] = await measure(api_search, iterations)
+
+        async def api_batch(i):
+            response = await client.post("/api/v1/search-media/batch", json={"queries": QUERIES})
+            response.raise_for_status()
+        results["POST /search-media/batch"] = await measure(api_batch, max(iterations // 4, 1), len(QUERIES))
+
+        upload = registry_csv(args.csv_rows, ukrainian_columns=False)
+
+        async def api_upload(i):
+            response = await client.post("/api/v1/upload-csv",
+                                         files={"file": ("registry.csv", upload, "text/csv")})
+            response.raise_for_status()
+            # Імпорт іде у фоні - чекаємо його завершення
+            status_url = response.json()["status_url"]
+            while True:
+                job = (await client.get(status_url)).json()
+                if job["status"] in ("completed", "failed", "interrupted"):
+                    break
+                await asyncio.sleep(0.01)
+        results["POST /upload-csv"] = await measure(api_upload, max(iterations // 4, 1), args.csv_rows)
+
+        csv_path = os.path.join(os.getcwd(), "registry_ua.csv")
+        with open(csv_path, "wb") as f:
+            f.write(registry_csv(args.csv_rows, ukrainian_columns=True))
+
+        async def import_csv(i):
+            await db_service.import_from_csv(csv_path)
+        results["DBService.import_from_csv"] = await measure(import_csv, max(iterations // 4, 1), args.csv_rows)
+
+        async def api_export(i):
+            response = await client.post("/api/v1/export-new-sources")
+            response.raise_for_status()
+        results["POST /export-new-sources"] = await measure(api_export, iterations)
+
+        for path in ("/api/v1/known-sources", "/api/v1/new-sources"):
+            async def api_list(i, path=path):
+                response = await client.get(path)
+                response.raise_for_status()
+            results[f"GET {path[len('/api/v1'):]}"] = await measure(api_list, iterations)
+
+    return results
+
+def compare(current: Dict, baseline: Dict) -> None:
+    print(f"\nComparison {baseline.get('commit')} -> {current.get('commit')}")
+    print(f"{'benchmark':36} {'metric':20} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, stats in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        for metric in ("throughput_per_sec", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"):
+            old, new = base.get(metric), stats.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            print(f"{name:36} {metric:20} {old:12.2f} {new:12.2f} {change:+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--csv-rows", type=int, default=2000)
+    parser.add_argument("--normalize-hosts", type=int, default=100000)
+    parser.add_argument("--storage", default="sqlite", help="sqlite (default) або mongo (потрібен mongod)")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Файл для JSON результатів")
+    parser.add_argument("--compare", help="JSON результатів попереднього запуску")
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output) if args.output else None
+    args.compare = os.path.abspath(args.compare) if args.compare else None
+
+    from benchmarks.fake_servers import start_fake_servers
+
+    server_process, urls = start_fake_servers({
+        "llm_latency_ms": args.llm_latency_ms,
+        "llm_slow_rate": args.llm_slow_rate,
+        "llm_failure_rate": args.llm_failure_rate,
+    })
+    workdir = tempfile.mkdtemp(prefix="sm_parse_bench_")
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)  # app.py створює uploads/ та пише експорт у поточну директорію
+    configure_environment(urls, workdir, args.storage)
+    try:
+        benchmarks = asyncio.run(run_benchmarks(args, urls))
+    finally:
+        server_process.terminate()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "storage": os.environ["STORAGE_BACKEND"],
+        "config": vars(args),
+        "benchmarks": benchmarks,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
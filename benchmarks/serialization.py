@@ -0,0 +1,106 @@
+"""Serialization benchmark for source listings.
+
+Encodes the same list of source documents (as returned by the storage
+layer) the way list endpoints used to (jsonable_encoder + json) and
+through the orjson response classes, with and without gzip. Reports
+bytes, throughput (bytes/sec) and wall/CPU time per response:
+
+    python -m benchmarks.serialization --rows 100000
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from benchmarks.run import REPO_ROOT, percentile
+
+def make_sources(rows: int) -> List[Dict]:
+    started = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": f"{i:024x}",
+            "domain": f"media{i:06d}.com.ua",
+            "name": f"Медіа {i}",
+            "url": f"https://media{i:06d}.com.ua/",
+            "social_alias": f"@media{i}",
+            "region": "Київська область",
+            "created_at": started + timedelta(seconds=i),
+            "source": "upload_csv",
+        }
+        for i in range(rows)
+    ]
+
+def measure(encode: Callable[[], List[bytes]], rounds: int, gzip_level: int) -> Dict:
+    walls, cpus = [], []
+    chunks = []
+    for _ in range(rounds):
+        wall, cpu = time.perf_counter(), time.process_time()
+        chunks = encode()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    # Сервер відправляє частини окремо - склеюємо лише для gzip, поза виміром
+    body = b"".join(chunks)
+    wall, cpu = time.perf_counter(), time.process_time()
+    compressed = gzip.compress(body, compresslevel=gzip_level)
+    gzip_wall, gzip_cpu = time.perf_counter() - wall, time.process_time() - cpu
+    p50 = percentile(walls, 50)
+    return {
+        "bytes": len(body),
+        "p50_ms": round(p50 * 1000, 1),
+        "cpu_ms_per_request": round(sum(cpus) / len(cpus) * 1000, 1),
+        "mb_per_sec": round(len(body) / p50 / 1e6, 1),
+        "gzip_bytes": len(compressed),
+        "gzip_cpu_ms": round(gzip_cpu * 1000, 1),
+        "gzip_wall_ms": round(gzip_wall * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Source listing serialization benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", help="Файл для JSON результатів")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from backend.api.responses import FastJSONResponse, JSONArrayStreamingResponse
+    from backend.config.response_config import response_config
+
+    sources = make_sources(args.rows)
+
+    def streamed() -> List[bytes]:
+        async def batches():
+            for start in range(0, len(sources), args.batch_size):
+                yield sources[start:start + args.batch_size]
+
+        async def collect():
+            response = JSONArrayStreamingResponse(batches())
+            return [chunk async for chunk in response.body_iterator]
+        return asyncio.run(collect())
+
+    paths = {
+        "jsonable_encoder+json": lambda: [JSONResponse(jsonable_encoder(sources)).body],
+        "orjson": lambda: [FastJSONResponse(sources).body],
+        "orjson_streamed": streamed,
+    }
+    report = {"rows": args.rows, "results": {}}
+    for name, encode in paths.items():
+        report["results"][name] = measure(encode, args.rounds, response_config.GZIP_LEVEL)
+    # Усі шляхи мають давати той самий JSON
+    decoded = {name: json.loads(b"".join(encode())) for name, encode in paths.items()}
+    report["identical_output"] = all(value == decoded["orjson"] for value in decoded.values())
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ import {
   Tabs,
   Tab,
 } from '@mui/material';
-import FileUpload from './components/FileUpload';
+import FileUpload, { IngestionJob } from './components/FileUpload';
 import SearchMedia from './components/SearchMedia';
 import SearchResults from './components/SearchResults';
 import SourcesList from './components/SourcesList';
@@ -52,6 +52,7 @@ interface MediaResult {
 }
 
 const API_BASE_URL = 'http://localhost:8000/api/v1';
+const WS_BASE_URL = API_BASE_URL.replace(/^http/, 'ws');
 
 function App() {
   const [isSearching, setIsSearching] = useState(false);
@@ -66,6 +67,7 @@ function App() {
     open: false,
   });
   const [tabValue, setTabValue] = useState(0);
+  const [ingestions, setIngestions] = useState<Record<string, IngestionJob>>({});
 
   const showNotification = (message: string, type: 'success' | 'error') => {
     setNotification({
@@ -83,6 +85,40 @@ function App() {
     setTabValue(newValue);
   };
 
+  const updateIngestion = (job: IngestionJob) => {
+    setIngestions((prev) => ({ ...prev, [job.job_id]: job }));
+  };
+
+  const trackIngestion = (jobId: string, filename: string) => {
+    updateIngestion({
+      job_id: jobId,
+      filename,
+      status: 'queued',
+      rows_total: 0,
+      rows_parsed: 0,
+      inserted: 0,
+      updated: 0,
+      rejected: 0,
+      eta_seconds: null,
+    });
+
+    // Сервер надсилає стан після кожного пакета рядків і закриває з'єднання в кінці
+    const socket = new WebSocket(`${WS_BASE_URL}/ingestions/${jobId}/ws`);
+    socket.onmessage = (event) => {
+      const job: IngestionJob = JSON.parse(event.data);
+      updateIngestion(job);
+      if (job.status === 'completed') {
+        showNotification(
+          `${job.filename}: додано ${job.inserted}, оновлено ${job.updated}, відхилено ${job.rejected}`,
+          'success'
+        );
+      } else if (job.status === 'failed' || job.status === 'interrupted') {
+        showNotification(job.error || 'Помилка імпорту файлу', 'error');
+      }
+    };
+    socket.onerror = () => socket.close();
+  };
+
   const handleFileUpload = async (file: File) => {
     const formData = new FormData();
     formData.append('file', file);
@@ -95,7 +131,8 @@ function App() {
       const data = await response.json();
       
       if (response.ok) {
-        showNotification('Файл успішно завантажено', 'success');
+        showNotification(`Файл ${file.name} прийнято, імпорт триває`, 'success');
+        trackIngestion(data.job_id, file.name);
       } else {
         throw new Error(data.detail || 'Помилка завантаження файлу');
       }
@@ -182,7 +219,7 @@ function App() {
           </TabPanel>
 
           <TabPanel value={tabValue} index={2}>
-            <FileUpload onFileUpload={handleFileUpload} />
+            <FileUpload onFileUpload={handleFileUpload} jobs={Object.values(ingestions)} />
           </TabPanel>
         </Container>
       </Box>
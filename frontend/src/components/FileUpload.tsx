@@ -1,21 +1,71 @@
 import React from 'react';
 import { useDropzone } from 'react-dropzone';
-import { Box, Typography, Paper } from '@mui/material';
+import { Box, Typography, Paper, LinearProgress } from '@mui/material';
 import CloudUploadIcon from '@mui/icons-material/CloudUpload';
 
+export interface IngestionJob {
+  job_id: string;
+  filename: string;
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'interrupted';
+  rows_total: number;
+  rows_parsed: number;
+  inserted: number;
+  updated: number;
+  rejected: number;
+  eta_seconds: number | null;
+  error?: string;
+}
+
 interface FileUploadProps {
   onFileUpload: (file: File) => void;
+  jobs?: IngestionJob[];
 }
 
-const FileUpload: React.FC<FileUploadProps> = ({ onFileUpload }) => {
+const STATUS_LABELS: Record<IngestionJob['status'], string> = {
+  queued: 'У черзі',
+  running: 'Імпорт',
+  completed: 'Завершено',
+  failed: 'Помилка',
+  interrupted: 'Перервано',
+};
+
+const IngestionProgress: React.FC<{ job: IngestionJob }> = ({ job }) => {
+  const percent = job.rows_total > 0 ? Math.min((job.rows_parsed / job.rows_total) * 100, 100) : 0;
+  const finished = job.status === 'completed';
+
+  return (
+    <Box sx={{ mt: 2 }}>
+      <Typography variant="subtitle2">
+        {job.filename} — {STATUS_LABELS[job.status]}
+      </Typography>
+      <LinearProgress
+        variant={job.status === 'queued' ? 'indeterminate' : 'determinate'}
+        value={finished ? 100 : percent}
+        color={job.status === 'failed' || job.status === 'interrupted' ? 'error' : 'primary'}
+        sx={{ my: 1 }}
+      />
+      <Typography variant="body2" color="textSecondary">
+        Оброблено {job.rows_parsed} з {job.rows_total} рядків · додано {job.inserted} ·
+        оновлено {job.updated} · відхилено {job.rejected}
+        {job.status === 'running' && job.eta_seconds !== null && ` · залишилось ~${job.eta_seconds} с`}
+      </Typography>
+      {job.error && (
+        <Typography variant="body2" color="error">
+          {job.error}
+        </Typography>
+      )}
+    </Box>
+  );
+};
+
+const FileUpload: React.FC<FileUploadProps> = ({ onFileUpload, jobs = [] }) => {
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     accept: {
       'text/csv': ['.csv'],
     },
     onDrop: (acceptedFiles) => {
-      if (acceptedFiles.length > 0) {
-        onFileUpload(acceptedFiles[0]);
-      }
+      // Кожен файл імпортується окремою фоновою задачею
+      acceptedFiles.forEach((file) => onFileUpload(file));
     },
   });
 
@@ -52,6 +102,9 @@ const FileUpload: React.FC<FileUploadProps> = ({ onFileUpload }) => {
           Підтримуються тільки CSV файли
         </Typography>
       </Box>
+      {jobs.map((job) => (
+        <IngestionProgress key={job.job_id} job={job} />
+      ))}
     </Paper>
   );
 };
@@ -14,13 +14,25 @@ import {
 } from '@mui/material';
 
 interface Source {
+  _id?: string;
   domain: string;
   name: string;
   url: string;
   created_at?: string;
   found_at?: string;
+  is_verified?: boolean;
 }
 
+interface FeedEvent {
+  cursor: string;
+  type: 'hello' | 'reset' | 'lagged' | 'source_added' | 'source_verified' | 'sources_synced';
+  source?: Source;
+  source_id?: string;
+  source_ids?: string[];
+}
+
+const API_BASE_URL = 'http://localhost:8000/api/v1';
+
 interface TabPanelProps {
   children?: React.ReactNode;
   index: number;
@@ -56,22 +68,73 @@ const SourcesList: React.FC = () => {
 
   useEffect(() => {
     // Завантаження відомих джерел
-    fetch('http://localhost:8000/api/v1/known-sources')
+    fetch(`${API_BASE_URL}/known-sources`)
       .then(response => response.json())
       .then(data => setKnownSources(Array.isArray(data) ? data : []))
       .catch(error => {
         console.error('Error fetching known sources:', error);
         setKnownSources([]);
       });
+  }, []);
 
-    // Завантаження нових джерел
-    fetch('http://localhost:8000/api/v1/new-sources')
-      .then(response => response.json())
-      .then(data => setNewSources(Array.isArray(data) ? data : []))
-      .catch(error => {
-        console.error('Error fetching new sources:', error);
-        setNewSources([]);
-      });
+  useEffect(() => {
+    let events: EventSource | null = null;
+    let closed = false;
+
+    // Список завантажується один раз; далі зміни приходять зі стрічки від курсора списку
+    const loadNewSources = () => {
+      events?.close();
+      fetch(`${API_BASE_URL}/new-sources`)
+        .then(response => {
+          const cursor = response.headers.get('X-Feed-Cursor');
+          return response.json().then(data => ({ data, cursor }));
+        })
+        .then(({ data, cursor }) => {
+          setNewSources(Array.isArray(data) ? data : []);
+          if (!closed) {
+            subscribe(cursor);
+          }
+        })
+        .catch(error => {
+          console.error('Error fetching new sources:', error);
+          setNewSources([]);
+        });
+    };
+
+    const handleEvent = (message: MessageEvent) => {
+      const event: FeedEvent = JSON.parse(message.data);
+      if (event.type === 'source_added' && event.source) {
+        const added = event.source;
+        setNewSources(prev =>
+          prev.some(source => source.url === added.url) ? prev : [...prev, added]
+        );
+      } else if (event.type === 'source_verified') {
+        setNewSources(prev =>
+          prev.map(source => (source._id === event.source_id ? { ...source, is_verified: true } : source))
+        );
+      } else if (event.type === 'sources_synced') {
+        const moved = new Set(event.source_ids || []);
+        setNewSources(prev => prev.filter(source => !source._id || !moved.has(source._id)));
+      } else if (event.type === 'reset') {
+        // Курсор застарів (перезапуск сервера або переповнений буфер)
+        loadNewSources();
+      }
+    };
+
+    const subscribe = (cursor: string | null) => {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      // EventSource сам перепідключається і передає Last-Event-ID
+      events = new EventSource(`${API_BASE_URL}/new-sources/stream${query}`);
+      ['source_added', 'source_verified', 'sources_synced', 'reset'].forEach(type =>
+        events?.addEventListener(type, handleEvent as EventListener)
+      );
+    };
+
+    loadNewSources();
+    return () => {
+      closed = true;
+      events?.close();
+    };
   }, []);
 
   const renderSourcesTable = (sources: Source[]) => (
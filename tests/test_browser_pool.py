@@ -0,0 +1,50 @@
+"""Browser pool process management.
+
+Chrome is replaced by a driver module that fails to start; without a
+driver a worker returns the URL unchanged, which is enough to exercise
+dispatching and worker replacement.
+"""
+import time
+
+import pytest
+
+from backend.services.browser_pool import BrowserPool, BrowserPoolError, RemoteBrowserPool, serve_pool
+from backend.services.metrics import BROWSER_RESTARTS
+
+FAKE_DRIVER = """
+class ChromeOptions:
+    def add_argument(self, argument):
+        pass
+
+def Chrome(**kwargs):
+    raise RuntimeError("Chrome is not available in tests")
+"""
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    # Воркери (spawn) отримують sys.path батька: там Chrome не запускається
+    (tmp_path / "undetected_chromedriver.py").write_text(FAKE_DRIVER)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    pool = BrowserPool(size=1, task_timeout=20)
+    yield pool
+    pool.shutdown()
+
+def test_dead_idle_worker_is_replaced_on_acquire(pool):
+    assert pool.resolve("https://a.ua/") == "https://a.ua/"
+    worker = next(iter(pool._workers.values()))
+    restarts = BROWSER_RESTARTS.value(reason="crash")
+    worker.process.kill()
+    worker.process.join()
+
+    started = time.monotonic()
+    assert pool.resolve("https://b.ua/") == "https://b.ua/"
+    assert time.monotonic() - started < pool.task_timeout / 2
+    assert BROWSER_RESTARTS.value(reason="crash") == restarts + 1
+    assert worker.id not in pool._workers and len(pool._workers) == 1
+
+@pytest.mark.parametrize("authkey", ["", "sm_parse"])
+def test_remote_pool_requires_secret_authkey(authkey):
+    with pytest.raises(BrowserPoolError):
+        serve_pool("127.0.0.1:0", authkey, size=1, task_timeout=5)
+    with pytest.raises(BrowserPoolError):
+        RemoteBrowserPool("127.0.0.1:1", authkey).resolve("https://a.ua/")
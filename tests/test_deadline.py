@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from backend.services import deadline as deadline_module
+from backend.services.deadline import Deadline, DeadlineExceeded
+
+def drained():
+    for _ in range(200):
+        if not deadline_module._Stage.abandoned_count:
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture
+def hung():
+    release = threading.Event()
+    yield release
+    release.set()
+    assert drained()
+
+def abandon(release, count):
+    for _ in range(count):
+        deadline = Deadline(20)
+        with pytest.raises(DeadlineExceeded):
+            deadline.run("hung", release.wait)
+        assert deadline.exceeded
+
+def test_hung_stages_do_not_delay_other_requests(hung, monkeypatch):
+    # Більше завислих етапів, ніж було потоків у спільному пулі
+    monkeypatch.setattr(deadline_module._Stage, "max_abandoned", 100)
+    abandon(hung, 40)
+    started = time.monotonic()
+    assert Deadline(1000).run("fast", lambda: "ok") == "ok"
+    assert time.monotonic() - started < 0.5
+
+def test_abandoned_stages_are_bounded(hung, monkeypatch):
+    monkeypatch.setattr(deadline_module._Stage, "max_abandoned", 2)
+    abandon(hung, 2)
+    calls = []
+    with pytest.raises(DeadlineExceeded):
+        Deadline(1000).run("skipped", calls.append, 1)
+    assert not calls
+
+    # Завислі етапи завершились - ліміт звільнився
+    hung.set()
+    assert drained()
+    assert Deadline(1000).run("resumed", lambda: "ok") == "ok"
+
+def test_without_budget_runs_inline():
+    assert Deadline().run("inline", threading.current_thread) is threading.current_thread()
+
+def test_shared_search_reports_the_cut_budget(monkeypatch):
+    from backend.services import search_service as search_module
+    from backend.services.search_service import SearchService
+
+    service = SearchService(use_browser=False)
+    service.ddg_backend = lambda query, max_results: time.sleep(0.3) or []
+    monkeypatch.setattr(service, "google_news_entries", lambda query: [])
+    monkeypatch.setattr(search_module.provider_cache, "get", lambda provider, query, params, fetch: fetch())
+
+    deadlines = [Deadline(100), Deadline(100)]
+    outcomes = []
+
+    def search(deadline):
+        outcomes.append(service.search_media("news", deadline=deadline))
+
+    leader = threading.Thread(target=search, args=(deadlines[0],))
+    leader.start()
+    time.sleep(0.03)
+    follower = threading.Thread(target=search, args=(deadlines[1],))
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert outcomes == [[], []]
+    # Спільний результат обрізано бюджетом - це бачить і той, хто його лише отримав
+    assert all(deadline.exceeded for deadline in deadlines)
@@ -0,0 +1,132 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.services.fetch_scheduler import FetchScheduler, TokenBucket, parse_retry_after
+
+class FakeClock:
+    """Монотонний годинник, який рухається лише вручну."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class Robots:
+    """Заглушка session.get для robots.txt: рахує завантаження."""
+
+    def __init__(self, text="User-agent: *\nDisallow: /private", status_code=200):
+        self.text = text
+        self.status_code = status_code
+        self.calls = 0
+
+    def __call__(self, url, timeout=None):
+        self.calls += 1
+        return self
+
+def test_bucket_paces_burst_and_backs_off_multiplicatively():
+    clock = FakeClock()
+    bucket = TokenBucket(4.0, capacity=1.0, clock=clock)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.25)
+
+    clock.advance(1)
+    assert bucket.on_throttle() == 2.0
+    assert bucket.rate == 2.0
+    assert bucket.reserve() == pytest.approx(2.0)
+    assert bucket.on_throttle() == 4.0
+    assert bucket.rate == 1.0
+    for _ in range(5):
+        bucket.on_throttle()
+    assert bucket.rate == bucket.min_rate == 0.25
+
+def test_bucket_recovers_additively_after_successes():
+    bucket = TokenBucket(4.0, recover_after=2, clock=FakeClock())
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 1.0
+    bucket.on_success()
+    assert bucket.rate == 1.0
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(1.4)
+    assert bucket.failures == 0
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == 4.0
+
+def test_retry_after_blocks_bucket_for_given_delay():
+    clock = FakeClock()
+    bucket = TokenBucket(10.0, capacity=5.0, clock=clock)
+    assert bucket.on_throttle(retry_after=30.0) == 30.0
+    assert bucket.reserve() == pytest.approx(30.0)
+    clock.advance(30)
+    assert bucket.reserve() == 0.0
+
+def test_parse_retry_after():
+    now = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after("Mon, 19 Oct 2026 12:01:30 GMT", now=now) == 90.0
+    assert parse_retry_after("Mon, 19 Oct 2026 11:00:00 GMT", now=now) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+def test_report_honours_retry_after_header():
+    clock = FakeClock()
+    scheduler = FetchScheduler(clock=clock)
+    assert scheduler.report("https://a.ua/x", status=429, retry_after="45") == 45.0
+    assert scheduler.report("https://a.ua/y", status=200) is None
+    assert scheduler._bucket("host:a.ua").reserve() == pytest.approx(45.0)
+
+def test_robots_are_cached_until_ttl():
+    clock = FakeClock()
+    scheduler = FetchScheduler(robots_ttl=60, clock=clock)
+    scheduler.session.get = robots = Robots()
+    assert scheduler.allowed("https://a.ua/news")
+    assert not scheduler.allowed("https://a.ua/private/1")
+    assert robots.calls == 1
+
+    clock.advance(61)
+    robots.text = "User-agent: *\nDisallow: /"
+    assert not scheduler.allowed("https://a.ua/news")
+    assert robots.calls == 2
+
+def test_missing_robots_does_not_block():
+    scheduler = FetchScheduler(clock=FakeClock())
+    scheduler.session.get = Robots(text="", status_code=404)
+    assert scheduler.allowed("https://a.ua/private/1")
+
+def test_idle_host_buckets_are_evicted_lru():
+    clock = FakeClock()
+    scheduler = FetchScheduler(max_hosts=2, clock=clock)
+    scheduler.wait("https://a.ua/")
+    scheduler.wait("https://b.ua/")
+    clock.advance(10)
+    scheduler.wait("https://a.ua/")
+    scheduler.wait("https://c.ua/")
+    assert list(scheduler._buckets) == ["host:a.ua", "host:c.ua"]
+
+def test_backing_off_host_is_not_evicted():
+    clock = FakeClock()
+    scheduler = FetchScheduler(max_hosts=2, clock=clock)
+    scheduler.report("https://a.ua/", status=503, retry_after="600")
+    clock.advance(10)
+    scheduler.wait("https://b.ua/")
+    clock.advance(10)
+    scheduler.wait("https://c.ua/")
+    assert "host:a.ua" in scheduler._buckets
+    assert "host:b.ua" not in scheduler._buckets
+    assert scheduler._bucket("host:a.ua").reserve() == pytest.approx(580.0)
+
+def test_robots_cache_is_bounded():
+    scheduler = FetchScheduler(max_hosts=2, clock=FakeClock())
+    scheduler.session.get = robots = Robots()
+    for host in ("a.ua", "b.ua", "c.ua"):
+        scheduler.allowed(f"https://{host}/")
+    assert list(scheduler._robots) == ["https://b.ua", "https://c.ua"]
+    scheduler.allowed("https://a.ua/")
+    assert robots.calls == 4
@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+
+from backend.services.liveness import LivenessChecker
+
+def make_checker(monkeypatch, handler):
+    checker = LivenessChecker(ttl=600, negative_ttl=300, unknown_ttl=5)
+    checker._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    checker._semaphore = asyncio.Semaphore(4)
+
+    async def resolves(domain):
+        return True
+
+    monkeypatch.setattr(checker, "_resolves", resolves)
+    monkeypatch.setattr(checker, "_proxied", lambda domain: False)
+    return checker
+
+def test_timeouts_are_unknown_not_dead(monkeypatch):
+    def handler(request):
+        if request.url.host == "slow.ua":
+            raise httpx.ReadTimeout("timed out", request=request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    checker = make_checker(monkeypatch, handler)
+    results = asyncio.run(checker.check_many(["slow.ua", "gone.ua"]))
+
+    assert results["slow.ua"]["status"] == "unknown"
+    assert not checker.is_dropped(results["slow.ua"])
+    assert checker.is_unknown(results["slow.ua"])
+    assert checker.is_dropped(results["gone.ua"])
+    # Невизначений результат кешується лише ненадовго
+    expires = {domain: checker._entries[domain][1] for domain in ("slow.ua", "gone.ua")}
+    assert expires["gone.ua"] - expires["slow.ua"] > 250
+
+def test_live_and_parked(monkeypatch):
+    def handler(request):
+        if request.url.host == "parked.ua":
+            return httpx.Response(200, text="This domain is for sale")
+        return httpx.Response(403)
+
+    checker = make_checker(monkeypatch, handler)
+    results = asyncio.run(checker.check_many(["news.ua", "parked.ua"]))
+    assert results["news.ua"]["status"] == "live"
+    assert results["parked.ua"]["status"] == "parked"
+
+def test_www_only_site_is_not_dead(monkeypatch):
+    def handler(request):
+        if request.url.host == "www.wwwonly.ua":
+            return httpx.Response(200, text="<html><title>Новини</title></html>")
+        raise httpx.ConnectError("connection refused", request=request)
+
+    checker = make_checker(monkeypatch, handler)
+
+    async def resolves(domain):
+        # Лише www. має A-запис
+        return domain == "www.wwwonly.ua"
+
+    monkeypatch.setattr(checker, "_resolves", resolves)
+    results = asyncio.run(checker.check_many(["wwwonly.ua", "nowhere.ua"]))
+    assert results["wwwonly.ua"]["status"] == "live"
+    assert results["wwwonly.ua"]["final_url"] == "http://www.wwwonly.ua/"
+    assert results["nowhere.ua"]["status"] == "dead"
+    assert results["nowhere.ua"]["reason"] == "DNS lookup failed"
+
+def test_apex_refusing_connections_falls_back_to_www(monkeypatch):
+    def handler(request):
+        if request.url.host == "www.split.ua":
+            return httpx.Response(200)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    checker = make_checker(monkeypatch, handler)
+    assert asyncio.run(checker.check_many(["split.ua"]))["split.ua"]["status"] == "live"
@@ -0,0 +1,158 @@
+"""LLM call policy against the scripted LLM stand-in (benchmarks/fake_servers.py)."""
+import time
+
+import pytest
+import requests
+
+from backend.services.llm_client import CircuitBreaker, LLMClient, is_service_failure
+from backend.services.metrics import LLM_REJECTED
+from benchmarks.fake_servers import start_fake_servers
+
+PARAMS = {"url": "media0001.com.ua"}
+
+@pytest.fixture(scope="module")
+def llm_url():
+    process, urls = start_fake_servers({"llm_latency_ms": 30.0, "llm_jitter_ms": 0.0})
+    yield urls["llm"]
+    process.terminate()
+
+def configure(url: str, **settings) -> None:
+    requests.post(f"{url}/_config", json=settings, timeout=5).raise_for_status()
+
+def served(url: str) -> int:
+    return requests.get(f"{url}/_stats", timeout=5).json()["requests"]
+
+@pytest.fixture
+def llm(llm_url):
+    configure(llm_url, llm_latency_ms=30.0, llm_jitter_ms=0.0, llm_slow_rate=0.0,
+              llm_failure_rate=0.0, llm_invalid_rate=0.0, llm_slow_next=0)
+    return llm_url
+
+def warm_up(client: LLMClient, calls: int) -> None:
+    for _ in range(calls):
+        assert client.query(PARAMS) is not None
+
+def test_deadline_follows_observed_p95(llm):
+    client = LLMClient(llm + "/", min_deadline=0.05, max_deadline=5.0, min_samples=10)
+    assert client.deadline() == 5.0 and client.hedge_delay() is None
+
+    warm_up(client, 10)
+    p95 = client.latency.percentile(95)
+    assert client.deadline() == pytest.approx(max(0.05, p95 * 2))
+    assert client.deadline() < 0.5
+
+    # Завислий сервіс: виклик обривається за адаптивним дедлайном, а не за max_deadline
+    configure(llm, llm_latency_ms=2000.0)
+    deadline = client.deadline()
+    started = time.monotonic()
+    assert client.query(PARAMS) is None
+    assert time.monotonic() - started < deadline + 0.2
+    assert client.breaker.failures == 1
+    # Таймаут враховано як спостереження - дедлайн не звужується
+    assert client.latency.percentile(100) == pytest.approx(deadline)
+
+def test_deadline_is_clamped(llm):
+    client = LLMClient(llm + "/", min_deadline=1.0, max_deadline=5.0, min_samples=5)
+    warm_up(client, 5)
+    assert client.deadline() == 1.0
+
+def test_hedged_call_answers_for_slow_primary(llm):
+    client = LLMClient(llm + "/", min_deadline=0.05, max_deadline=5.0, min_samples=20)
+    warm_up(client, 20)
+    hedge_delay = client.hedge_delay()
+    assert hedge_delay is not None and hedge_delay < client.deadline()
+
+    # Наступний запит (основний) у 10 разів повільніший; дубль - звичайний
+    configure(llm, llm_slow_next=1)
+    before = served(llm)
+    started = time.monotonic()
+    assert client.query(PARAMS) is not None
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.25, f"hedged call took {elapsed:.3f}s"
+    assert served(llm) - before == 2
+    assert client.breaker.state == "closed"
+
+def test_no_hedge_for_fast_calls(llm):
+    client = LLMClient(llm + "/", min_deadline=0.5, max_deadline=5.0, min_samples=5, hedge_percentile=100)
+    warm_up(client, 5)
+    configure(llm, llm_latency_ms=10.0)
+    before = served(llm)
+    warm_up(client, 3)
+    assert served(llm) - before == 3
+
+def test_breaker_open_half_open_close(llm):
+    client = LLMClient(llm + "/", breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.3))
+    configure(llm, llm_failure_rate=1.0)
+    for _ in range(3):
+        assert client.query(PARAMS) is None
+    assert client.breaker.state == "open"
+
+    # Відкритий запобіжник відхиляє виклики, не звертаючись до сервісу
+    before, rejected = served(llm), LLM_REJECTED.value()
+    assert client.query(PARAMS) is None
+    assert served(llm) == before
+    assert LLM_REJECTED.value() == rejected + 1
+
+    # Напіввідкритий: одна пробна спроба; невдача знову відкриває
+    time.sleep(0.35)
+    assert client.query(PARAMS) is None
+    assert served(llm) == before + 1
+    assert client.breaker.state == "open"
+    assert client.query(PARAMS) is None
+    assert served(llm) == before + 1
+
+    # Сервіс відновився: пробна спроба успішна і закриває запобіжник
+    configure(llm, llm_failure_rate=0.0)
+    time.sleep(0.35)
+    assert client.query(PARAMS) is not None
+    assert client.breaker.state == "closed" and client.breaker.failures == 0
+    assert client.query(PARAMS) is not None
+
+def test_invalid_answers_do_not_open_breaker(llm):
+    client = LLMClient(llm + "/", breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    configure(llm, llm_invalid_rate=1.0)
+    for _ in range(5):
+        assert client.query(PARAMS) is None
+    assert client.breaker.state == "closed" and client.breaker.failures == 0
+    configure(llm, llm_invalid_rate=0.0)
+    assert client.query(PARAMS) is not None
+
+def test_invalid_answer_closes_half_open_breaker(llm):
+    client = LLMClient(llm + "/", breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.1))
+    configure(llm, llm_failure_rate=1.0)
+    assert client.query(PARAMS) is None
+    assert client.breaker.state == "open"
+    # Пробний виклик отримав відповідь, хай і непридатну: сервіс живий
+    configure(llm, llm_failure_rate=0.0, llm_invalid_rate=1.0)
+    time.sleep(0.15)
+    assert client.query(PARAMS) is None
+    assert client.breaker.state == "closed"
+
+def test_unreachable_service_opens_breaker():
+    client = LLMClient("http://127.0.0.1:9/", breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    assert client.query(PARAMS) is None
+    assert client.query(PARAMS) is None
+    assert client.breaker.state == "open"
+
+def test_service_failure_classification():
+    def http_error(status):
+        response = requests.Response()
+        response.status_code = status
+        return requests.HTTPError(response=response)
+
+    assert is_service_failure(None)
+    assert is_service_failure(requests.Timeout())
+    assert is_service_failure(requests.ConnectionError())
+    assert is_service_failure(http_error(503))
+    assert not is_service_failure(http_error(404))
+    assert not is_service_failure(ValueError("LLM response is not a JSON object"))
+    assert not is_service_failure(requests.JSONDecodeError("Expecting value", "Sorry", 0))
+
+def test_breaker_counts_consecutive_failures_only():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
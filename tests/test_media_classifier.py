@@ -0,0 +1,70 @@
+from backend.services.media_classifier import MediaClassifier, extract_features, llm_labels, site_name
+
+SOURCES = [
+    {"url": f"https://{name}{i}.ua/news", "name": f"{title} {i}", "media_type": media_type, "region": region}
+    for i in range(10)
+    for name, title, media_type, region in [
+        ("kyivnews", "Новини Києва", "online", "Київ"),
+        ("lvivradio", "Радіо Львова", "radio", "Львів"),
+    ]
+]
+
+def test_serving_uses_training_features():
+    # Шлях статті та решта <head> не дають ознак, яких не було при навчанні
+    metadata = {"title": "Новини Києва 3 - головне за день", "description": "радіо ефір", "language": "uk",
+                "opengraph": {"site_name": "Новини Києва 3", "type": "article"}, "feeds": [{"url": "/rss"}]}
+    assert site_name(metadata) == "Новини Києва 3"
+    assert (extract_features("https://kyivnews3.ua/2024/10/01/some-story", site_name(metadata))
+            == extract_features("https://kyivnews3.ua/news", "Новини Києва 3"))
+
+def test_classifies_unseen_site():
+    classifier = MediaClassifier(targets=["media_type", "region"], threshold=0.9)
+    assert classifier.fit(SOURCES) == 20
+    classified = classifier.classify("https://lvivradio42.ua/2024/10/01/story", name="Радіо Львова 42")
+    assert classified["predictions"]["media_type"]["label"] == "radio"
+    assert classified["predictions"]["region"]["label"] == "Львів"
+    assert classified["confident"]
+
+def test_search_answers_confident_sites_without_llm(monkeypatch):
+    from backend.services import search_service as search_module
+    from backend.services.search_service import SearchService
+
+    classifier = MediaClassifier(targets=["media_type", "region"], threshold=0.9)
+    classifier.fit(SOURCES)
+    monkeypatch.setattr(search_module, "media_classifier", classifier)
+    monkeypatch.setattr(search_module.metadata_fetcher, "fetch", lambda url: {
+        "title": "Радіо Львова 42", "description": "Ефір", "language": "uk", "feeds": []})
+    llm_calls = []
+    monkeypatch.setattr(search_module.llm_client, "query", lambda payload: llm_calls.append(payload))
+
+    service = SearchService(use_browser=False)
+    analysis = service._analyze_url("https://lvivradio42.ua/2024/10/01/story")
+    assert analysis == {"domain": "lvivradio42.ua", "description": "Ефір", "classified_by": "local",
+                        "type": "radio", "coverage": "local", "media_type": "radio", "region": "Львів"}
+    assert not llm_calls
+
+    # Невпевнений випадок іде до ШІ як раніше
+    monkeypatch.setattr(search_module.metadata_fetcher, "fetch", lambda url: None)
+    assert service._analyze_url("https://example.com/story")["domain"] == "example.com"
+    assert len(llm_calls) == 1
+
+def test_registry_labels_map_to_llm_vocabulary():
+    def predictions(**labels):
+        return {target: {"label": label, "confidence": 1.0} for target, label in labels.items()}
+
+    assert llm_labels(predictions(media_type="Телебачення", region="Всеукраїнське")) == {
+        "type": "tv", "coverage": "national", "category": "news"}
+    assert llm_labels(predictions(media_type="Інше", super_type="Блог", region="Одеська область")) == {
+        "type": "blog", "coverage": "regional", "category": "blog"}
+    assert llm_labels(predictions(media_type="Інше", region=None)) == {
+        "type": None, "coverage": None, "category": None}
+
+def test_domain_category_stays_in_analyzer_vocabulary(monkeypatch):
+    from backend.services import domain_service
+
+    classifier = MediaClassifier(targets=["media_type", "region"], threshold=0.9)
+    classifier.fit(SOURCES)
+    monkeypatch.setattr(domain_service, "media_classifier", classifier)
+    assert domain_service.domain_analyzer._detect_category("https://lvivradio42.ua/") == "news"
+    # Невпевнений випадок - ключові слова шляху
+    assert domain_service.domain_analyzer._detect_category("https://example.com/blog/") == "blog"
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api import media_routes
+from backend.api.media_routes import MediaResponse, media_response
+
+RESULT = {
+    "url": "https://poltava.news/",
+    "domain": "poltava.news",
+    "description": "Новини Полтави",
+    "found_at": datetime(2026, 10, 19, 12, 0),
+    "enrichment": "analyzed",
+}
+
+class Discovery:
+    skipped = 0
+
+@pytest.fixture
+def client(monkeypatch):
+    saved = []
+
+    async def load(query, skip_seen=False):
+        return Discovery()
+
+    async def save(states):
+        pass
+
+    async def add_new_source(source):
+        saved.append(source["url"])
+
+    monkeypatch.setattr(media_routes.discovery_service, "load", load)
+    monkeypatch.setattr(media_routes.discovery_service, "save", save)
+    monkeypatch.setattr(media_routes.db_service, "add_new_source", add_new_source)
+    monkeypatch.setattr(media_routes.search_service, "search_media",
+                        lambda query, max_results, batch, discovery, deadline: [dict(RESULT)])
+    app = FastAPI()
+    app.include_router(media_routes.router)
+    test_client = TestClient(app)
+    test_client.saved = saved
+    return test_client
+
+def test_media_response_generates_id_like_the_model():
+    body = media_response(RESULT)
+    assert ObjectId.is_valid(body["_id"])
+    assert body["_id"] != media_response(RESULT)["_id"]
+    assert body["found_at"] == "2026-10-19T12:00:00"
+    # Відповідь без моделі збігається з тим, що видала б модель
+    model = MediaResponse(**RESULT).model_dump(by_alias=True)
+    assert set(body) == set(model)
+    assert MediaResponse.model_validate(body).url == RESULT["url"]
+
+def test_media_response_keeps_existing_id():
+    doc_id = str(ObjectId())
+    assert media_response(dict(RESULT, _id=doc_id))["_id"] == doc_id
+
+def test_search_media_returns_model_shaped_results(client):
+    response = client.post("/search-media", json={"query": "новини полтави"})
+    assert response.status_code == 200
+    assert "X-Search-Partial" not in response.headers
+    [body] = response.json()
+    assert ObjectId.is_valid(body["_id"])
+    assert MediaResponse.model_validate(body).domain == "poltava.news"
+    assert client.saved == ["https://poltava.news/"]
@@ -0,0 +1,30 @@
+from backend.services import domain_service
+from backend.services import page_archive as archive_module
+from backend.services.page_archive import PageArchive
+from backend.services.search_service import SearchService
+
+PAGE = """<html lang="en"><head><title>Новини Полтави</title></head><body>
+<article><div class="published-date">19.10.2026</div>
+<p>Міська рада ухвалила бюджет на наступний рік, депутати обговорили видатки на освіту й ремонт доріг.</p>
+<a class="share-facebook">Поділитися</a></article></body></html>""".encode("utf-8")
+
+def test_put_and_get_round_trip(tmp_path):
+    archive = PageArchive(root=str(tmp_path))
+    digest = archive.put("https://poltava.news/", PAGE, headers={"ETag": '"v1"'})
+    assert archive.put("https://poltava.news/copy", PAGE) == digest
+    assert archive.get("https://poltava.news/")["content"] == PAGE
+    assert archive.conditional_headers("https://poltava.news/") == {"If-None-Match": '"v1"'}
+    assert archive.stats()["blobs"] == 1
+
+def test_analyzers_read_archived_pages(tmp_path, monkeypatch):
+    archive = PageArchive(root=str(tmp_path))
+    archive.put("https://poltava.news/", PAGE)
+    monkeypatch.setattr(archive_module, "page_archive", archive)
+
+    def offline(url):
+        raise AssertionError(f"fetched {url}")
+
+    monkeypatch.setattr(domain_service.metadata_fetcher, "fetch", offline)
+    assert SearchService(use_browser=False).is_news_website("https://poltava.news/")
+    # Мова - за текстом сторінки з архіву, а не з <html lang>
+    assert domain_service.domain_analyzer.analyze_domain("https://poltava.news/")["language"] == "uk"
@@ -0,0 +1,81 @@
+import pytest
+
+from backend.config.metadata_config import metadata_config
+from backend.services import search_service as search_module
+from backend.services.fetch_scheduler import FetchDisallowed
+from backend.services.html_analysis import HeadParser, parse_head
+from backend.services.page_metadata import HeadParseError
+from backend.services.search_service import SearchService
+
+HEAD = """<!DOCTYPE html><html lang="uk-UA"><head>
+<meta charset="utf-8"><title>  Новини
+ Полтави </title>
+<meta name="description" content="Головне за день">
+<meta property="og:description" content="OpenGraph опис">
+<meta property="og:site_name" content="Полтава.News">
+<meta property="og:type" content="website">
+<link rel="canonical" href="/">
+<link rel="alternate" type="application/rss+xml" href="/rss" title="RSS">
+<link rel="alternate" hreflang="en" href="/en/">
+"""
+
+def test_parse_head():
+    assert parse_head(HEAD, "https://poltava.news/page") == {
+        "title": "Новини Полтави",
+        "description": "Головне за день",
+        "language": "uk",
+        "canonical_url": "https://poltava.news/",
+        "feeds": [{"url": "https://poltava.news/rss", "type": "application/rss+xml", "title": "RSS"}],
+        "opengraph": {"description": "OpenGraph опис", "site_name": "Полтава.News", "type": "website"},
+    }
+
+def test_parse_head_fallbacks():
+    metadata = parse_head('<head><meta property="og:locale" content="ru_RU">'
+                          '<meta name="twitter:description" content="Опис"></head>', "https://a.ua/")
+    assert metadata["language"] == "ru"
+    assert metadata["description"] == "Опис"
+    assert metadata["title"] is None and metadata["canonical_url"] is None
+
+def test_head_parser_keeps_first_meta_and_truncated_input():
+    parser = HeadParser()
+    parser.feed('<html lang="en"><meta name="Description" content="first">'
+                '<meta name="description" content="second"><title>Обрізан')
+    parser.close()
+    assert parser.lang == "en"
+    assert parser.meta == {"description": "first"}
+    assert "".join(parser.title_parts) == "Обрізан"
+
+@pytest.mark.parametrize("error, downloads", [
+    (FetchDisallowed("Disallowed by robots.txt"), 0),
+    (ConnectionError("refused"), 0),
+    (None, 0),  # HTTP-помилка або не-HTML: fetch повертає None
+    (HeadParseError("broken head"), 1),
+])
+def test_newspaper_fallback_only_after_parse_failure(monkeypatch, error, downloads):
+    def fetch(url):
+        if error is not None:
+            raise error
+        return None
+
+    articles = []
+
+    class Article:
+        def __init__(self, url):
+            articles.append(url)
+            self.html, self.meta_description = "", "Опис"
+
+        def download(self):
+            pass
+
+        def parse(self):
+            pass
+
+    monkeypatch.setattr(metadata_config, "METADATA_NEWSPAPER_FALLBACK", True)
+    monkeypatch.setattr(search_module.metadata_fetcher, "fetch", fetch)
+    monkeypatch.setattr(search_module, "Article", Article)
+    monkeypatch.setattr(search_module.fetch_scheduler, "wait", lambda url: None)
+    service = SearchService(use_browser=False)
+    monkeypatch.setattr(service, "get_ai_analysis", lambda url: {"domain": "a.ua", "description": ""})
+
+    assert service.analyze_website("https://a.ua/") is not None
+    assert len(articles) == downloads
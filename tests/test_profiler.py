@@ -0,0 +1,34 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.metrics import track_stage
+from backend.services.profiler import profile_request, submit
+
+def busy_stage(seconds: float) -> str:
+    with track_stage("worker_stage"):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+    return "done"
+
+def test_profile_follows_work_submitted_to_executors(tmp_path):
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="worker") as pool:
+        with profile_request("search", str(tmp_path), interval=0.002) as profile:
+            # Потік запиту лише чекає - уся робота у виконавцях
+            futures = [submit(pool, busy_stage, 0.1) for _ in range(2)]
+            assert [future.result() for future in futures] == ["done", "done"]
+        # Поза профілем робота не записується
+        pool.submit(busy_stage, 0.01).result()
+
+    assert profile.stages["worker_stage"]["count"] == 2
+    assert profile.stages["worker_stage"]["loop_blocked"] == 0
+
+    with open(profile.output_path) as f:
+        speedscope = json.load(f)
+    names = [frame["name"] for frame in speedscope["shared"]["frames"]]
+    workers = [p for p in speedscope["profiles"] if "[worker" in p["name"]]
+    assert workers, [p["name"] for p in speedscope["profiles"]]
+    busy = names.index("busy_stage")
+    assert any(busy in stack for p in workers for stack in p["samples"])
+    assert not profile.threads()
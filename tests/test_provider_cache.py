@@ -0,0 +1,74 @@
+import time
+
+from backend.services.provider_cache import ProviderCache, normalize_query
+
+class Provider:
+    """Заглушка провайдера: повертає відповіді зі списку по черзі."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def cache(**kwargs):
+    return ProviderCache({"ddg": kwargs.pop("ttl", 60.0)}, **kwargs)
+
+def test_normalize_query():
+    assert normalize_query("  Новини   Київ ") == normalize_query("новини київ")
+
+def test_fresh_results_are_cached():
+    provider, provider_cache = Provider(["a"]), cache()
+    assert provider_cache.get("ddg", "Новини Київ", None, provider) == ["a"]
+    assert provider_cache.get("ddg", "новини  київ", None, provider) == ["a"]
+    assert provider.calls == 1
+
+def test_empty_results_expire_after_negative_ttl():
+    provider, provider_cache = Provider([], ["a"]), cache(negative_ttl=0.05)
+    assert provider_cache.get("ddg", "q", None, provider) == []
+    assert provider_cache.get("ddg", "q", None, provider) == []
+    assert provider.calls == 1
+    time.sleep(0.06)
+    assert provider_cache.get("ddg", "q", None, provider) == ["a"]
+    assert provider.calls == 2
+
+def test_negative_results_are_not_cached_without_ttl():
+    provider, provider_cache = Provider(None, [], ["a"]), cache(negative_ttl=0)
+    assert provider_cache.get("ddg", "q", None, provider) is None
+    assert provider_cache.get("ddg", "q", None, provider) == []
+    assert provider_cache.get("ddg", "q", None, provider) == ["a"]
+
+def test_custom_validity_check():
+    class Feed:
+        def __init__(self, entries):
+            self.entries = entries
+
+    broken, good = Feed([]), Feed(["entry"])
+    provider, provider_cache = Provider(broken, good), cache(negative_ttl=0)
+    valid = lambda feed: bool(feed.entries)
+    assert provider_cache.get("ddg", "q", None, provider, valid=valid) is broken
+    assert provider_cache.get("ddg", "q", None, provider, valid=valid) is good
+
+def test_empty_refresh_keeps_good_entry():
+    provider = Provider(["a"], [], RuntimeError("rate limited"))
+    provider_cache = cache(ttl=0.01, stale_while_revalidate=False)
+    assert provider_cache.get("ddg", "q", None, provider) == ["a"]
+    time.sleep(0.02)
+    # Порожня відповідь і помилка: віддаємо останній добрий результат
+    assert provider_cache.get("ddg", "q", None, provider) == ["a"]
+    assert provider_cache.get("ddg", "q", None, provider) == ["a"]
+    assert provider.calls == 3
+
+def test_stale_entry_is_served_and_refreshed():
+    provider = Provider(["a"], ["b"])
+    provider_cache = cache(ttl=0.01, max_stale=60)
+    assert provider_cache.get("ddg", "q", None, provider) == ["a"]
+    time.sleep(0.02)
+    assert provider_cache.get("ddg", "q", None, provider) == ["a"]
+    provider_cache._executor.shutdown(wait=True)
+    assert provider_cache.get("ddg", "q", None, provider) == ["b"]
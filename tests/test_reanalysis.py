@@ -0,0 +1,65 @@
+import asyncio
+
+from backend.services.reanalysis_service import ReanalysisService
+from backend.services.storage_service import SQLiteSourceStorage
+
+class FlakyAnalyzer:
+    """Замість мережі та пулу: записує оброблені URL, може впасти на N-му пакеті."""
+
+    def __init__(self, fail_on_batch=None):
+        self.urls = []
+        self.batches = 0
+        self.fail_on_batch = fail_on_batch
+
+    async def __call__(self, sources, client, semaphore, pool):
+        self.batches += 1
+        if self.batches == self.fail_on_batch:
+            raise RuntimeError("connection reset")
+        self.urls.extend(source["url"] for source in sources)
+        return [{"url": source["url"], "source_id": source["_id"], "status_code": 200} for source in sources]
+
+def service(storage, analyzer):
+    reanalysis = ReanalysisService(storage=storage, batch_size=10, processes=1)
+    # Без архіву: тест не чіпає ARCHIVE_DIR
+    reanalysis.archive = None
+    reanalysis._analyze_batch = analyzer
+    return reanalysis
+
+def test_run_analyzes_every_source_once():
+    async def main():
+        storage = SQLiteSourceStorage(":memory:")
+        await storage.insert_many("known_sources", [{"url": f"https://s{i:02}.ua"} for i in range(25)])
+        analyzer = FlakyAnalyzer()
+        progress = await service(storage, analyzer).run()
+        return analyzer, progress, await storage.count("source_analysis")
+
+    analyzer, progress, stored = asyncio.run(main())
+    assert sorted(analyzer.urls) == [f"https://s{i:02}.ua" for i in range(25)]
+    assert progress["status"] == "completed"
+    assert (progress["scanned"], progress["processed"], progress["total"], stored) == (25, 25, 25, 25)
+
+def test_resume_after_inserts_and_deletes_neither_skips_nor_repeats():
+    async def main():
+        storage = SQLiteSourceStorage(":memory:")
+        await storage.insert_many("known_sources", [{"url": f"https://s{i:02}.ua"} for i in range(30)])
+        first = FlakyAnalyzer(fail_on_batch=2)
+        run = await service(storage, first).run()
+        assert run["status"] == "failed" and run["scanned"] == 10
+
+        # Між запусками реєстр змінився: частину вже оброблених джерел
+        # видалено, додано нові - зсув (offset) пропустив би необроблені
+        sources = await storage.list_after("known_sources")
+        done = [source for source in sources if source["url"] in first.urls]
+        await storage.delete_many("known_sources", [source["_id"] for source in done[:5]])
+        await storage.insert_many("known_sources", [{"url": f"https://new{i}.ua"} for i in range(5)])
+
+        second = FlakyAnalyzer()
+        resumed = await service(storage, second).run(run["run_id"])
+        return first, second, resumed
+
+    first, second, resumed = asyncio.run(main())
+    originals = {f"https://s{i:02}.ua" for i in range(30)}
+    assert resumed["status"] == "completed"
+    assert not set(first.urls) & set(second.urls)
+    assert len(second.urls) == len(set(second.urls))
+    assert originals == set(first.urls) | (set(second.urls) & originals)
@@ -0,0 +1,36 @@
+import threading
+import time
+
+import pytest
+
+from backend.services.search_service import SearchBatchState
+
+def test_concurrent_queries_share_one_computation():
+    batch = SearchBatchState()
+    calls = []
+
+    def resolve(link):
+        calls.append(link)
+        time.sleep(0.1)
+        return f"https://{link}.com.ua/"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        batch.cached(batch.resolved, "batch_resolve", "news", resolve))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["news"]
+    assert results == ["https://news.com.ua/"] * 8
+
+def test_failures_are_not_cached():
+    batch = SearchBatchState()
+
+    def failing(url):
+        raise RuntimeError("browser crashed")
+
+    with pytest.raises(RuntimeError):
+        batch.cached(batch.analyses, "batch_analysis", "https://a.ua", failing)
+    assert batch.cached(batch.analyses, "batch_analysis", "https://a.ua", lambda url: {"url": url}) == {
+        "url": "https://a.ua"}
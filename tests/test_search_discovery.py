@@ -0,0 +1,60 @@
+from backend.config.liveness_config import liveness_config
+from backend.services import search_service as search_module
+from backend.services.discovery_state import DiscoveryState
+from backend.services.search_service import SearchService
+
+ENTRIES = {
+    "https://live.ua/a": "live.ua",
+    "https://dead.ua/a": "dead.ua",
+    "https://broken.ua/a": "broken.ua",
+    "https://nodomain.ua/a": "",
+}
+
+def test_only_collected_entries_are_marked(monkeypatch):
+    service = SearchService(use_browser=False)
+    service.ddg_backend = lambda query, max_results: [{"href": url, "title": url} for url in ENTRIES]
+    monkeypatch.setattr(service, "google_news_entries", lambda query: [])
+
+    def analyze(url):
+        if "broken" in url:
+            raise RuntimeError("analysis failed")
+        return {"domain": ENTRIES[url], "description": ""}
+
+    monkeypatch.setattr(service, "_analyze_url", analyze)
+    monkeypatch.setattr(search_module.provider_cache, "get", lambda provider, query, params, fetch: fetch())
+    monkeypatch.setattr(search_module.source_matcher, "match_many", lambda urls: [None for _ in urls])
+    monkeypatch.setattr(liveness_config, "LIVENESS_CHECK", True)
+    monkeypatch.setattr(search_module.liveness_checker, "check", lambda domains: {
+        domain: {"status": "dead" if domain == "dead.ua" else "live"} for domain in domains})
+
+    discovery = DiscoveryState("news")
+    results = service.search_media("news", discovery=discovery)
+
+    assert [result["domain"] for result in results] == ["live.ua"]
+    marked = DiscoveryState("news", fingerprints=discovery.fingerprints, skip_seen=True)
+    assert [url for url in ENTRIES if marked.is_seen(urls=[url])] == ["https://live.ua/a"]
+
+def test_duplicates_of_collected_stories_are_not_reprocessed(monkeypatch):
+    story = "Уряд ухвалив бюджет на наступний рік, депутати обговорили видатки на освіту"
+    service = SearchService(use_browser=False)
+    service.ddg_backend = lambda query, max_results: [
+        {"href": "https://ukrinform.ua/budget", "title": story},
+        {"href": "https://ukrinform.ua/budget-copy", "title": story},
+    ]
+    monkeypatch.setattr(service, "google_news_entries", lambda query: [])
+    analyzed = []
+    monkeypatch.setattr(service, "_analyze_url", lambda url: analyzed.append(url) or {
+        "domain": "ukrinform.ua", "description": ""})
+    monkeypatch.setattr(search_module.provider_cache, "get", lambda provider, query, params, fetch: fetch())
+    monkeypatch.setattr(search_module.source_matcher, "match_many", lambda urls: [None for _ in urls])
+    monkeypatch.setattr(liveness_config, "LIVENESS_CHECK", False)
+
+    first = DiscoveryState("budget")
+    assert [result["domain"] for result in service.search_media("budget", discovery=first)] == ["ukrinform.ua"]
+    assert analyzed == ["https://ukrinform.ua/budget"]
+
+    # Другий запуск: ні представник, ні його дублікат більше не обробляються
+    second = DiscoveryState("budget", fingerprints=first.fingerprints, skip_seen=True)
+    assert service.search_media("budget", discovery=second) == []
+    assert analyzed == ["https://ukrinform.ua/budget"]
+    assert second.skipped == 2
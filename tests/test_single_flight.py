@@ -0,0 +1,102 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from backend.services.metrics import SINGLE_FLIGHT
+from backend.services.single_flight import SingleFlight
+
+class SlowCall:
+    """Виклик, що тримає лідера, доки тест його не відпустить."""
+
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return (self.result, args)
+
+def flight():
+    return SingleFlight(f"test-{uuid.uuid4().hex[:8]}")
+
+def joined(single_flight, count):
+    """Чекає, доки `count` викликів приєднаються до лідера."""
+    for _ in range(500):
+        if SINGLE_FLIGHT.value(name=single_flight.name, role="shared") >= count:
+            return True
+        time.sleep(0.01)
+    return False
+
+def run_concurrently(single_flight, call, joiners):
+    outcomes = [None] * (joiners + 1)
+
+    def worker(index):
+        try:
+            outcomes[index] = single_flight.do("key", call, "arg")
+        except Exception as e:
+            outcomes[index] = e
+
+    leader = threading.Thread(target=worker, args=(0,))
+    leader.start()
+    assert call.started.wait(5)
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, joiners + 1)]
+    for thread in threads:
+        thread.start()
+    assert joined(single_flight, joiners)
+    call.release.set()
+    for thread in [leader] + threads:
+        thread.join(5)
+    return outcomes
+
+def test_joiners_share_leader_result():
+    single_flight, call = flight(), SlowCall(result=["a"])
+    outcomes = run_concurrently(single_flight, call, joiners=4)
+    assert call.calls == 1
+    assert outcomes[0] == ((["a"], ("arg",)), False)
+    assert all(outcome == ((["a"], ("arg",)), True) for outcome in outcomes[1:])
+    # Спільне значення - той самий об'єкт, а не копія
+    assert all(outcome[0] is outcomes[0][0] for outcome in outcomes[1:])
+
+def test_exception_propagates_to_joiners():
+    error = RuntimeError("provider down")
+    single_flight, call = flight(), SlowCall(error=error)
+    outcomes = run_concurrently(single_flight, call, joiners=3)
+    assert call.calls == 1
+    assert all(outcome is error for outcome in outcomes)
+
+def test_key_is_removed_after_completion():
+    single_flight, call = flight(), SlowCall(result="a")
+    run_concurrently(single_flight, call, joiners=2)
+    assert len(single_flight) == 0
+    # Нічого не кешується: наступний виклик знову виконує роботу
+    assert single_flight.do("key", lambda: "b") == ("b", False)
+
+def test_key_is_removed_after_failure():
+    single_flight = flight()
+
+    def fail():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", fail)
+    assert len(single_flight) == 0
+    assert single_flight.do("key", lambda: "ok") == ("ok", False)
+
+def test_different_keys_run_independently():
+    single_flight, call = flight(), SlowCall(result="slow")
+    leader = threading.Thread(target=single_flight.do, args=("slow", call))
+    leader.start()
+    assert call.started.wait(5)
+    assert single_flight.do("fast", lambda: "fast") == ("fast", False)
+    call.release.set()
+    leader.join(5)
+    assert call.calls == 1
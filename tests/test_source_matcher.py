@@ -0,0 +1,55 @@
+import pytest
+
+from backend.services import ingestion_service
+from backend.services.ingestion_service import merge_known
+from backend.services.source_matcher import SourceMatcher
+
+SOURCES = [
+    {"_id": 1, "url": "https://suspilne.media/", "domain": "suspilne.media", "name": "Суспільне"},
+    {"_id": 2, "url": "https://bbc.co.uk/ukrainian", "domain": "bbc.co.uk", "name": "BBC Україна"},
+    {"_id": 3, "url": "https://bbc.co.uk/russian", "domain": "bbc.co.uk", "name": "BBC Русская служба"},
+    {"_id": 4, "url": "https://t.me/hromadske_ua", "domain": "t.me", "name": "Громадське"},
+    {"_id": 5, "url": "https://zaxid.net", "domain": "zaxid.net", "name": "Zaxid", "social_alias": "@zaxidnet"},
+    {"_id": 6, "url": "https://lb.ua", "domain": "lb.ua", "name": "LB", "social_alias": "https://facebook.com/lb.ua"},
+]
+
+@pytest.fixture
+def matcher():
+    matcher = SourceMatcher()
+    matcher.add_many(SOURCES)
+    return matcher
+
+def matched(matcher, value):
+    match = matcher.match(value)
+    return match and (match["source"]["_id"], match["exact"])
+
+@pytest.mark.parametrize("value, expected", [
+    # www. і схема не змінюють джерела
+    ("http://www.suspilne.media", (1, True)),
+    ("suspilne.media/", (1, True)),
+    # Субдомен і сторінка сайту - те саме видання, але не точна адреса
+    ("https://kyiv.suspilne.media/news", (1, False)),
+    ("https://suspilne.media/2024/10/story", (1, False)),
+    # Розділи одного хоста - різні джерела
+    ("https://www.bbc.co.uk/ukrainian/", (2, True)),
+    ("https://bbc.co.uk/russian", (3, True)),
+    ("https://www.bbc.co.uk/news", (2, False)),
+    # Канал на платформі; сама платформа й інші канали - не джерела
+    ("https://t.me/s/hromadske_ua", (4, True)),
+    ("https://t.me/other_channel", None),
+    ("https://facebook.com", None),
+    # Псевдоніми: @handle на будь-якій платформі та сторінка в соцмережі
+    ("https://instagram.com/zaxidnet", (5, True)),
+    ("https://www.facebook.com/lb.ua/", (6, True)),
+    ("https://unknown.ua", None),
+])
+def test_match(matcher, value, expected):
+    assert matched(matcher, value) == expected
+
+def test_merge_known_keeps_distinct_sections(matcher, monkeypatch):
+    monkeypatch.setattr(ingestion_service, "source_matcher", matcher)
+    rows = [{"url": "https://www.bbc.co.uk/ukrainian/"}, {"url": "https://www.bbc.co.uk/news"},
+            {"url": "http://suspilne.media"}]
+    assert merge_known(rows) == 2
+    assert [row["url"] for row in rows] == [
+        "https://bbc.co.uk/ukrainian", "https://www.bbc.co.uk/news", "https://suspilne.media/"]
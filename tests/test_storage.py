@@ -0,0 +1,151 @@
+"""Conformance and bulk performance suite shared by both storage backends.
+
+The Mongo backend runs against TEST_MONGODB_URL when it is set and
+against mongomock-motor otherwise.
+"""
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+
+from backend.services.storage_service import MongoSourceStorage, SQLiteSourceStorage, normalize_key
+
+def sqlite_storage():
+    return SQLiteSourceStorage(":memory:", batch_size=100)
+
+def mongo_storage():
+    database = f"sm_parse_test_{uuid.uuid4().hex[:8]}"
+    url = os.getenv("TEST_MONGODB_URL")
+    if url:
+        return MongoSourceStorage(url, database, batch_size=100)
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    return MongoSourceStorage(database=database, batch_size=100,
+                              client=mongomock_motor.AsyncMongoMockClient())
+
+@pytest.fixture(params=[sqlite_storage, mongo_storage], ids=["sqlite", "mongo"])
+def run(request):
+    """Runs `scenario(storage)` on a fresh, initialized backend."""
+    factory = request.param
+
+    def runner(scenario):
+        async def main():
+            storage = factory()
+            await storage.init()
+            try:
+                return await scenario(storage)
+            finally:
+                if isinstance(storage, MongoSourceStorage):
+                    await storage.client.drop_database(storage.db.name)
+                await storage.close()
+        return asyncio.run(main())
+    # mongomock відтворює поведінку, але не швидкодію Mongo
+    runner.mocked = factory is mongo_storage and not os.getenv("TEST_MONGODB_URL")
+    return runner
+
+def test_normalize_key():
+    assert normalize_key("https://a.ua") == "https://a.ua"
+    assert normalize_key(42) == "42"
+    assert normalize_key(None) is None
+    assert normalize_key("") is None
+    assert normalize_key(float("nan")) is None
+
+def test_insert_many_skips_duplicates_and_empty_keys(run):
+    async def scenario(storage):
+        inserted = await storage.insert_many("known_sources", [
+            {"url": "https://a.ua", "name": "A"},
+            {"url": "https://b.ua", "name": "B"},
+            {"url": "https://a.ua", "name": "A2"},
+            {"url": None, "name": "no key"},
+            {"url": "", "name": "empty"},
+            {"url": float("nan"), "name": "nan"},
+            {"name": "missing"},
+        ])
+        again = await storage.insert_many("known_sources", [{"url": "https://b.ua"}, {"url": "https://c.ua"}])
+        return inserted, again, await storage.count("known_sources")
+    assert run(scenario) == (2, 1, 3)
+
+def test_keys_are_stored_and_found_as_strings(run):
+    async def scenario(storage):
+        await storage.insert_many("ingestion_jobs", [{"job_id": 7, "status": "queued"}])
+        by_str = await storage.find_one("ingestion_jobs", "7")
+        by_int = await storage.find_one("ingestion_jobs", 7)
+        existing = await storage.find_existing("ingestion_jobs", [7, "7", "8"])
+        inserted, updated = await storage.upsert_many("ingestion_jobs", [{"job_id": "7", "status": "done"}])
+        return by_str, by_int, existing, inserted, updated, await storage.find_one("ingestion_jobs", 7)
+    by_str, by_int, existing, inserted, updated, after = run(scenario)
+    assert by_str["job_id"] == "7" and by_int["_id"] == by_str["_id"]
+    assert existing == {"7"}
+    assert (inserted, updated) == (0, 1)
+    assert after["status"] == "done"
+
+def test_upsert_merges_fields(run):
+    async def scenario(storage):
+        first = await storage.upsert_many("new_sources", [{"url": "https://a.ua", "name": "A", "tags": ["x"]}])
+        second = await storage.upsert_many("new_sources", [
+            {"url": "https://a.ua", "category": "news"},
+            {"url": "https://b.ua", "name": "B"},
+        ])
+        return first, second, await storage.find_one("new_sources", "https://a.ua")
+    first, second, doc = run(scenario)
+    assert first == (1, 0)
+    assert second == (1, 1)
+    assert doc["name"] == "A" and doc["tags"] == ["x"] and doc["category"] == "news"
+    assert isinstance(doc["_id"], str)
+
+def test_list_count_update_delete(run):
+    async def scenario(storage):
+        await storage.insert_many("new_sources", [
+            {"url": f"https://s{i}.ua", "status": "new" if i % 2 else "checked"} for i in range(10)
+        ])
+        page = await storage.list("new_sources", skip=2, limit=3)
+        checked = await storage.count("new_sources", {"status": "checked"})
+        updated = await storage.update_one("new_sources", page[0]["_id"], {"status": "checked"})
+        missing = await storage.update_one("new_sources", "0" * 24, {"status": "checked"})
+        deleted = await storage.delete_many("new_sources", [doc["_id"] for doc in page])
+        return page, checked, updated, missing, deleted, await storage.count("new_sources")
+    page, checked, updated, missing, deleted, remaining = run(scenario)
+    assert [doc["url"] for doc in page] == ["https://s2.ua", "https://s3.ua", "https://s4.ua"]
+    assert checked == 5
+    assert updated is True and missing is False
+    assert (deleted, remaining) == (3, 7)
+
+def test_iter_batches_covers_collection_in_order(run):
+    async def scenario(storage):
+        await storage.insert_many("known_sources", [{"url": f"https://s{i:03}.ua"} for i in range(250)])
+        return [[doc["url"] for doc in batch] async for batch in storage.iter_batches("known_sources", 100)]
+    batches = run(scenario)
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert [url for batch in batches for url in batch] == [f"https://s{i:03}.ua" for i in range(250)]
+
+def test_list_after_cursor_survives_inserts_and_deletes(run):
+    async def scenario(storage):
+        await storage.insert_many("known_sources", [{"url": f"https://s{i}.ua"} for i in range(10)])
+        first = await storage.list_after("known_sources", limit=4)
+        cursor = first[-1]["_id"]
+        # Видалено і сам курсор, і вже прочитане - решта не зсувається
+        await storage.delete_many("known_sources", [doc["_id"] for doc in first])
+        rest = await storage.list_after("known_sources", cursor)
+        return first, rest
+    first, rest = run(scenario)
+    assert len(first) == 4 and len(rest) == 6
+    assert {doc["url"] for doc in first + rest} == {f"https://s{i}.ua" for i in range(10)}
+    assert [doc["_id"] for doc in first + rest] == sorted(doc["_id"] for doc in first + rest)
+
+def test_bulk_write_and_lookup_throughput(run):
+    if run.mocked:
+        pytest.skip("performance is only measured against a real mongod (TEST_MONGODB_URL)")
+    rows = 20000
+
+    async def scenario(storage):
+        documents = [{"url": f"https://site{i}.com.ua", "name": f"Media {i}"} for i in range(rows)]
+        started = time.perf_counter()
+        inserted = await storage.insert_many("known_sources", documents)
+        upserted = await storage.upsert_many("known_sources", documents[::2])
+        existing = await storage.find_existing("known_sources", [doc["url"] for doc in documents])
+        return inserted, upserted, len(existing), time.perf_counter() - started
+    inserted, upserted, existing, elapsed = run(scenario)
+    assert (inserted, upserted, existing) == (rows, (0, rows // 2), rows)
+    # Пакетні записи: десятки тисяч документів за секунди, а не хвилини
+    assert elapsed < 30, f"{rows} documents took {elapsed:.1f}s"
@@ -0,0 +1,35 @@
+from backend.services.story_clustering import cluster, simhash, strip_publisher
+
+BUDGET = "Уряд ухвалив бюджет на 2025 рік"
+
+def test_strip_publisher():
+    assert strip_publisher(f"{BUDGET} - Укрінформ") == BUDGET
+    assert strip_publisher(f"{BUDGET} | Суспільне Новини") == BUDGET
+    assert strip_publisher(BUDGET) == BUDGET
+    assert strip_publisher(None) == ""
+
+def test_exact_duplicates_share_representative():
+    assert cluster([BUDGET, BUDGET, BUDGET]) == [0, 0, 0]
+
+def test_publisher_suffix_does_not_split_story():
+    texts = [BUDGET, f"{BUDGET} - Укрінформ", f"{BUDGET} — Економічна правда"]
+    assert cluster(texts) == [0, 0, 0]
+
+def test_suffixed_ddg_title_with_body_matches_google_news_title():
+    body = "Верховна Рада підтримала законопроєкт про державний бюджет у другому читанні"
+    texts = [f"{strip_publisher(BUDGET + ' - Укрінформ')} {body}", f"{BUDGET} {body}"]
+    assert cluster(texts) == [0, 0]
+
+def test_unrelated_texts_stay_apart():
+    texts = [
+        BUDGET,
+        "У Харкові відкрили нову станцію метро",
+        f"{BUDGET} - Укрінформ",
+        "Збірна України з футболу виграла товариський матч",
+        "",
+    ]
+    assert cluster(texts) == [0, 1, 0, 3, 4]
+
+def test_empty_input():
+    assert cluster([]) == []
+    assert len(simhash(["", None])) == 2